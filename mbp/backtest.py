@@ -0,0 +1,251 @@
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from mbp.files import atomic_path
+from mbp.paths import BACKTEST_DIR
+from mbp.predict import MARGIN_SD, predict_with
+from mbp.ratings import ELO_HOME, ELO_K, RIDGE, RatingSystem, rating_games
+from mbp.store import get_store
+
+# Walk-forward backtests
+#
+# A season is replayed a day at a time: the ratings as of each day with
+# games only use the games played before it (each day's solve starting
+# from the day before's, see mbp/ratings.py) and predict that day's games.
+# The predictions are scored with log loss, Brier score, accuracy, the
+# error of the predicted margin and, for games with a betting line,
+# against the spread.
+#
+# Every pair of a season and a config is a task for a process pool. The
+# games of a season (reconciled from the games table, with their
+# possessions) are built once and cached as parquet under data/backtest,
+# named after the store versions they come from, so workers read them
+# instead of building them again.
+
+# Log loss of probabilities clipped away from 0 and 1
+EPSILON = 1e-6
+
+PREDICTION_COLUMNS = [
+    "contest_id",
+    "datetime",
+    "home_team",
+    "away_team",
+    "neutral",
+    "home_score",
+    "away_score",
+    "home_games",
+    "away_games",
+    "margin",
+    "spread",
+    "win_probability",
+    "elo_probability",
+]
+
+
+@dataclass(frozen=True)
+class BacktestConfig:
+    """
+    The parameters of the ratings and predictions to backtest
+    """
+
+    ridge: float = RIDGE
+    elo_k: float = ELO_K
+    elo_home: float = ELO_HOME
+    margin_sd: float = MARGIN_SD
+    # Only games where both teams have played this many games are scored
+    min_games: int = 3
+
+    @property
+    def name(self) -> str:
+        return " ".join(f"{f.name}={getattr(self, f.name)}" for f in fields(self))
+
+
+def season_games_path(year: int) -> Path:
+    store = get_store()
+    versions = (store.version("games", year), store.version("team_features", year))
+    return BACKTEST_DIR / f"season={year}" / "games-{}-{}.parquet".format(*versions)
+
+
+def cache_season_games(year: int) -> Path:
+    """
+    Build the games of a season for backtests unless they are cached for
+    the current store versions, returns the cached file
+    """
+    path = season_games_path(year)
+    if path.exists():
+        return path
+
+    games = rating_games(year)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for stale in path.parent.glob("games-*.parquet"):
+        stale.unlink()
+    with atomic_path(path, suffix=".parquet") as tmp:
+        games.to_parquet(tmp, index=False)
+    return path
+
+
+def walk_forward(games: pd.DataFrame, config: BacktestConfig = None) -> pd.DataFrame:
+    """
+    Predict every game of a season from the ratings as of its day
+    """
+    config = config or BacktestConfig()
+    system = RatingSystem(games, config.ridge, config.elo_k, config.elo_home)
+    games = system.games
+
+    frames = []
+    for ratings in system.each_day(system.game_days()):
+        first = system.games_before(ratings.as_of)
+        last = system.games_before(ratings.as_of + pd.Timedelta(days=1))
+        day_games = games.iloc[first:last]
+        home = ratings.teams.get_indexer(day_games["home_team"])
+        away = ratings.teams.get_indexer(day_games["away_team"])
+        predicted = predict_with(
+            ratings,
+            day_games["home_team"],
+            day_games["away_team"],
+            day_games["neutral"].fillna(0).to_numpy("float64"),
+            config.margin_sd,
+            config.elo_home,
+        )
+        predicted.index = day_games.index
+        predicted["home_games"] = ratings.games[home]
+        predicted["away_games"] = ratings.games[away]
+        frames.append(predicted)
+
+    if not frames:
+        return pd.DataFrame(columns=PREDICTION_COLUMNS)
+    return games.join(pd.concat(frames))[PREDICTION_COLUMNS]
+
+
+def score_predictions(predictions: pd.DataFrame) -> pd.Series:
+    """
+    Log loss, Brier score and accuracy of the predicted home wins (from the
+    margin and from Elo), mean absolute error of the margin and, when the
+    predictions have a "line" column (the home team's betting line),
+    accuracy against the spread
+    """
+    if predictions.empty:
+        return pd.Series({"games": 0})
+    actual = (predictions["home_score"] - predictions["away_score"]).astype("float64")
+    won = (actual > 0).to_numpy("float64")
+    scores = {"games": len(predictions)}
+    for name in ["win_probability", "elo_probability"]:
+        prefix = "" if name == "win_probability" else "elo_"
+        chance = np.clip(predictions[name].to_numpy("float64"), EPSILON, 1 - EPSILON)
+        scores[f"{prefix}log_loss"] = -np.mean(
+            won * np.log(chance) + (1 - won) * np.log(1 - chance)
+        )
+        scores[f"{prefix}brier"] = np.mean((chance - won) ** 2)
+        scores[f"{prefix}accuracy"] = np.mean((chance > 0.5) == won)
+    scores["margin_mae"] = np.mean(np.abs(predictions["margin"] - actual))
+
+    scores["ats_games"] = 0
+    scores["ats_accuracy"] = np.nan
+    if "line" in predictions.columns:
+        line = predictions["line"].astype("float64")
+        # Pushes and games without a line don't count
+        result = actual + line
+        graded = line.notna() & (result != 0)
+        picked_home = (predictions["margin"] + line)[graded] > 0
+        scores["ats_games"] = int(graded.sum())
+        if graded.any():
+            scores["ats_accuracy"] = np.mean(picked_home == (result[graded] > 0))
+    return pd.Series(scores)
+
+
+def run_backtest(
+    year: int, path: Path, config: BacktestConfig, lines: pd.DataFrame = None
+) -> pd.DataFrame:
+    """
+    Walk forward through a season from its cached games, the predictions of
+    the games where both teams played enough games
+    """
+    predictions = walk_forward(pd.read_parquet(path), config)
+    enough = predictions[["home_games", "away_games"]].min(axis=1) >= config.min_games
+    predictions = predictions.loc[enough]
+    if lines is not None:
+        lines = lines.astype({"contest_id": "string"}).set_index("contest_id")
+        predictions = predictions.assign(
+            line=predictions["contest_id"].map(lines["line"])
+        )
+    return predictions.assign(season=year)
+
+
+def backtest(
+    seasons: list,
+    configs: list = None,
+    workers: int = None,
+    lines: pd.DataFrame = None,
+) -> pd.DataFrame:
+    """
+    Backtest configs over seasons, every (season, config) pair in a process
+    pool. `lines` (contest_id, line) are the home teams' betting lines.
+    Returns the scores of each config per season and over all of them
+    """
+    # Repeated configs or seasons would be run again and counted twice
+    configs = list(dict.fromkeys(configs or [BacktestConfig()]))
+    seasons = list(dict.fromkeys(seasons))
+    paths = {year: cache_season_games(year) for year in seasons}
+    tasks = [
+        (year, paths[year], config, lines)
+        for (config, year) in itertools.product(configs, seasons)
+    ]
+    workers = max(1, min(workers or os.cpu_count(), len(tasks)))
+
+    if workers == 1:
+        results = [run_backtest(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(run_backtest, *task) for task in tasks]
+            results = [future.result() for future in futures]
+
+    scores = []
+    for config in configs:
+        runs = [result for task, result in zip(tasks, results) if task[2] == config]
+        for year, predictions in zip(seasons, runs):
+            scores.append(score_predictions(predictions).rename((config.name, year)))
+        played = [run for run in runs if not run.empty]
+        everything = pd.concat(played, ignore_index=True) if played else runs[0]
+        scores.append(score_predictions(everything).rename((config.name, "all")))
+    scores = pd.DataFrame(scores)
+    scores.index = pd.MultiIndex.from_tuples(scores.index, names=["config", "season"])
+    return scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the ratings")
+    parser.add_argument(
+        "seasons", type=int, nargs="+", help="season start years, eg. 2022"
+    )
+    parser.add_argument("--ridge", type=float, nargs="+", default=[RIDGE])
+    parser.add_argument("--elo-k", type=float, nargs="+", default=[ELO_K])
+    parser.add_argument("--elo-home", type=float, nargs="+", default=[ELO_HOME])
+    parser.add_argument("--margin-sd", type=float, nargs="+", default=[MARGIN_SD])
+    parser.add_argument("--min-games", type=int, default=3)
+    parser.add_argument("--lines", help="csv of betting lines: contest_id, line")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    configs = [
+        BacktestConfig(ridge, elo_k, elo_home, margin_sd, args.min_games)
+        for (ridge, elo_k, elo_home, margin_sd) in itertools.product(
+            args.ridge, args.elo_k, args.elo_home, args.margin_sd
+        )
+    ]
+    lines = pd.read_csv(args.lines) if args.lines else None
+    scores = backtest(args.seasons, configs, args.workers, lines)
+    with pd.option_context(
+        "display.max_rows", None, "display.max_columns", None, "display.width", 200
+    ):
+        print(scores.round(4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from mbp.predict import MatchupMatrix
+from mbp.ratings import Ratings, load_ratings
+
+# March Madness bracket simulator
+#
+# A field of 68 teams (a team, region and seed each, two teams sharing a
+# region and seed meet in the First Four) is laid out as the 64 first
+# round slots of the bracket, the regions ordered by the announced
+# semifinal pairings so the Final Four is played between the right
+# regions. A batch of tournaments is simulated a round
+# at a time as array operations: the winners of a round are an array of
+# team numbers (one row per tournament), the next round pairs neighbouring
+# columns and draws every game of every tournament at once from the
+# pairwise win probabilities. Batches are split across processes, each
+# with its own random stream spawned from one seed, and only the counts of
+# how far each team went come back.
+#
+# The expected points of a bracket in a pool only depend on the chance of
+# each pick advancing, so the pool-optimal picks are found by dynamic
+# programming over the bracket from the advancement probabilities.
+
+# First round order of the seeds in a region
+SEED_ORDER = [1, 16, 8, 9, 5, 12, 4, 13, 6, 11, 3, 14, 7, 10, 2, 15]
+
+# How far a team went, after the First Four and after each round
+ROUNDS = [
+    "round_of_64",
+    "round_of_32",
+    "sweet_16",
+    "elite_8",
+    "final_4",
+    "championship",
+    "champion",
+]
+
+# Points of a correct pick in each round of the 64 team bracket
+POOL_POINTS = [1, 2, 4, 8, 16, 32]
+
+# Tournaments simulated at once by a process
+BATCH_SIMULATIONS = 20_000
+
+
+class Field:
+    """
+    The teams of a tournament in bracket order. Each of the 64 first round
+    slots holds one team, or the two teams of a First Four game.
+    `semifinals` are the two pairs of regions whose winners meet in the
+    Final Four, eg. [("East", "West"), ("South", "Midwest")]
+    """
+
+    def __init__(self, teams: pd.DataFrame, semifinals: list) -> None:
+        teams = teams.assign(
+            team=teams["team"].astype(str), seed=teams["seed"].astype(int)
+        )
+        self.semifinals = [tuple(pair) for pair in semifinals]
+        self.regions = [region for pair in self.semifinals for region in pair]
+        field_regions = set(teams["region"])
+        if (
+            len(self.semifinals) != 2
+            or len(self.regions) != 4
+            or set(self.regions) != field_regions
+            or len(field_regions) != 4
+        ):
+            raise ValueError(
+                f"The semifinals have to pair the 4 regions {sorted(field_regions)}, "
+                f"got {semifinals}"
+            )
+
+        slots = []
+        for region in self.regions:
+            in_region = teams.loc[teams["region"] == region]
+            for seed in SEED_ORDER:
+                slot = list(in_region.loc[in_region["seed"] == seed, "team"])
+                if len(slot) not in (1, 2):
+                    raise ValueError(f"{region} has {len(slot)} teams seeded {seed}")
+                slots.append(slot)
+
+        self.teams = pd.Index([team for slot in slots for team in slot])
+        if not self.teams.is_unique:
+            raise ValueError("A team is in the field twice")
+        self.seeds = teams.set_index("team").loc[self.teams, ["region", "seed"]]
+        positions = self.teams.get_indexer
+        self.slot_a = positions([slot[0] for slot in slots])
+        self.slot_b = positions([slot[-1] for slot in slots])
+
+    def __len__(self) -> int:
+        return len(self.teams)
+
+
+def win_probabilities(ratings: Ratings, teams: pd.Index) -> np.ndarray:
+    """
+    The chance of each team beating each other one on a neutral court,
+    from their ratings: rows are the winners, columns the losers
+    """
+    missing = teams[~teams.isin(ratings.teams)]
+    if len(missing):
+        raise ValueError(f"No ratings for {', '.join(missing)}")
+    return MatchupMatrix(ratings).frame(teams).to_numpy()
+
+
+def play_round(teams_a, teams_b, probabilities, rng) -> np.ndarray:
+    """
+    The winners of games between teams_a and teams_b (arrays of team
+    numbers, a row per tournament)
+    """
+    n_teams = len(probabilities)
+    chance = probabilities.ravel()[teams_a * n_teams + teams_b]
+    won = rng.random(chance.shape, dtype=np.float32) < chance
+    # Arithmetic instead of np.where, which is several times slower on
+    # random masks
+    return teams_b + won * (teams_a - teams_b)
+
+
+def simulate_counts(
+    slot_a: np.ndarray,
+    slot_b: np.ndarray,
+    probabilities: np.ndarray,
+    simulations: int,
+    seed: np.random.SeedSequence,
+) -> np.ndarray:
+    """
+    Simulate tournaments in batches, the number of times each team got
+    through each round (rows are teams, columns ROUNDS)
+    """
+    rng = np.random.default_rng(seed)
+    probabilities = np.ascontiguousarray(probabilities, dtype=np.float32)
+    n_teams = len(probabilities)
+    slot_a = slot_a.astype(np.intp)
+    slot_b = slot_b.astype(np.intp)
+    first_four = slot_a != slot_b
+    counts = np.zeros((n_teams, len(ROUNDS)), dtype=np.int64)
+
+    for start in range(0, simulations, BATCH_SIMULATIONS):
+        size = min(BATCH_SIMULATIONS, simulations - start)
+        winners = np.tile(slot_a, (size, 1))
+        winners[:, first_four] = play_round(
+            winners[:, first_four], slot_b[first_four], probabilities, rng
+        )
+        counts[:, 0] += np.bincount(winners.ravel(), minlength=n_teams)
+        for round_number in range(1, len(ROUNDS)):
+            winners = play_round(winners[:, 0::2], winners[:, 1::2], probabilities, rng)
+            counts[:, round_number] += np.bincount(winners.ravel(), minlength=n_teams)
+    return counts
+
+
+def simulate_bracket(
+    field: Field,
+    probabilities: np.ndarray,
+    simulations: int = 1_000_000,
+    workers: int = None,
+    seed: int = None,
+) -> pd.DataFrame:
+    """
+    The chance of each team of the field getting through each round, from
+    `simulations` tournaments split across `workers` processes (all cores
+    by default). `probabilities[i, j]` is the chance of the field's i-th
+    team beating the j-th
+    """
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    if probabilities.shape != (len(field), len(field)):
+        raise ValueError(
+            f"Expected {len(field)}x{len(field)} probabilities, "
+            f"got {probabilities.shape}"
+        )
+    workers = max(1, min(workers or os.cpu_count(), simulations))
+    shares = np.diff(np.linspace(0, simulations, workers + 1).astype(int))
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    args = (field.slot_a, field.slot_b, probabilities)
+
+    if workers == 1:
+        counts = simulate_counts(*args, shares[0], seeds[0])
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(simulate_counts, *args, share, worker_seed)
+                for (share, worker_seed) in zip(shares, seeds)
+            ]
+            counts = sum(future.result() for future in futures)
+
+    advancement = pd.DataFrame(counts / simulations, columns=ROUNDS)
+    advancement.insert(0, "team", field.teams)
+    advancement.insert(1, "region", field.seeds["region"].to_numpy())
+    advancement.insert(2, "seed", field.seeds["seed"].to_numpy())
+    return advancement.sort_values(
+        ["champion", "final_4"], ascending=False, ignore_index=True
+    )
+
+
+def pool_picks(
+    field: Field, advancement: pd.DataFrame, points: list = POOL_POINTS
+) -> pd.DataFrame:
+    """
+    The bracket with the most expected points in a pool scoring `points`
+    per correct pick in each round, one row per game with the pick and its
+    chance of winning the game
+    """
+    chances = advancement.set_index("team").loc[field.teams, ROUNDS[1:]].to_numpy()
+    n_teams = len(field)
+
+    # best[slot, team]: the most expected points of the picks in a part of
+    # the bracket when `team` is picked to come out of it, -inf for teams
+    # not in it
+    best = np.full((len(field.slot_a), n_teams), -np.inf)
+    slots = np.arange(len(field.slot_a))
+    best[slots, field.slot_a] = 0
+    best[slots, field.slot_b] = 0
+
+    levels = [best]
+    for round_number, round_points in enumerate(points):
+        left = best[0::2]
+        right = best[1::2]
+        best = np.maximum(
+            left + right.max(axis=1, keepdims=True),
+            right + left.max(axis=1, keepdims=True),
+        )
+        best += round_points * chances[:, round_number]
+        levels.append(best)
+
+    # Pick the winners from the champion down
+    picks = []
+    winners = [int(np.argmax(levels[-1][0]))]
+    for round_number in range(len(points), 0, -1):
+        below = levels[round_number - 1]
+        next_winners = []
+        for game, winner in enumerate(winners):
+            for part in (2 * game, 2 * game + 1):
+                if np.isfinite(below[part, winner]):
+                    next_winners.append(winner)
+                else:
+                    next_winners.append(int(np.argmax(below[part])))
+            picks.append(
+                {
+                    "round": ROUNDS[round_number - 1],
+                    "game": game,
+                    "team": field.teams[winner],
+                    "seed": field.seeds["seed"].iloc[winner],
+                    "chance": chances[winner, round_number - 1],
+                }
+            )
+        winners = next_winners
+    picks = pd.DataFrame(picks)
+    order = picks["round"].map(ROUNDS.index)
+    return picks.iloc[np.lexsort([picks["game"], order])].reset_index(drop=True)
+
+
+def simulate_tournament(
+    year: int,
+    teams: pd.DataFrame,
+    semifinals: list,
+    day=None,
+    simulations: int = 1_000_000,
+    workers: int = None,
+    seed: int = None,
+) -> (pd.DataFrame, pd.DataFrame):
+    """
+    Simulate a season's tournament from the saved ratings (as of a day,
+    the latest by default), with the semifinals pairing the regions as in
+    `Field`. Returns the advancement probabilities and the pool picks
+    """
+    ratings = load_ratings(year, day)
+    if ratings is None:
+        raise ValueError(f"No ratings saved for {year}")
+    field = Field(teams, semifinals)
+    probabilities = win_probabilities(ratings, field.teams)
+    advancement = simulate_bracket(field, probabilities, simulations, workers, seed)
+    return (advancement, pool_picks(field, advancement))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate the tournament")
+    parser.add_argument(
+        "year", type=int, help="season start year, eg. 2023 for 2023-24"
+    )
+    parser.add_argument("field", help="csv of the field: team, region, seed")
+    parser.add_argument(
+        "--semifinal",
+        nargs=2,
+        action="append",
+        required=True,
+        metavar="REGION",
+        help="two regions whose winners meet in a semifinal, given for both",
+    )
+    parser.add_argument("--simulations", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    (advancement, picks) = simulate_tournament(
+        args.year,
+        pd.read_csv(args.field),
+        args.semifinal,
+        simulations=args.simulations,
+        workers=args.workers,
+        seed=args.seed,
+    )
+    with pd.option_context("display.max_rows", None, "display.width", 120):
+        print(advancement.round(4).to_string(index=False))
+        print()
+        print(picks.round(4).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
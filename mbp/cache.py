@@ -0,0 +1,232 @@
+import gzip
+import hashlib
+import json
+import re
+import time
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from mbp.fetchers import FetchError, Fetcher, Page, get_fetcher
+from mbp.files import write_atomic
+from mbp.paths import PAGES_DIR
+from mbp.utils import get_academic_year
+
+# On disk cache of raw pages
+#
+# Page bodies are stored gzipped under the sha256 of their content, so the
+# same html is only stored once. An index entry per normalized url (plus
+# query params) points at the body along with when it was fetched and the
+# validators (etag / last-modified) needed to revalidate it.
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+# Which kind of page a url is, checked in order
+PAGE_TYPES = [
+    (re.compile(r"^/team/inst_team_list"), "team_list"),
+    (re.compile(r"^/contests/livestream_scoreboards"), "scoreboard"),
+    (re.compile(r"^/contests/\d+/box_score|^/game/"), "box_score"),
+    (re.compile(r"/roster/"), "roster"),
+    (re.compile(r"/stats/"), "stats"),
+    (re.compile(r"^/players/"), "game_by_game"),
+    (re.compile(r"^/teams/\d+"), "team"),
+]
+
+# How long pages of the current season stay fresh, in seconds. None means
+# the page never expires (a final box score doesn't change)
+PAGE_TTLS = {
+    "team_list": 7 * DAY,
+    "scoreboard": HOUR,
+    "box_score": None,
+    "roster": DAY,
+    "stats": 6 * HOUR,
+    "game_by_game": 3 * HOUR,
+    "team": 3 * HOUR,
+    "other": 3 * HOUR,
+}
+
+
+class CacheMiss(FetchError):
+    """
+    Raised in offline mode when a page isn't in the cache
+    """
+
+
+def normalize_url(url: str, params: dict = None) -> str:
+    """
+    Normalize a url (and its params) so equivalent requests share a key
+    """
+    parsed = urlparse(url)
+    query = parse_qsl(parsed.query, keep_blank_values=True)
+    if params:
+        query += [(k, str(v)) for k, v in params.items()]
+    path = parsed.path.rstrip("/") or "/"
+    return urlunparse(
+        (
+            parsed.scheme.lower(),
+            parsed.netloc.lower(),
+            path,
+            "",
+            urlencode(sorted(query)),
+            "",
+        )
+    )
+
+
+def page_type(url: str) -> str:
+    path = urlparse(url).path
+    for pattern, kind in PAGE_TYPES:
+        if pattern.search(path):
+            return kind
+    return "other"
+
+
+class PageCache:
+    def __init__(self, root: Path = PAGES_DIR) -> None:
+        self.root = Path(root)
+
+    def key(self, url: str, params: dict = None) -> str:
+        return hashlib.sha256(normalize_url(url, params).encode()).hexdigest()
+
+    def _index_path(self, key: str) -> Path:
+        return self.root / "index" / key[:2] / f"{key}.json"
+
+    def _object_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / f"{digest}.html.gz"
+
+    def lookup(self, url: str, params: dict = None) -> dict:
+        """
+        Get the index entry for a url, or None
+        """
+        path = self._index_path(self.key(url, params))
+        if not path.exists():
+            return None
+        return json.loads(path.read_text())
+
+    def read(self, entry: dict) -> str:
+        with gzip.open(self._object_path(entry["sha256"]), "rt") as f:
+            return f.read()
+
+    def store(self, url: str, params: dict, page: Page) -> dict:
+        """
+        Save a fetched page and return its index entry
+        """
+        headers = {k.lower(): v for k, v in page.headers.items()}
+        body = page.text.encode()
+        digest = hashlib.sha256(body).hexdigest()
+        object_path = self._object_path(digest)
+        if not object_path.exists():
+            write_atomic(object_path, gzip.compress(body))
+
+        entry = {
+            "url": normalize_url(url, params),
+            "final_url": page.url,
+            "status": page.status,
+            "sha256": digest,
+            "fetched_at": time.time(),
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+        }
+        self._write_entry(url, params, entry)
+        return entry
+
+    def touch(self, url: str, params: dict, entry: dict) -> dict:
+        """
+        Mark a cached page as just revalidated
+        """
+        entry = dict(entry, fetched_at=time.time())
+        self._write_entry(url, params, entry)
+        return entry
+
+    def _write_entry(self, url: str, params: dict, entry: dict):
+        path = self._index_path(self.key(url, params))
+        write_atomic(path, json.dumps(entry).encode())
+
+
+class CachingFetcher(Fetcher):
+    """
+    Serve pages from the page cache while they are fresh, revalidating
+    stale pages with conditional requests. Pages of past seasons never
+    expire. In `offline` mode only the cache is used (replay)
+    """
+
+    def __init__(
+        self,
+        fetcher: Fetcher = None,
+        cache: PageCache = None,
+        season: int = None,
+        offline: bool = False,
+        ttls: dict = PAGE_TTLS,
+    ) -> None:
+        self.fetcher = fetcher or get_fetcher(cache=False)
+        super().__init__(self.fetcher.base_url)
+        self.cache = cache or PageCache()
+        self.season = int(season) if season is not None else None
+        self.offline = offline
+        self.ttls = ttls
+        self.hits = 0
+        self.misses = 0
+
+    def max_age(self, url: str) -> float:
+        """
+        How long a page stays fresh in seconds, None if it never expires
+        """
+        kind = page_type(url)
+        current_season = get_academic_year() - 1
+        if self.season is not None and self.season < current_season:
+            # Past seasons don't change anymore (the team list does though)
+            if kind != "team_list":
+                return None
+        return self.ttls.get(kind, self.ttls["other"])
+
+    def is_fresh(self, url: str, entry: dict) -> bool:
+        max_age = self.max_age(url)
+        return max_age is None or time.time() - entry["fetched_at"] < max_age
+
+    def _cached_page(self, entry: dict) -> Page:
+        with self._count_lock:
+            self.hits += 1
+        text = self.cache.read(entry)
+        return Page(entry["final_url"], entry["status"], text, from_cache=True)
+
+    def fetch(
+        self, url: str, params: dict = None, expect: str = None, headers: dict = None
+    ) -> Page:
+        url = self.absolute_url(url)
+        entry = self.cache.lookup(url, params)
+
+        if entry is not None and (self.offline or self.is_fresh(url, entry)):
+            return self._cached_page(entry)
+        if self.offline:
+            raise CacheMiss(url, "Page is not in the cache")
+
+        with self._count_lock:
+            self.misses += 1
+
+        conditional = dict(headers or {})
+        if entry is not None:
+            if entry.get("etag"):
+                conditional["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                conditional["If-Modified-Since"] = entry["last_modified"]
+
+        page = self.fetcher.fetch(url, params, expect, conditional or None)
+        self.count_page()
+        if page.status == 304 and entry is not None:
+            entry = self.cache.touch(url, params, entry)
+            return Page(entry["final_url"], 200, self.cache.read(entry), page.headers)
+
+        self.cache.store(url, params, page)
+        return page
+
+    def resolve(self, url: str) -> str:
+        # A cached page already knows where its url redirects to
+        entry = self.cache.lookup(self.absolute_url(url))
+        if entry is not None:
+            return entry["final_url"]
+        if self.offline:
+            raise CacheMiss(url, "Page is not in the cache")
+        return self.fetcher.resolve(url)
+
+    def close(self):
+        self.fetcher.close()
@@ -0,0 +1,191 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+from mbp.cache import CachingFetcher
+from mbp.data import has_team_table
+from mbp.fetchers import (
+    FallbackFetcher,
+    Fetcher,
+    HttpFetcher,
+    RateLimitedFetcher,
+    RateLimiter,
+)
+from mbp.store import get_store
+from mbp.teams import TeamRegistry, get_team_registry
+from mbp.transform import transform_season
+
+# League wide season crawler
+#
+# Fetches the games, stats and roster of every D1 team for a season with a
+# pool of worker threads. All workers share one fetcher (and so one HTTP
+# connection pool) behind a global rate limiter to stay polite to
+# stats.ncaa.org.
+#
+# Workers only fetch and parse the pages, the raw tables are transformed
+# and stored a batch of teams at a time, one vectorized pass and one store
+# write per table instead of one per team.
+
+TEAM_TABLES = ["games", "stats", "roster"]
+
+# Teams transformed and written together
+BATCH_SIZE = 50
+
+
+@dataclass
+class CrawlReport:
+    year: int
+    teams: int = 0
+    pages: int = 0
+    cached_pages: int = 0
+    elapsed: float = 0.0
+    failed: dict = field(default_factory=dict)
+
+    @property
+    def pages_per_second(self) -> float:
+        if self.elapsed == 0:
+            return 0.0
+        return self.pages / self.elapsed
+
+    def __str__(self) -> str:
+        return (
+            f"Crawled {self.teams} teams for {self.year}: "
+            f"{self.pages} pages in {self.elapsed:.1f}s "
+            f"({self.pages_per_second:.2f} pages/sec, "
+            f"{self.cached_pages} served from cache, {len(self.failed)} failed)"
+        )
+
+
+def get_d1_team_names() -> list:
+    """
+    Get the names of every team in the saved team id table
+    """
+    return get_team_registry().names()
+
+
+def crawl_team(
+    team_name: str,
+    year: int,
+    fetcher: Fetcher,
+    teams: TeamRegistry,
+    force: bool = False,
+) -> dict:
+    """
+    Fetch the raw games, stats and roster for one team, skipping the tables
+    already saved (unless `force`)
+    """
+    from mbp.webscraping import (
+        get_team_games_for_year,
+        get_team_roster,
+        get_team_stats,
+    )
+
+    getters = {
+        "games": get_team_games_for_year,
+        "stats": get_team_stats,
+        "roster": get_team_roster,
+    }
+    raw_tables = {}
+    for table in TEAM_TABLES:
+        if force or not has_team_table(table, team_name, year):
+            raw_tables[table] = getters[table](
+                fetcher, teams, team_name, year, transform=False
+            )
+    return raw_tables
+
+
+def save_batch(year: int, batch: dict, teams: TeamRegistry):
+    """
+    Transform and store the raw tables of a batch of teams
+    ({team name: {table: raw frame}})
+    """
+    store = get_store()
+    for table in TEAM_TABLES:
+        raw_tables = {
+            team_name: tables[table]
+            for team_name, tables in batch.items()
+            if table in tables
+        }
+        if raw_tables:
+            store.write(table, year, transform_season(table, raw_tables, teams))
+
+
+def crawl_season(
+    year: int,
+    workers: int = 8,
+    rate: float = 4.0,
+    teams: list = None,
+    force: bool = False,
+    fetcher: Fetcher = None,
+    batch_size: int = BATCH_SIZE,
+) -> CrawlReport:
+    """
+    Crawl every team (or just `teams`) for the season using `workers`
+    threads, making at most `rate` requests per second overall
+    """
+    teams = teams if teams is not None else get_d1_team_names()
+
+    owns_fetcher = fetcher is None
+    if owns_fetcher:
+        fetcher = FallbackFetcher(primary=HttpFetcher(pool_size=workers))
+    # Rate limit what goes over the network, cached pages are free
+    limited = RateLimitedFetcher(fetcher, RateLimiter(rate, burst=workers))
+    cached = CachingFetcher(limited, season=year)
+
+    registry = get_team_registry()
+
+    report = CrawlReport(year=year, teams=len(teams))
+    start = time.perf_counter()
+
+    batch = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                crawl_team, team_name, year, cached, registry, force
+            ): team_name
+            for team_name in teams
+        }
+        for future in as_completed(futures):
+            team_name = futures[future]
+            try:
+                batch[team_name] = future.result()
+            except Exception as e:
+                print(f"Failed to crawl {team_name}: {e}")
+                report.failed[team_name] = str(e)
+
+            if len(batch) >= batch_size:
+                save_batch(year, batch, registry)
+                batch = {}
+
+    save_batch(year, batch, registry)
+
+    report.elapsed = time.perf_counter() - start
+    report.pages = limited.pages_fetched
+    report.cached_pages = cached.hits
+
+    if owns_fetcher:
+        fetcher.close()
+
+    print(report)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl a season from stats.ncaa.org")
+    parser.add_argument(
+        "year", type=int, help="season start year, eg. 2022 for 2022-23"
+    )
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=4.0, help="requests per second")
+    parser.add_argument("--team", action="append", dest="teams")
+    parser.add_argument(
+        "--force", action="store_true", help="download existing data again"
+    )
+    args = parser.parse_args()
+
+    crawl_season(args.year, args.workers, args.rate, args.teams, args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,217 +1,469 @@
-from mbp.webscraping import (
-    get_team_games_for_year,
-    activate_web_driver,
-    get_team_name_to_ids,
-    get_team_roster,
-    get_team_stats,
-    get_game_stats,
-)
-from mbp.paths import SEASONS_DIR, RAW_DATA_DIR, team_save_dir
+import hashlib
+
+from mbp.fetchers import Fetcher, get_fetcher
+from mbp.frames import get_frame_cache
+from mbp.paths import SEASONS_DIR, TEAM_NAMES_TO_ID_FILE
+from mbp.schema import apply_schema
+from mbp.store import get_store
+from mbp.teams import clear_team_registry, get_team_registry
+from mbp.transform import parse_datetimes
+from mbp.utils import get_academic_year
+import numpy as np
 import pandas as pd
-import os
+from datetime import date
 from pathlib import Path
 
 
-def download_team_names_to_id():
+def download_team_names_to_id(
+    academic_year: int = None, force: bool = False, fetcher: Fetcher = None
+) -> pd.DataFrame:
     """
     Download the raw team names to transform them from a string
-    to the unique id at stats.ncaa.org
+    to the unique id at stats.ncaa.org. The table is cached along with
+    the academic year it was built for, so it is only rebuilt when the
+    year changes (or `force` is set)
     """
-    driver = activate_web_driver("firefox")
+    academic_year = academic_year or get_academic_year()
 
-    team_ids = get_team_name_to_ids(driver, {})
+    if TEAM_NAMES_TO_ID_FILE.exists() and not force:
+        df = pd.read_csv(TEAM_NAMES_TO_ID_FILE, index_col=0)
+        if (
+            "academic_year" in df.columns
+            and (df["academic_year"] == academic_year).all()
+        ):
+            return df
 
-    df = pd.DataFrame.from_dict(team_ids.items())
-    df.head()
+    from mbp.webscraping import get_team_name_to_ids
+
+    owns_fetcher = fetcher is None
+    fetcher = fetcher or get_fetcher()
+
+    team_ids = get_team_name_to_ids(fetcher, {"academic_year": academic_year})
+    if owns_fetcher:
+        fetcher.close()
 
+    df = pd.DataFrame.from_dict(team_ids.items())
     df = df.rename(columns={0: "team_name", 1: "team_id"})
-    df.reset_index()
+    df["academic_year"] = academic_year
     # Save to raw data directory
-    df.to_csv(f"{RAW_DATA_DIR}/mbb_team_names_to_number.csv")
+    TEAM_NAMES_TO_ID_FILE.parent.mkdir(exist_ok=True, parents=True)
+    df.to_csv(TEAM_NAMES_TO_ID_FILE)
+    get_store().write("teams", academic_year - 1, df)
+    clear_team_registry()
+    return df
+
+
+def save_team_table(
+    table: str, team_name: str, year: int, df: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Save a team's games, stats or roster in the season store, returns the
+    table parsed into the types of its schema
+    """
+    df = apply_schema(table, df.assign(team=team_name))
+    get_store().write(table, year, df)
+    return df.drop(columns=["team"])
+
+
+def has_team_table(table: str, team_name: str, year: int) -> bool:
+    return get_store().has(table, year, team_name)
+
+
+def load_team_table(
+    table: str,
+    team_name: str,
+    year: int,
+    columns: list = None,
+    filters: list = None,
+) -> pd.DataFrame:
+    """
+    Load a team's games, stats or roster from the season store. Tables
+    only saved as csv (before the store) are moved into the store
+    """
+    store = get_store()
+    if not store.has(table, year, team_name):
+        legacy_file = Path(SEASONS_DIR) / str(year) / team_name / f"{table}.csv"
+        if not legacy_file.exists():
+            raise FileNotFoundError(f"No {table} saved for {team_name} in {year}")
+        save_team_table(table, team_name, year, pd.read_csv(legacy_file, index_col=0))
+
+    filters = [("team", "==", team_name)] + (filters or [])
+    df = store.read(table, year, columns=columns, filters=filters)
+    return df.drop(columns=["team"], errors="ignore")
+
+
+def load_season_table(
+    table: str, year: int, columns: list = None, filters: list = None
+) -> pd.DataFrame:
+    """
+    Load a table for every team of a season at once
+    """
+    return get_store().read(table, year, columns=columns, filters=filters)
+
+
+def load_cached_table(table: str, year: int, team_name: str = None) -> pd.DataFrame:
+    """
+    Load a team's table (or the whole season's when no team is given)
+    through the process wide frame cache. The frame is shared with every
+    other caller, so it must not be modified in place
+    """
+    if team_name is None:
+        load = lambda: load_season_table(table, year)
+    else:
+        load = lambda: load_team_table(table, team_name, year)
+    version = get_store().version(table, year)
+    return get_frame_cache().get((table, team_name, int(year)), version, load)
 
 
 def get_team_games(team_name: str, year: int) -> pd.DataFrame:
     """
     Get the games previously save for a team
     """
-    team_dir = Path(SEASONS_DIR) / str(year) / team_name
-    return pd.read_csv(team_dir / "games.csv")
+    return load_team_table("games", team_name, year)
+
+
+def load_next_team_game(team_name: str, year: int, date_from: date) -> pd.Series:
+    """
+    Get the first game a team plays after date_from, None if there are
+    no games left
+    """
+    day_after = pd.Timestamp(date_from) + pd.Timedelta(days=1)
+    games = load_team_table(
+        "games", team_name, year, filters=[("datetime", ">=", day_after)]
+    )
+    if games.empty:
+        return None
+    return games.loc[games["datetime"].idxmin()]
 
 
-def download_roster_data(team_name: str, year: int, force_new_download: bool = False):
+def load_games_on_date(year: int, day: date, team_name: str = None) -> pd.DataFrame:
+    """
+    Get every game played on a day (by one team if given), from the point
+    of view of each team
+    """
+    start = pd.Timestamp(day).normalize()
+    filters = [
+        ("datetime", ">=", start),
+        ("datetime", "<", start + pd.Timedelta(days=1)),
+    ]
+    if team_name is not None:
+        filters.append(("team", "==", team_name))
+    return load_season_table("games", year, filters=filters)
+
+
+def download_roster_data(
+    team_name: str,
+    year: int,
+    force_new_download: bool = False,
+    fetcher: Fetcher = None,
+):
     """
     The roster does not change between games per-year, so
     this only needs to be run once
     """
-    driver = activate_web_driver("firefox")
+    from mbp.webscraping import get_team_roster
 
-    # Read team names
-    df = pd.read_csv(f"{RAW_DATA_DIR}/mbb_team_names_to_number.csv", index_col=0)
-    save_dir = team_save_dir(team_name, year)
+    owns_fetcher = fetcher is None
+    fetcher = fetcher or get_fetcher(season=year)
 
-    roster_file = save_dir / "roster.csv"
-    if not roster_file.exists() or force_new_download:
+    teams = get_team_registry()
+
+    if not has_team_table("roster", team_name, year) or force_new_download:
         print(f"Downloading {team_name} team roster")
-        team_roster = get_team_roster(driver, df, team_name, year)
-        team_roster.to_csv(roster_file)
+        team_roster = get_team_roster(fetcher, teams, team_name, year)
+        save_team_table("roster", team_name, year, team_roster)
     else:
-        roster_file = pd.read_csv(roster_file)
+        team_roster = load_team_table("roster", team_name, year)
 
-    return roster_file
+    if owns_fetcher:
+        fetcher.close()
+    return team_roster
 
 
 def download_team_data(
-    team_name: str, year: int = 2023, force_new_download: bool = False
+    team_name: str,
+    year: int = 2023,
+    force_new_download: bool = False,
+    fetcher: Fetcher = None,
 ):
     """
     Download all relevant team data
     """
-    driver = activate_web_driver("firefox")
+    from mbp.webscraping import get_team_games_for_year, get_team_stats
 
-    # Read team names
-    df = pd.read_csv(f"{RAW_DATA_DIR}/mbb_team_names_to_number.csv", index_col=0)
+    owns_fetcher = fetcher is None
+    fetcher = fetcher or get_fetcher(season=year)
+
+    teams = get_team_registry()
 
     # Previous games
-    save_dir = team_save_dir(team_name, year)
-    games_file = save_dir / "games.csv"
-    if not games_file.exists() or force_new_download:
+    if not has_team_table("games", team_name, year) or force_new_download:
         print(f"Downloading {team_name} team games")
-        games_df = get_team_games_for_year(driver, df, team_name, year)
-        games_df = games_df.replace("", 0)
-        games_df.to_csv(games_file)
-    else:
-        games_df = pd.read_csv(games_file)
+        games_df = get_team_games_for_year(fetcher, teams, team_name, year)
+        save_team_table("games", team_name, year, games_df)
 
-    stats_file = save_dir / "stats.csv"
-    if not stats_file.exists() or force_new_download:
+    if not has_team_table("stats", team_name, year) or force_new_download:
         print(f"Downloading {team_name} team stats")
-        stats_df = get_team_stats(driver, df, team_name, year)
-        stats_df = stats_df.replace("", 0)
-        stats_df.to_csv(stats_file)
-    else:
-        stats_df = pd.read_csv(stats_file)
+        stats_df = get_team_stats(fetcher, teams, team_name, year)
+        save_team_table("stats", team_name, year, stats_df)
 
-    driver.quit()
+    if owns_fetcher:
+        fetcher.close()
 
 
-def download_raw_team_games_for_year(team_name: str, year: int):
-    driver = activate_web_driver("firefox")
+def download_raw_team_games_for_year(
+    team_name: str, year: int, fetcher: Fetcher = None
+):
+    from mbp.webscraping import get_team_games_for_year
 
-    # Read team names
-    df = pd.read_csv(f"{RAW_DATA_DIR}/mbb_team_names_to_number.csv", index_col=0)
-    # Select games for year
-    games_df = get_team_games_for_year(driver, df, team_name, year)
-    games_df = games_df.replace("", 0)
+    owns_fetcher = fetcher is None
+    fetcher = fetcher or get_fetcher(season=year)
 
-    save_dir = team_save_dir(team_name, year)
-    # Save
-    save_path = save_dir / f"games.csv"
-    games_df.to_csv(save_path)
+    teams = get_team_registry()
+    # Select games for year
+    games_df = get_team_games_for_year(fetcher, teams, team_name, year)
+    games_df = save_team_table("games", team_name, year, games_df)
 
-    driver.quit()
+    if owns_fetcher:
+        fetcher.close()
 
     return games_df
 
 
-def download_and_save_team_roster(team_name: str, year: int) -> pd.DataFrame:
-    driver = activate_web_driver("firefox")
-    df = pd.read_csv(f"{RAW_DATA_DIR}/mbb_team_names_to_number.csv", index_col=0)
-
-    team_roster = get_team_roster(driver, df, team_name, year)
-    team_roster = team_roster.replace("", 0)
-    string_columns = ["player", "pos", "position", "jersey", "team", "year"]
-    for col in team_roster.columns:
-        print(f"column {col}")
-        if not col in string_columns:
-            team_roster[col] = team_roster[col].astype(int)
+def download_and_save_team_roster(
+    team_name: str, year: int, fetcher: Fetcher = None
+) -> pd.DataFrame:
+    from mbp.webscraping import get_team_roster
 
-    save_dir = team_save_dir(team_name, year)
+    owns_fetcher = fetcher is None
+    fetcher = fetcher or get_fetcher(season=year)
+    teams = get_team_registry()
 
-    team_roster.to_csv(save_dir / f"roster.csv")
+    team_roster = get_team_roster(fetcher, teams, team_name, year)
+    team_roster = save_team_table("roster", team_name, year, team_roster)
 
-    driver.quit()
+    if owns_fetcher:
+        fetcher.close()
     return team_roster
 
 
-def download_raw_team_stats_for_year(team_name: str, year: str) -> pd.DataFrame:
+def download_raw_team_stats_for_year(
+    team_name: str, year: str, fetcher: Fetcher = None
+) -> pd.DataFrame:
     """
     Download raw team stats for the year
     """
-    driver = activate_web_driver("firefox")
+    from mbp.webscraping import get_team_stats
 
-    # Read team names
-    df = pd.read_csv(f"{RAW_DATA_DIR}/mbb_team_names_to_number.csv", index_col=0)
+    owns_fetcher = fetcher is None
+    fetcher = fetcher or get_fetcher(season=year)
+
+    teams = get_team_registry()
     # Select games for year
-    stats_df = get_team_stats(driver, df, team_name, year)
-    stats_df = stats_df.replace("0", 0)
-    string_columns = ["jersey", "player", "position", "pos", "ht", "team"]
+    stats_df = get_team_stats(fetcher, teams, team_name, year)
+    stats_df = save_team_table("stats", team_name, year, stats_df)
 
-    for col in stats_df.columns:
-        if not col in string_columns:
-            stats_df[col] = stats_df[col].astype(str)
+    if owns_fetcher:
+        fetcher.close()
 
-    stats_df["ht"] = stats_df["ht"].apply(convert_height_to_inches)
-    stats_df["year"] = stats_df["yr"].apply(convert_student_year_to_int)
+    return stats_df
 
-    save_dir = team_save_dir(team_name, year)
-    # Save
-    save_path = save_dir / f"stats.csv"
-    stats_df.to_csv(save_path)
 
-    driver.quit()
+def download_game_data(
+    team_a: str, team_b: str, year: int, day: date = None, fetcher: Fetcher = None
+) -> pd.DataFrame:
+    """
+    Download and save the box score of team_a's game against team_b (on
+    `day`, or the first one played), for games saved without a contest id.
+    The contest is found on team_a's Game By Game page
+    """
+    from mbp.webscraping import get_season_contests
+
+    owns_fetcher = fetcher is None
+    fetcher = fetcher or get_fetcher(season=year)
+    teams = get_team_registry()
+
+    contests = get_season_contests(fetcher, teams, team_a, year)
+    played = contests["contest_id"].notna()
+    played &= contests["opponent"] == teams.canonical_name(team_b)
+    if day is not None and pd.notna(day):
+        days = parse_datetimes(contests["date"]).dt.normalize()
+        played &= days == pd.Timestamp(day).normalize()
+
+    box_score = None
+    if played.any():
+        contest = contests.loc[played].iloc[0]
+        box_score = download_box_score(
+            contest["contest_id"], year, contest["box_score_url"], fetcher
+        )
+    if owns_fetcher:
+        fetcher.close()
+
+    if box_score is None:
+        raise ValueError(f"Could not find the {team_a} game against {team_b}")
+    return box_score
+
+
+def saved_box_score_ids(year: int) -> set:
+    """
+    The contest ids of every box score saved for a season
+    """
+    return get_store().keys("box_scores", year)
 
-    return stats_df
 
+def has_box_score(year: int, contest_id: str) -> bool:
+    return get_store().has("box_scores", year, contest_id)
 
-def convert_height_to_inches(height: str) -> int:
+
+def box_score_hashes(box_scores: pd.DataFrame) -> pd.Series:
     """
-    Convert height from feet-inches to inches
+    A hash of each contest's box score rows, by contest id. Empty cells
+    don't count, so a column added by another box score changes nothing
     """
-    if height == "0":
-        return 0
-    else:
-        (feet, inches) = height.split("-")
-        return int(feet) * 12 + int(inches)
+    if box_scores.empty:
+        return pd.Series(dtype="string")
+    columns = sorted(box_scores.columns)
+    names = pd.util.hash_array(np.array(columns, dtype=object))
+    rows = np.zeros(len(box_scores), dtype=np.uint64)
+    for column, name in zip(columns, names):
+        values = box_scores[column]
+        cells = pd.util.hash_pandas_object(values, index=False).to_numpy()
+        rows += np.where(values.notna().to_numpy(), cells ^ name, np.uint64(0))
+
+    contest_ids = box_scores["contest_id"].astype("string").to_numpy()
+    groups = pd.Series(rows).groupby(contest_ids, sort=True).indices
+    return pd.Series(
+        {
+            contest_id: hashlib.sha256(rows[positions].tobytes()).hexdigest()
+            for contest_id, positions in groups.items()
+        },
+        dtype="string",
+    )
+
+
+def save_box_scores(year: int, box_scores: list):
+    """
+    Save box scores in the season store, in one write, along with the hash
+    of each one (so the player log only reads the ones that changed)
+    """
+    if box_scores:
+        store = get_store()
+        saved = store.write(
+            "box_scores", year, pd.concat(box_scores, ignore_index=True)
+        )
+        hashes = box_score_hashes(saved)
+        store.write(
+            "box_score_hashes",
+            year,
+            pd.DataFrame(
+                {"contest_id": hashes.index, "box_score_hash": hashes.to_numpy()}
+            ),
+        )
+
+
+def load_box_score_hashes(year: int) -> pd.Series:
+    """
+    The hash of every box score saved for a season, by contest id
+    """
+    hashes = get_store().read("box_score_hashes", year)
+    if hashes.empty:
+        return pd.Series(dtype="string")
+    return pd.Series(
+        hashes["box_score_hash"].to_numpy(), index=hashes["contest_id"], dtype="string"
+    )
+
+
+def download_box_score(
+    contest_id: str,
+    year: int,
+    box_score_url: str = None,
+    fetcher: Fetcher = None,
+    save: bool = True,
+) -> pd.DataFrame:
+    """
+    Download and save the box score of a contest, both teams in one frame.
+    Batch downloads pass `save=False` and save them with save_box_scores
+    """
+    from mbp.webscraping import get_box_score
+
+    owns_fetcher = fetcher is None
+    fetcher = fetcher or get_fetcher(season=year)
+
+    (team1, stats_team1, team2, stats_team2) = get_box_score(
+        fetcher, contest_id, box_score_url
+    )
+    if owns_fetcher:
+        fetcher.close()
 
+    box_score = pd.concat([stats_team1, stats_team2], ignore_index=True)
+    box_score["contest_id"] = str(contest_id)
+    box_score = apply_schema("box_scores", box_score)
 
-def convert_student_year_to_int(year: str) -> int:
+    if save:
+        save_box_scores(year, [box_score])
+    return box_score
+
+
+def get_saved_box_score(contest_id: str, year: int, reload: bool = False):
     """
-    Convert student year to season
+    Get the box score of a contest, downloading it if we don't have it yet
     """
-    year = year.lower()
-    if year == "fr":
-        return 1
-    elif year == "so":
-        return 2
-    elif year == "jr":
-        return 3
-    elif year == "sr":
-        return 4
-    else:
-        return 5
+    if not reload:
+        filters = [("contest_id", "==", str(contest_id))]
+        box_score = get_store().read("box_scores", year, filters=filters)
+        if not box_score.empty:
+            return box_score
+    return download_box_score(contest_id, year)
 
 
-def download_game_data(
-    team_a: str, team_b: str, year: int
-) -> (str, pd.DataFrame, str, pd.DataFrame):
-    driver = activate_web_driver("firefox")
-    df = pd.read_csv(f"{RAW_DATA_DIR}/mbb_team_names_to_number.csv", index_col=0)
+def save_season_contests(year: int, contests: pd.DataFrame) -> pd.DataFrame:
+    """
+    Merge contests into the season's contest table, one row per contest id.
+    Newer rows win, but columns they don't have are kept from the saved row
+    """
+    store = get_store()
+    contests = contests.dropna(subset=["contest_id"]).astype({"contest_id": str})
+    contests = contests.drop_duplicates(subset=["contest_id"])
 
-    ret = get_game_stats(driver, df, team_a, team_b, year)
+    filters = [("contest_id", "in", list(contests["contest_id"]))]
+    saved = store.read("contests", year, filters=filters)
+    if not saved.empty:
+        contests = (
+            contests.set_index("contest_id")
+            .combine_first(saved.set_index("contest_id"))
+            .reset_index()
+        )
 
-    (team1, stats_team1, team2, stats_team2) = ret
+    store.write("contests", year, contests)
+    return contests.reset_index(drop=True)
 
-    stats_team1 = stats_team1.replace("", 0)
-    stats_team2 = stats_team2.replace("", 0)
 
-    team1_games_save_dir = team_save_dir(team1, year) / "games"
-    if not team1_games_save_dir.exists():
-        team1_games_save_dir.mkdir(exist_ok=True, parents=True)
-    stats_team2.to_csv(team1_games_save_dir / f"{team2}.csv")
+def load_season_contests(year: int) -> pd.DataFrame:
+    return get_store().read("contests", year)
 
-    team2_games_save_dir = team_save_dir(team2, year) / "games"
-    if not team2_games_save_dir.exists():
-        team2_games_save_dir.mkdir(exist_ok=True, parents=True)
-    stats_team1.to_csv(team2_games_save_dir / f"{team1}.csv")
 
-    return ret
+def migrate_season_csvs(year: int):
+    """
+    Move a season saved as csv files (games, stats and roster per team,
+    box scores and contests) into the season store
+    """
+    season_dir = Path(SEASONS_DIR) / str(year)
+    for table in ["games", "stats", "roster"]:
+        frames = [
+            pd.read_csv(f, index_col=0).assign(team=f.parent.name)
+            for f in sorted(season_dir.glob(f"*/{table}.csv"))
+        ]
+        if frames:
+            get_store().write(table, year, pd.concat(frames, ignore_index=True))
+
+    box_scores = [
+        pd.read_csv(f, index_col=0).assign(contest_id=f.stem)
+        for f in sorted((season_dir / "box_scores").glob("*.csv"))
+    ]
+    save_box_scores(year, box_scores)
+
+    contests_file = season_dir / "contests.csv"
+    if contests_file.exists():
+        save_season_contests(
+            year, pd.read_csv(contests_file, index_col=0, dtype={"contest_id": str})
+        )
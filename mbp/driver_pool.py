@@ -0,0 +1,134 @@
+import atexit
+import queue
+import threading
+from contextlib import contextmanager
+
+# A pool of warm browsers
+#
+# Starting firefox is the most expensive part of scraping a page with
+# selenium, so instead of launching (and quitting) a browser for every
+# download call, browsers are kept around and handed out across calls.
+# A browser is recycled after `max_pages` pages or as soon as it crashes.
+
+
+class PooledDriver:
+    """
+    A webdriver along with the number of pages it has loaded
+    """
+
+    def __init__(self, driver) -> None:
+        self.driver = driver
+        self.pages = 0
+
+
+class DriverPool:
+    def __init__(
+        self,
+        size: int = 2,
+        max_pages: int = 200,
+        browser: str = "firefox",
+        headless: bool = True,
+    ) -> None:
+        self.size = size
+        self.max_pages = max_pages
+        self.browser = browser
+        self.headless = headless
+
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._drivers = []
+
+    def _launch(self) -> PooledDriver:
+        from mbp.webscraping import activate_web_driver
+
+        pooled = PooledDriver(activate_web_driver(self.browser, self.headless))
+        with self._lock:
+            self._drivers.append(pooled)
+        return pooled
+
+    def _retire(self, pooled: PooledDriver):
+        with self._lock:
+            if pooled in self._drivers:
+                self._drivers.remove(pooled)
+        try:
+            pooled.driver.quit()
+        except Exception:
+            # The browser is already gone
+            pass
+
+    @contextmanager
+    def driver(self):
+        """
+        Borrow a driver from the pool, blocking while all `size` drivers
+        are in use
+        """
+        from selenium.common.exceptions import TimeoutException, WebDriverException
+
+        self._slots.acquire()
+        try:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                pooled = self._launch()
+
+            try:
+                yield pooled.driver
+            except TimeoutException:
+                # The page was slow, the browser is fine
+                self._release(pooled)
+                raise
+            except WebDriverException:
+                # Crashed (or hung up), start fresh next time
+                self._retire(pooled)
+                raise
+            except BaseException:
+                self._release(pooled)
+                raise
+            else:
+                pooled.pages += 1
+                self._release(pooled)
+        finally:
+            self._slots.release()
+
+    def _release(self, pooled: PooledDriver):
+        if pooled.pages >= self.max_pages:
+            self._retire(pooled)
+        else:
+            self._idle.put(pooled)
+
+    def close(self):
+        """
+        Quit every browser in the pool
+        """
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._retire(pooled)
+
+        with self._lock:
+            drivers = list(self._drivers)
+        for pooled in drivers:
+            self._retire(pooled)
+
+    def __len__(self) -> int:
+        return len(self._drivers)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_driver_pool(**kwargs) -> DriverPool:
+    """
+    Get the process wide driver pool, the keyword arguments are only used
+    the first time the pool is created
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool(**kwargs)
+            atexit.register(_pool.close)
+    return _pool
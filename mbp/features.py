@@ -0,0 +1,385 @@
+import numpy as np
+import pandas as pd
+
+from mbp.data import load_cached_table
+from mbp.player_log import BOX_SCORE_STATS
+from mbp.players import minutes_column
+from mbp.store import get_store
+from mbp.teams import TeamRegistry, get_team_registry
+from mbp.transform import canonical_names
+
+# Team features
+#
+# Per game team metrics (possessions, efficiency, pace, four factors) from
+# the box scores, and the features of every team going into each game:
+# season to date, last N games and exponentially weighted averages of the
+# metrics, home and away splits and days of rest. The features of a game
+# only use the games played before its day, never the game itself.
+#
+# Features are kept in the "team_features" store table, a row per team and
+# game with the game's metrics next to the features going into it. New
+# games are appended: the state of each team after its last saved game
+# (sums, counts, weighted averages) is derived from that row and the new
+# games continue from it, the season isn't computed again.
+
+# Box score totals summed per team and game
+TEAM_BOX_STATS = ["fgm", "fga", "fg3m", "fg3a", "ftm", "fta", "oreb", "dreb", "tov"]
+
+METRICS = [
+    "poss",
+    "pace",
+    "off_eff",
+    "def_eff",
+    "net_eff",
+    "efg",
+    "tov_rate",
+    "orb_rate",
+    "ft_rate",
+    "opp_efg",
+    "opp_tov_rate",
+    "opp_orb_rate",
+    "opp_ft_rate",
+]
+
+# Metrics also averaged over home and away games
+SPLIT_METRICS = ["off_eff", "def_eff", "net_eff"]
+
+ROLLING_WINDOWS = [5, 10]
+
+# Weight of the latest game in the exponentially weighted averages
+EWM_ALPHA = 0.15
+
+GAME_COLUMNS = ["team", "opponent", "contest_id", "datetime", "home", "rest_days"]
+
+# The order of a team's games, the contest id only breaks ties
+GAME_ORDER = ["team", "datetime", "contest_id"]
+
+
+def safe_divide(numerator, denominator) -> pd.Series:
+    return numerator / denominator.where(denominator > 0)
+
+
+def team_box_totals(box_scores: pd.DataFrame, teams: TeamRegistry = None):
+    """
+    Sum the player lines of box scores into a row per contest and team
+    """
+    totals = pd.DataFrame(
+        {
+            "contest_id": box_scores["contest_id"].astype("string"),
+            "team": canonical_names(box_scores["team"].astype("string"), teams),
+            "pts": pd.to_numeric(box_scores.get("pts"), errors="coerce"),
+            "minutes": minutes_column(box_scores).astype("float64"),
+        }
+    )
+    for column, stat in BOX_SCORE_STATS.items():
+        if stat in TEAM_BOX_STATS:
+            values = box_scores[column] if column in box_scores.columns else np.nan
+            totals[stat] = pd.to_numeric(pd.Series(values), errors="coerce")
+    return totals.groupby(["contest_id", "team"], observed=True).sum(min_count=1)
+
+
+def possessions(box: pd.DataFrame) -> pd.Series:
+    return box["fga"] - box["oreb"] + box["tov"] + 0.475 * box["fta"]
+
+
+def four_factors(box: pd.DataFrame, opp: pd.DataFrame, poss: pd.Series) -> dict:
+    return {
+        "efg": safe_divide(box["fgm"] + 0.5 * box["fg3m"], box["fga"]),
+        "tov_rate": safe_divide(box["tov"], poss),
+        "orb_rate": safe_divide(box["oreb"], box["oreb"] + opp["dreb"]),
+        "ft_rate": safe_divide(box["ftm"], box["fga"]),
+    }
+
+
+def game_metrics(games: pd.DataFrame, box_totals: pd.DataFrame) -> pd.DataFrame:
+    """
+    The metrics of every team game with a box score, from the team's and
+    its opponent's box score totals
+    """
+    schedule = games.loc[games["datetime"].notna()].copy()
+    schedule["team"] = schedule["team"].astype("string")
+    schedule = schedule.sort_values(["team", "datetime"], kind="stable")
+    # Days since the team's previous game, played or not in the box scores
+    days = schedule["datetime"].dt.normalize()
+    schedule["rest_days"] = (days - days.groupby(schedule["team"]).shift()).dt.days
+
+    played = schedule.loc[
+        schedule["contest_id"].notna() & schedule["team_score"].notna()
+    ]
+    played = played.assign(contest_id=played["contest_id"].astype("string"))
+    played = played.drop_duplicates(subset=["team", "contest_id"])
+
+    # The opponent is whoever else is in the box score, the contest totals
+    # minus the team's own
+    contests = box_totals.groupby(level="contest_id").agg(["sum", "size"])
+    two_teams = contests[("pts", "size")] == 2
+    contest_sums = contests.loc[two_teams].xs("sum", axis=1, level=1)
+    index = pd.MultiIndex.from_frame(played[["contest_id", "team"]])
+    box = box_totals.reindex(index)
+    opp = contest_sums.reindex(played["contest_id"]).set_axis(index) - box
+
+    team_poss = possessions(box)
+    opp_poss = possessions(opp)
+    poss = (team_poss + opp_poss) / 2
+    game_minutes = box["minutes"] / 5
+
+    metrics = pd.DataFrame(
+        {
+            "poss": poss,
+            "pace": safe_divide(poss * 40, game_minutes).fillna(poss),
+            "off_eff": safe_divide(100 * box["pts"], poss),
+            "def_eff": safe_divide(100 * opp["pts"], poss),
+        }
+    )
+    metrics["net_eff"] = metrics["off_eff"] - metrics["def_eff"]
+    for name, values in four_factors(box, opp, team_poss).items():
+        metrics[name] = values
+    for name, values in four_factors(opp, box, opp_poss).items():
+        metrics[f"opp_{name}"] = values
+
+    rows = played[GAME_COLUMNS].reset_index(drop=True)
+    rows["home"] = rows["home"].fillna(0).astype(int)
+    rows[METRICS] = metrics.reset_index(drop=True).astype("float64")
+    return rows.loc[rows["poss"].notna()].reset_index(drop=True)
+
+
+STATE_COLUMNS = (
+    ["games", "home_games"]
+    + [f"{m}_{part}" for m in METRICS for part in ["sum", "ewm"]]
+    + [f"{m}_{side}_sum" for m in SPLIT_METRICS for side in ["home", "away"]]
+)
+
+
+def team_state(history: pd.DataFrame) -> pd.DataFrame:
+    """
+    The state of each team after its last game in `history` (feature rows):
+    game counts, metric sums and weighted averages, one row per team
+    """
+    last = history.sort_values(GAME_ORDER, kind="stable")
+    last = last.groupby("team", observed=True).tail(1).set_index("team")
+    last.index = last.index.astype("string")
+
+    before = last["games_before"].astype("float64")
+    state = pd.DataFrame({"games": before + 1}, index=last.index)
+    home = last["home"].astype("float64")
+    home_before = last["home_games_before"].astype("float64")
+    away_before = before - home_before
+    state["home_games"] = home_before + home
+    for m in METRICS:
+        value = last[m].astype("float64")
+        state[f"{m}_sum"] = (last[f"{m}_avg"] * before).fillna(0) + value
+        state[f"{m}_ewm"] = value.where(
+            before == 0, EWM_ALPHA * value + (1 - EWM_ALPHA) * last[f"{m}_ewm"]
+        )
+    for m in SPLIT_METRICS:
+        value = last[m].astype("float64")
+        home_sum = (last[f"{m}_home_avg"] * home_before).fillna(0)
+        away_sum = (last[f"{m}_away_avg"] * away_before).fillna(0)
+        state[f"{m}_home_sum"] = home_sum + value * home
+        state[f"{m}_away_sum"] = away_sum + value * (1 - home)
+    return state[STATE_COLUMNS]
+
+
+def rows_only(values: pd.DataFrame, row: pd.Series) -> pd.DataFrame:
+    """
+    Keep the values of the rows (row >= 0) dropping the seed and context
+    rows, indexed and ordered like the rows
+    """
+    values = values.loc[row >= 0]
+    return values.set_axis(row[row >= 0].to_numpy()).sort_index()
+
+
+def rolling_means(rows: pd.DataFrame, context: pd.DataFrame) -> pd.DataFrame:
+    """
+    Means of the metrics over the last games before each row, `context`
+    being the games of the same teams before the rows
+    """
+    frame = pd.concat(
+        [
+            context[["team", "datetime"] + METRICS].assign(_row=-1),
+            rows[["team", "datetime"] + METRICS].assign(_row=np.arange(len(rows))),
+        ],
+        ignore_index=True,
+    )
+    frame["team"] = frame["team"].astype("string")
+    # The context first, then the rows in order
+    frame = frame.sort_values(["team", "_row", "datetime"], kind="stable")
+    grouped = frame.groupby("team", sort=False)
+    count = grouped.cumcount()
+    cum_before = grouped[METRICS].cumsum() - frame[METRICS]
+
+    means = {}
+    for window in ROLLING_WINDOWS:
+        dropped = cum_before.groupby(frame["team"], sort=False).shift(window)
+        sums = cum_before - dropped.fillna(0)
+        games = np.minimum(count, window).replace(0, np.nan)
+        for m in METRICS:
+            means[f"{m}_last{window}"] = sums[m] / games
+    means = pd.DataFrame(means, index=frame.index)
+    return rows_only(means, frame["_row"])
+
+
+def ewm_means(rows: pd.DataFrame, state: pd.DataFrame) -> pd.DataFrame:
+    """
+    Exponentially weighted averages (adjust=False) going into each row,
+    continuing from each team's saved weighted averages
+    """
+    columns = [f"{m}_ewm" for m in METRICS]
+    seeds = state[columns].set_axis(METRICS, axis=1).reset_index(names="team")
+    frame = pd.concat(
+        [
+            seeds.assign(_row=-1),
+            rows[["team"] + METRICS].assign(_row=np.arange(len(rows))),
+        ],
+        ignore_index=True,
+    )
+    frame["team"] = frame["team"].astype("string")
+    frame = frame.sort_values(["team", "_row"], kind="stable")
+    grouped = frame.groupby("team", sort=False)
+    after = grouped[METRICS].ewm(alpha=EWM_ALPHA, adjust=False).mean()
+    after = after.reset_index(level=0, drop=True).reindex(frame.index)
+    before = after.groupby(frame["team"], sort=False).shift()
+    return rows_only(before, frame["_row"]).set_axis(columns, axis=1)
+
+
+def asof_features(
+    rows: pd.DataFrame, history: pd.DataFrame = None, context: pd.DataFrame = None
+) -> pd.DataFrame:
+    """
+    Add the features going into each game to metric rows. `history` is
+    the feature rows of the games before them (None for a team's first
+    games) and `context` the history rows the rolling windows need
+    """
+    rows = rows.sort_values(GAME_ORDER, kind="stable")
+    rows = rows.reset_index(drop=True)
+    rows["team"] = rows["team"].astype("string")
+    if history is None or history.empty:
+        state = pd.DataFrame(columns=STATE_COLUMNS, dtype="float64")
+        context = rows.iloc[0:0]
+    else:
+        state = team_state(history)
+        context = history if context is None else context
+
+    seed = state.reindex(rows["team"]).fillna({"games": 0, "home_games": 0})
+    seed = seed.reset_index(drop=True)
+    grouped = rows.groupby("team", sort=False)
+    games_before = seed["games"] + grouped.cumcount()
+
+    home = rows["home"].astype("float64")
+    home_before = seed["home_games"] + grouped["home"].cumsum() - home
+    away_before = games_before - home_before
+
+    features = {"games_before": games_before, "home_games_before": home_before}
+    for m in METRICS:
+        cum = grouped[m].cumsum() - rows[m]
+        features[f"{m}_avg"] = (seed[f"{m}_sum"].fillna(0) + cum) / games_before
+    for m in SPLIT_METRICS:
+        for side, weight, count in [
+            ("home", home, home_before),
+            ("away", 1 - home, away_before),
+        ]:
+            weighted = rows[m] * weight
+            cum = weighted.groupby(rows["team"], sort=False).cumsum() - weighted
+            seed_sum = seed[f"{m}_{side}_sum"].fillna(0)
+            features[f"{m}_{side}_avg"] = (seed_sum + cum) / count
+
+    features = pd.DataFrame(features, index=rows.index)
+    features = features.replace([np.inf, -np.inf], np.nan)
+    return pd.concat(
+        [rows, features, rolling_means(rows, context), ewm_means(rows, state)],
+        axis=1,
+    )
+
+
+def update_team_features(
+    year: int, teams: TeamRegistry = None, rebuild: bool = False
+) -> pd.DataFrame:
+    """
+    Add the games played since the last update to the team features of a
+    season (every game when `rebuild`). Returns the new feature rows
+    """
+    store = get_store()
+    teams = teams or get_team_registry()
+
+    saved = pd.DataFrame() if rebuild else load_cached_table("team_features", year)
+    games = load_cached_table("games", year)
+    if games.empty:
+        return pd.DataFrame()
+
+    # The games of each team without a feature row yet. The two teams of a
+    # game can be synced at different times, so it's the pair that counts
+    played = games.dropna(subset=["contest_id"])
+    played = pd.MultiIndex.from_arrays(
+        [played["team"].astype("string"), played["contest_id"].astype("string")]
+    )
+    logged = pd.MultiIndex.from_tuples([], names=["team", "contest_id"])
+    if not saved.empty:
+        logged = pd.MultiIndex.from_arrays(
+            [saved["team"].astype("string"), saved["contest_id"].astype("string")]
+        )
+    pending = played[~played.isin(logged)]
+    new_ids = list(pending.get_level_values(1).unique())
+    if not new_ids:
+        return pd.DataFrame()
+
+    box_scores = store.read("box_scores", year, filters=[("contest_id", "in", new_ids)])
+    if box_scores.empty:
+        return pd.DataFrame()
+    rows = game_metrics(games, team_box_totals(box_scores, teams))
+    if rows.empty:
+        return rows
+    if saved.empty:
+        features = asof_features(rows)
+        store.write("team_features", year, features)
+        return features
+
+    saved = saved.assign(team=saved["team"].astype("string"))
+    rows = rows.loc[~rows.set_index(["team", "contest_id"]).index.isin(logged)]
+    # A game landing before games already saved changes every feature
+    # after it, those teams are computed again from their first game
+    last_saved = saved.groupby("team")["datetime"].max()
+    late = rows["datetime"] <= rows["team"].map(last_saved)
+    redo = set(rows.loc[late, "team"])
+
+    new_features = []
+    appended = rows.loc[~rows["team"].isin(redo)]
+    if not appended.empty:
+        history = saved.loc[saved["team"].isin(set(appended["team"]))]
+        context = history.sort_values(GAME_ORDER, kind="stable")
+        context = context.groupby("team").tail(max(ROLLING_WINDOWS))
+        new_features.append(asof_features(appended, history, context))
+    if redo:
+        redone = pd.concat(
+            [
+                saved.loc[saved["team"].isin(redo), rows.columns],
+                rows.loc[rows["team"].isin(redo)],
+            ],
+            ignore_index=True,
+        )
+        new_features.append(asof_features(redone))
+    if not new_features:
+        return pd.DataFrame()
+    new_features = pd.concat(new_features, ignore_index=True)
+
+    # The saved rows of the teams with appended games are written again
+    # along with them
+    kept = saved.loc[saved["team"].isin(set(appended["team"]))]
+    if not kept.empty:
+        new_features = pd.concat([kept, new_features], ignore_index=True)
+    store.write("team_features", year, new_features)
+    added = pd.MultiIndex.from_arrays(
+        [
+            new_features["team"].astype("string"),
+            new_features["contest_id"].astype("string"),
+        ]
+    )
+    return new_features.loc[~added.isin(logged)]
+
+
+def load_team_features(year: int, team_name: str = None) -> pd.DataFrame:
+    """
+    The team feature rows of a season (or of one team), by team and date
+    """
+    if team_name is None:
+        return load_cached_table("team_features", year)
+    return load_cached_table("team_features", year, team_name)
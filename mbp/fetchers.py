@@ -0,0 +1,436 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from urllib.parse import urlencode, urljoin, urlparse, urlunparse
+
+# Fetch backends for stats.ncaa.org
+#
+# Most of stats.ncaa.org is plain server rendered html, so the default
+# backend is a pooled keep-alive HTTP session. Selenium is kept around as a
+# fallback for pages which only render with javascript (or when the HTTP
+# request gets blocked).
+
+BASE_URL = "https://stats.ncaa.org"
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/87.0.4280.88 Safari/537.36"
+
+
+class FetchError(Exception):
+    """
+    Raised when a page could not be fetched (or did not contain what we expected)
+    """
+
+    def __init__(self, url: str, message: str, status: int = None) -> None:
+        super().__init__(f"{message} ({url})")
+        self.url = url
+        self.status = status
+
+
+@dataclass
+class Page:
+    """
+    A fetched page
+    """
+
+    url: str
+    status: int
+    text: str
+    headers: dict = field(default_factory=dict)
+    from_cache: bool = False
+
+
+def page_has(html: str, selector: str) -> bool:
+    """
+    Check if the html contains an element matching the css selector
+    """
+    from mbp.parsing import make_soup
+
+    return make_soup(html).select_one(selector) is not None
+
+
+class Fetcher:
+    """
+    Base fetcher interface. Subclasses implement `fetch`
+    """
+
+    def __init__(self, base_url: str = None) -> None:
+        self.base_url = base_url or os.environ.get("MBP_BASE_URL", BASE_URL)
+        self.pages_fetched = 0
+        self._count_lock = threading.Lock()
+
+    def count_page(self):
+        """
+        Count a fetched page, fetchers can be shared between threads
+        """
+        with self._count_lock:
+            self.pages_fetched += 1
+
+    def absolute_url(self, url: str) -> str:
+        """
+        Resolve a (possibly relative) stats.ncaa.org url against the base url
+        """
+        url = urljoin(self.base_url + "/", url)
+        if self.base_url != BASE_URL:
+            # Pages link to stats.ncaa.org directly, point those at our base url
+            parsed = urlparse(url)
+            if parsed.netloc == urlparse(BASE_URL).netloc:
+                base = urlparse(self.base_url)
+                url = urlunparse(
+                    parsed._replace(scheme=base.scheme, netloc=base.netloc)
+                )
+        return url
+
+    def fetch(
+        self, url: str, params: dict = None, expect: str = None, headers: dict = None
+    ) -> Page:
+        """
+        Fetch a page. When `expect` is set, it is a css selector the page
+        must contain. `headers` are extra request headers, fetchers that
+        can't send them (a browser) ignore them
+        """
+        raise NotImplementedError
+
+    def get(self, url: str, params: dict = None, expect: str = None) -> str:
+        """
+        Fetch a page and return its html
+        """
+        return self.fetch(url, params, expect).text
+
+    def resolve(self, url: str) -> str:
+        """
+        Get the url a link ends up at after redirects
+        """
+        return self.fetch(url).url
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class HttpFetcher(Fetcher):
+    """
+    Fetch pages over a keep-alive HTTP session with a connection pool
+    """
+
+    def __init__(
+        self,
+        base_url: str = None,
+        pool_size: int = 10,
+        timeout: float = 30,
+        retries: int = 3,
+    ) -> None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        super().__init__(base_url)
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        self.session.headers.update(
+            {
+                "User-Agent": USER_AGENT,
+                "Accept": "text/html,application/xhtml+xml",
+                "Connection": "keep-alive",
+            }
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["GET", "HEAD"],
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def fetch(
+        self, url: str, params: dict = None, expect: str = None, headers: dict = None
+    ) -> Page:
+        import requests
+
+        url = self.absolute_url(url)
+        try:
+            resp = self.session.get(
+                url, params=params, headers=headers, timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            raise FetchError(url, str(e))
+
+        if resp.status_code >= 400:
+            raise FetchError(url, f"HTTP {resp.status_code}", resp.status_code)
+
+        self.count_page()
+        page = Page(resp.url, resp.status_code, resp.text, dict(resp.headers))
+        # Not modified responses don't have a body to check
+        if resp.status_code == 304:
+            return page
+        if expect is not None and not page_has(page.text, expect):
+            raise FetchError(url, f"Page is missing {expect}", resp.status_code)
+        return page
+
+    def resolve(self, url: str, max_redirects: int = 5) -> str:
+        """
+        Follow redirects with HEAD requests so we never download the body
+        """
+        import requests
+
+        url = self.absolute_url(url)
+        for _ in range(max_redirects):
+            try:
+                resp = self.session.head(
+                    url, allow_redirects=False, timeout=self.timeout
+                )
+            except requests.RequestException as e:
+                raise FetchError(url, str(e))
+
+            self.count_page()
+            if resp.is_redirect and "Location" in resp.headers:
+                url = self.absolute_url(urljoin(url, resp.headers["Location"]))
+            elif resp.status_code >= 400:
+                raise FetchError(url, f"HTTP {resp.status_code}", resp.status_code)
+            else:
+                return url
+
+        raise FetchError(url, "Too many redirects")
+
+    def close(self):
+        self.session.close()
+
+
+class SeleniumFetcher(Fetcher):
+    """
+    Fetch pages by rendering them in a browser. Without a driver, browsers
+    are borrowed from the process wide driver pool
+    """
+
+    def __init__(
+        self,
+        driver=None,
+        pool=None,
+        base_url: str = None,
+        timeout: float = 10,
+    ) -> None:
+        super().__init__(base_url)
+        self.timeout = timeout
+        self._driver = driver
+        self._pool = pool
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            from mbp.driver_pool import get_driver_pool
+
+            self._pool = get_driver_pool()
+        return self._pool
+
+    @contextmanager
+    def driver(self):
+        if self._driver is not None:
+            yield self._driver
+        else:
+            with self.pool.driver() as driver:
+                yield driver
+
+    def fetch(
+        self, url: str, params: dict = None, expect: str = None, headers: dict = None
+    ) -> Page:
+        from selenium.common.exceptions import TimeoutException, WebDriverException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.wait import WebDriverWait
+
+        url = self.absolute_url(url)
+        if params:
+            url = f"{url}?{urlencode(params)}"
+
+        try:
+            with self.driver() as driver:
+                driver.get(url)
+                if expect is not None:
+                    wait = WebDriverWait(driver, self.timeout)
+                    wait.until(lambda d: d.find_elements(By.CSS_SELECTOR, expect))
+                page = Page(driver.current_url, 200, driver.page_source)
+        except TimeoutException:
+            raise FetchError(url, f"Page is missing {expect}")
+        except WebDriverException as e:
+            raise FetchError(url, str(e))
+
+        self.count_page()
+        return page
+
+
+class FallbackFetcher(Fetcher):
+    """
+    Fetch with the primary fetcher, and only fall back to the secondary one
+    (a browser by default) when that fails. Urls matching `js_paths` always
+    go straight to the fallback
+    """
+
+    def __init__(
+        self,
+        primary: Fetcher = None,
+        fallback_factory=SeleniumFetcher,
+        js_paths: list = None,
+        base_url: str = None,
+    ) -> None:
+        super().__init__(base_url)
+        self.primary = primary or HttpFetcher(base_url=self.base_url)
+        self.fallback_factory = fallback_factory
+        self.js_paths = list(js_paths or [])
+        self._fallback = None
+
+    @property
+    def fallback(self) -> Fetcher:
+        # Only start a browser when we actually need one
+        if self._fallback is None:
+            self._fallback = self.fallback_factory(base_url=self.base_url)
+        return self._fallback
+
+    def fetch(
+        self, url: str, params: dict = None, expect: str = None, headers: dict = None
+    ) -> Page:
+        path = urlparse(self.absolute_url(url)).path
+        if any(path.startswith(p) for p in self.js_paths):
+            page = self.fallback.fetch(url, params, expect, headers)
+        else:
+            try:
+                page = self.primary.fetch(url, params, expect, headers)
+            except FetchError as e:
+                if e.status == 404:
+                    raise
+                page = self.fallback.fetch(url, params, expect, headers)
+
+        self.count_page()
+        return page
+
+    def resolve(self, url: str) -> str:
+        try:
+            return self.primary.resolve(url)
+        except FetchError as e:
+            if e.status == 404:
+                raise
+            return self.fallback.resolve(url)
+
+    def close(self):
+        self.primary.close()
+        if self._fallback is not None:
+            self._fallback.close()
+            self._fallback = None
+
+
+class RateLimiter:
+    """
+    A thread safe token bucket allowing `rate` requests per second on
+    average, with bursts of up to `burst` requests
+    """
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Take a token, sleeping until one is available
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.burst, self.tokens + (now - self.updated_at) * self.rate
+                )
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class RateLimitedFetcher(Fetcher):
+    """
+    Wrap a fetcher so every request takes a token from the rate limiter
+    """
+
+    def __init__(self, fetcher: Fetcher, limiter: RateLimiter) -> None:
+        super().__init__(fetcher.base_url)
+        self.fetcher = fetcher
+        self.limiter = limiter
+
+    def fetch(
+        self, url: str, params: dict = None, expect: str = None, headers: dict = None
+    ) -> Page:
+        self.limiter.acquire()
+        page = self.fetcher.fetch(url, params, expect, headers)
+        self.count_page()
+        return page
+
+    def resolve(self, url: str) -> str:
+        self.limiter.acquire()
+        resolved = self.fetcher.resolve(url)
+        self.count_page()
+        return resolved
+
+    def close(self):
+        self.fetcher.close()
+
+
+FETCHERS = {
+    "http": HttpFetcher,
+    "selenium": SeleniumFetcher,
+    "fallback": FallbackFetcher,
+}
+
+
+def get_fetcher(
+    backend: str = None,
+    cache: bool = None,
+    season: int = None,
+    offline: bool = None,
+    **kwargs,
+) -> Fetcher:
+    """
+    Get a fetcher, `backend` is one of http, selenium or fallback (the default).
+    It can also be set with the MBP_FETCHER environment variable.
+
+    Pages go through the raw page cache unless `cache` is False (or
+    MBP_CACHE=0), `season` is the season the pages belong to and decides
+    how long they stay fresh. `offline` (or MBP_OFFLINE=1) only serves
+    pages from the cache
+    """
+    backend = backend or os.environ.get("MBP_FETCHER", "fallback")
+    if backend not in FETCHERS:
+        raise ValueError(f"Unknown fetcher backend: {backend}")
+    fetcher = FETCHERS[backend](**kwargs)
+
+    if cache is None:
+        cache = os.environ.get("MBP_CACHE", "1") != "0"
+    if offline is None:
+        offline = os.environ.get("MBP_OFFLINE", "0") == "1"
+
+    if cache or offline:
+        from mbp.cache import CachingFetcher
+
+        fetcher = CachingFetcher(fetcher, season=season, offline=offline)
+    return fetcher
+
+
+def as_fetcher(driver_or_fetcher) -> Fetcher:
+    """
+    Wrap a selenium webdriver in a fetcher, fetchers are returned untouched
+    """
+    if isinstance(driver_or_fetcher, Fetcher):
+        return driver_or_fetcher
+    return SeleniumFetcher(driver=driver_or_fetcher)
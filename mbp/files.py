@@ -0,0 +1,68 @@
+import os
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    # Windows, where only the threads of one process are kept apart
+    fcntl = None
+
+# Writing shared files
+#
+# Files are written next to where they go and moved over the old file once
+# complete, so readers never see half a file. The temporary file gets the
+# permissions a plain open() would have given it: the old file's, or the
+# umask's for a new file (mkstemp would make it 0600).
+# Read-modify-write cycles between processes are serialized with an
+# advisory lock file.
+
+
+@contextmanager
+def atomic_path(path: Path, suffix: str = ""):
+    """
+    Get a temporary path to write `path` to, moved over `path` when the
+    block finishes (and removed if it fails)
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = str(path.parent / f".tmp{uuid.uuid4().hex}{suffix}")
+    # Created like open() creates files, the kernel applies the umask
+    os.close(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666))
+    try:
+        if path.exists():
+            os.chmod(tmp, path.stat().st_mode & 0o7777)
+        yield tmp
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def write_atomic(path: Path, data: bytes):
+    """
+    Write a file so readers never see it half written
+    """
+    with atomic_path(path) as tmp:
+        with open(tmp, "wb") as f:
+            f.write(data)
+
+
+@contextmanager
+def file_lock(path: Path):
+    """
+    Hold an exclusive lock on a lock file, blocking until other processes
+    release it
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
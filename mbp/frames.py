@@ -0,0 +1,124 @@
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import pandas as pd
+
+# In memory frame cache
+#
+# Tables loaded from the store are kept in memory, shared by everything in
+# the process asking for the same table, up to a memory budget. Each entry
+# remembers the version of the table it was read at (the store version,
+# the mtime of the file for parquet), and is read again when the table has
+# been written since. The least recently used tables are dropped first
+# when the budget is exceeded.
+#
+# The frames are shared, so they must not be modified in place.
+
+# Memory budget in MB, can be set with MBP_FRAME_CACHE_MB
+DEFAULT_BUDGET_MB = 512
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    frames: int = 0
+    nbytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.frames} frames ({self.nbytes / 2**20:.1f}MB), "
+            f"{self.hits} hits, {self.misses} misses ({self.hit_rate:.0%}), "
+            f"{self.evictions} evictions"
+        )
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+class FrameCache:
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        # key: (version, frame, nbytes), oldest use first
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+
+    def get(self, key: tuple, version, load) -> pd.DataFrame:
+        """
+        Get the frame for a key, calling `load()` when it isn't cached or
+        was cached at another version
+        """
+        with self._lock:
+            entry = self._frames.get(key)
+            if entry is not None and entry[0] == version:
+                self._frames.move_to_end(key)
+                self.stats.hits += 1
+                return entry[1]
+            self.stats.misses += 1
+
+        # Load outside of the lock, other tables can be served meanwhile
+        df = load()
+        self.put(key, version, df)
+        return df
+
+    def put(self, key: tuple, version, df: pd.DataFrame):
+        nbytes = frame_nbytes(df)
+        with self._lock:
+            self._discard(key)
+            if nbytes > self.max_bytes:
+                # Would evict everything else, don't keep it
+                return
+            self._frames[key] = (version, df, nbytes)
+            self.stats.nbytes += nbytes
+            while self.stats.nbytes > self.max_bytes:
+                (oldest, _) = next(iter(self._frames.items()))
+                self._discard(oldest)
+                self.stats.evictions += 1
+            self.stats.frames = len(self._frames)
+
+    def _discard(self, key: tuple):
+        entry = self._frames.pop(key, None)
+        if entry is not None:
+            self.stats.nbytes -= entry[2]
+            self.stats.frames = len(self._frames)
+
+    def invalidate(self, key: tuple = None):
+        """
+        Drop one frame, or every frame
+        """
+        with self._lock:
+            if key is None:
+                self._frames.clear()
+                self.stats.nbytes = 0
+                self.stats.frames = 0
+            else:
+                self._discard(key)
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+
+_frame_cache = None
+_frame_cache_lock = threading.Lock()
+
+
+def get_frame_cache() -> FrameCache:
+    """
+    Get the process wide frame cache
+    """
+    global _frame_cache
+    with _frame_cache_lock:
+        if _frame_cache is None:
+            budget = float(os.environ.get("MBP_FRAME_CACHE_MB", DEFAULT_BUDGET_MB))
+            _frame_cache = FrameCache(int(budget * 2**20))
+    return _frame_cache
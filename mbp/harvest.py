@@ -0,0 +1,178 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from mbp.cache import CachingFetcher
+from mbp.crawler import CrawlReport, get_d1_team_names
+from mbp.data import (
+    download_box_score,
+    save_box_scores,
+    save_season_contests,
+    saved_box_score_ids,
+)
+from mbp.fetchers import (
+    FallbackFetcher,
+    Fetcher,
+    HttpFetcher,
+    RateLimitedFetcher,
+    RateLimiter,
+)
+from mbp.sync import update_season_tables
+from mbp.teams import get_team_registry
+from mbp.webscraping import get_season_contests
+
+# Season box score harvester
+#
+# Reads each team's Game By Game page once to collect the contest ids of
+# every game played, then fetches each box score exactly once (a game
+# between A and B shows up on both teams' pages) and stores it under its
+# contest id.
+
+
+def dedupe_contests(contests: pd.DataFrame) -> pd.DataFrame:
+    """
+    Keep one row per contest, games not played yet (no contest id) are
+    dropped. Which team's row is kept doesn't depend on the order the
+    teams were collected in
+    """
+    played = contests.dropna(subset=["contest_id"])
+    played = played.astype({"contest_id": str})
+    played = played.sort_values(["contest_id", "team"])
+    return played.drop_duplicates(subset=["contest_id"]).reset_index(drop=True)
+
+
+def collect_season_contests(
+    year: int, teams: list, fetcher: Fetcher, workers: int = 8
+) -> pd.DataFrame:
+    """
+    Collect the contests of every team in parallel, one Game By Game page
+    per team
+    """
+    registry = get_team_registry()
+
+    frames = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(get_season_contests, fetcher, registry, team, year): team
+            for team in teams
+        }
+        for future in as_completed(futures):
+            try:
+                frames.append(future.result())
+            except Exception as e:
+                print(f"Failed to get the games of {futures[future]}: {e}")
+
+    if not frames:
+        return pd.DataFrame(columns=["contest_id"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def harvest_box_scores(
+    year: int,
+    contests: pd.DataFrame,
+    fetcher: Fetcher,
+    workers: int = 8,
+    force: bool = False,
+    batch_size: int = 250,
+) -> dict:
+    """
+    Download the box score of every contest we don't have yet. Returns
+    the contests that failed. Box scores are saved in batches of
+    `batch_size`, each save rewrites the season's box score table
+    """
+    todo = contests
+    if not force:
+        todo = contests[~contests["contest_id"].isin(saved_box_score_ids(year))]
+
+    failed = {}
+    batch = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                download_box_score,
+                row.contest_id,
+                year,
+                row.box_score_url,
+                fetcher,
+                False,
+            ): row.contest_id
+            for row in todo.itertuples()
+        }
+        for future in as_completed(futures):
+            try:
+                batch.append(future.result())
+            except Exception as e:
+                print(f"Failed to get box score {futures[future]}: {e}")
+                failed[futures[future]] = str(e)
+
+            if len(batch) >= batch_size:
+                save_box_scores(year, batch)
+                batch = []
+
+    save_box_scores(year, batch)
+    return failed
+
+
+def harvest_season(
+    year: int,
+    workers: int = 8,
+    rate: float = 4.0,
+    teams: list = None,
+    force: bool = False,
+    fetcher: Fetcher = None,
+) -> CrawlReport:
+    """
+    Collect every contest of the season and download each box score once.
+    The league wide tables built from the box scores are left to the
+    caller (see update_season_tables)
+    """
+    teams = teams if teams is not None else get_d1_team_names()
+
+    owns_fetcher = fetcher is None
+    if owns_fetcher:
+        fetcher = FallbackFetcher(primary=HttpFetcher(pool_size=workers))
+    limited = RateLimitedFetcher(fetcher, RateLimiter(rate, burst=workers))
+    cached = CachingFetcher(limited, season=year)
+
+    report = CrawlReport(year=year, teams=len(teams))
+    start = time.perf_counter()
+
+    contests = collect_season_contests(year, teams, cached, workers)
+    contests = dedupe_contests(contests)
+    save_season_contests(year, contests)
+
+    report.failed = harvest_box_scores(year, contests, cached, workers, force)
+
+    report.elapsed = time.perf_counter() - start
+    report.pages = limited.pages_fetched
+    report.cached_pages = cached.hits
+
+    if owns_fetcher:
+        fetcher.close()
+
+    print(f"{len(contests)} contests")
+    print(report)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Harvest a season of box scores")
+    parser.add_argument(
+        "year", type=int, help="season start year, eg. 2022 for 2022-23"
+    )
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=4.0, help="requests per second")
+    parser.add_argument("--team", action="append", dest="teams")
+    parser.add_argument(
+        "--force", action="store_true", help="download existing box scores again"
+    )
+    args = parser.parse_args()
+
+    harvest_season(args.year, args.workers, args.rate, args.teams, args.force)
+    update_season_tables(args.year, rebuild=args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,36 @@
+import pandas as pd
+from mbp.player_log import load_player_game_log, load_player_stats
+from mbp.players import player_keys
+
+
 class Player:
     """
     A player class refers to a specific player on a specific team
     """
 
-    def __init__(self) -> None:
-        pass
+    def __init__(self, team_name: str, player: str, year: int) -> None:
+        self.team_name = team_name
+        self.player = player
+        self.year = year
+        self.player_key = player_keys(pd.Series([player])).iloc[0]
+
+    def __str__(self) -> str:
+        return f"{self.player} ({self.team_name} {self.year})"
+
+    def get_game_log(self) -> pd.DataFrame:
+        """
+        Get every game of the player's season, by date
+        """
+        log = load_player_game_log(self.year, self.team_name, self.player)
+        return log.drop(columns=["team"], errors="ignore")
+
+    def get_stats(self) -> pd.Series:
+        """
+        Get the player's season totals and rates, None before their first
+        logged game
+        """
+        stats = load_player_stats(self.year, self.team_name)
+        if stats.empty:
+            return None
+        stats = stats.loc[stats["player_key"] == self.player_key]
+        return None if stats.empty else stats.iloc[0]
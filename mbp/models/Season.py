@@ -0,0 +1,184 @@
+import threading
+import numpy as np
+import pandas as pd
+from datetime import date
+from mbp.data import load_cached_table
+from mbp.store import get_store
+from mbp.teams import get_team_registry
+from mbp.transform import canonical_names
+
+# Columns of the league game table
+SEASON_GAME_COLUMNS = [
+    "contest_id",
+    "datetime",
+    "home_team",
+    "away_team",
+    "home_id",
+    "away_id",
+    "home_score",
+    "away_score",
+    "neutral",
+]
+
+
+def reconcile_games(games: pd.DataFrame, teams=None) -> pd.DataFrame:
+    """
+    Turn the games table (a row per team and game, so twice per game
+    between two of our teams) into one row per game with its home and
+    away team. A game is at a neutral site when either row says so (the
+    "Duke @ Las Vegas, NV" form of the schedule) or both teams list it as
+    away, its "home" team is the first one by name
+    """
+    games = games.loc[games["datetime"].notna() & games["opponent"].notna()]
+    team = canonical_names(games["team"].astype("string"), teams)
+    opponent = canonical_names(games["opponent"].astype("string"), teams)
+    home = games["home"].fillna(0).astype(int).to_numpy()
+    if "neutral" in games.columns:
+        site = games["neutral"].fillna(0).astype(int).to_numpy()
+    else:
+        site = np.zeros(len(games), dtype=int)
+
+    rows = pd.DataFrame(
+        {
+            "day": games["datetime"].dt.normalize().to_numpy(),
+            "team_a": np.where(team < opponent, team, opponent),
+            "team_b": np.where(team < opponent, opponent, team),
+            "home": home,
+            "site": site,
+        }
+    )
+    key = ["day", "team_a", "team_b"]
+    grouped = rows.groupby(key, sort=False)
+    both_away = (grouped["home"].transform("size") > 1) & (
+        grouped["home"].transform("sum") == 0
+    )
+    neutral = (both_away | (grouped["site"].transform("max") == 1)).to_numpy()
+    team_is_home = np.where(neutral, (team == rows["team_a"]).to_numpy(), home == 1)
+
+    def oriented(own, other):
+        return np.where(team_is_home, own, other)
+
+    rows["contest_id"] = games["contest_id"].astype("string").to_numpy()
+    rows["datetime"] = games["datetime"].to_numpy()
+    rows["home_team"] = oriented(team, opponent)
+    rows["away_team"] = oriented(opponent, team)
+    rows["home_score"] = oriented(games["team_score"], games["opp_score"])
+    rows["away_score"] = oriented(games["opp_score"], games["team_score"])
+    rows["neutral"] = neutral.astype(int)
+    rows = rows.drop(columns="site")
+
+    # The first value found in either team's row
+    season = rows.groupby(key, sort=False).first().reset_index(drop=True)
+    season = season.sort_values("datetime", kind="stable").reset_index(drop=True)
+
+    ids = teams.ids if teams is not None else {}
+    season["home_id"] = season["home_team"].map(ids)
+    season["away_id"] = season["away_team"].map(ids)
+    for column in ["home_score", "away_score"]:
+        season[column] = pd.to_numeric(season[column]).astype("Int16")
+    season["neutral"] = season["neutral"].astype("Int8")
+    return season[SEASON_GAME_COLUMNS]
+
+
+class Season:
+    """
+    Every game of a season, once, with dict lookups by matchup, team,
+    date and contest id
+    """
+
+    def __init__(self, year: int, teams=None) -> None:
+        self.year = year
+        self.teams = teams or get_team_registry()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        """
+        Build the game table, again when the games have been written since
+        """
+        version = get_store().version("games", self.year)
+        with self._lock:
+            if version == self._version:
+                return
+            games = reconcile_games(load_cached_table("games", self.year), self.teams)
+
+            day = games["datetime"].dt.normalize()
+            pair_a = np.where(
+                games["home_team"] < games["away_team"],
+                games["home_team"],
+                games["away_team"],
+            )
+            pair_b = np.where(
+                games["home_team"] < games["away_team"],
+                games["away_team"],
+                games["home_team"],
+            )
+            positions = np.arange(len(games))
+            either_side = pd.Series(
+                np.concatenate([positions, positions]),
+                index=pd.concat([games["home_team"], games["away_team"]]).to_numpy(),
+            )
+
+            self._games = games
+            self._by_matchup = pd.Series(positions).groupby([pair_a, pair_b]).indices
+            self._by_team = either_side.groupby(level=0).apply(np.unique).to_dict()
+            self._by_date = pd.Series(positions).groupby(day.to_numpy()).indices
+            self._by_contest = {
+                contest_id: position
+                for position, contest_id in enumerate(games["contest_id"])
+                if pd.notna(contest_id)
+            }
+            self._version = version
+
+    @property
+    def games(self) -> pd.DataFrame:
+        """
+        The league game table, one row per game
+        """
+        self._refresh()
+        return self._games
+
+    def _rows(self, positions) -> pd.DataFrame:
+        if positions is None:
+            return self._games.iloc[0:0]
+        return self._games.iloc[positions]
+
+    def matchup(self, team_a: str, team_b: str) -> pd.DataFrame:
+        """
+        The games between two teams, either one at home
+        """
+        self._refresh()
+        team_a = self.teams.canonical_name(team_a)
+        team_b = self.teams.canonical_name(team_b)
+        pair = (min(team_a, team_b), max(team_a, team_b))
+        return self._rows(self._by_matchup.get(pair))
+
+    def team_games(self, team_name: str) -> pd.DataFrame:
+        self._refresh()
+        return self._rows(self._by_team.get(self.teams.canonical_name(team_name)))
+
+    def games_on(self, day: date) -> pd.DataFrame:
+        self._refresh()
+        return self._rows(self._by_date.get(pd.Timestamp(day).normalize()))
+
+    def game(self, contest_id: str) -> pd.Series:
+        """
+        The game of a contest, None when it isn't known
+        """
+        self._refresh()
+        position = self._by_contest.get(str(contest_id))
+        return None if position is None else self._games.iloc[position]
+
+
+_seasons = {}
+_seasons_lock = threading.Lock()
+
+
+def get_season(year: int) -> Season:
+    """
+    Get the process wide Season of a year
+    """
+    with _seasons_lock:
+        if int(year) not in _seasons:
+            _seasons[int(year)] = Season(int(year))
+        return _seasons[int(year)]
@@ -1,8 +1,11 @@
 import pandas as pd
 from datetime import datetime
-from .TeamYear import TeamYear
-from mbp.paths import team_save_dir
-from mbp.data import download_game_data
+from .Season import get_season
+from .TeamYear import TeamYear, get_team_year
+from mbp.data import download_game_data, get_saved_box_score, load_cached_table
+from mbp.players import player_games
+from mbp.predict import predict_games
+from mbp.teams import get_team_registry
 
 
 class TeamGame:
@@ -11,10 +14,13 @@ class TeamGame:
     ) -> None:
         self.team_a = team_a
         team_b_name = game_details["opponent"]
-        self.team_b = TeamYear(team_b_name, team_a.year)
+        self.team_b = get_team_year(team_b_name, team_a.year)
         self.is_home_game = game_details["home"] == True
         self.date = pd.to_datetime(game_details["datetime"])
         self.year = year
+        # Games played have a contest id, which tells rematches apart
+        contest_id = game_details.get("contest_id")
+        self.contest_id = str(int(contest_id)) if pd.notna(contest_id) else None
 
         # Raw stats
         self.team_a_stats = None
@@ -27,21 +33,44 @@ class TeamGame:
         else:
             return f"{self.team_b.team_name} faces {self.team_a.team_name}"
 
-    def get_game_players(self, reload: bool = False):
+    def predict(self) -> pd.Series:
         """
-        Get players who played in the game
+        Predict the game from the ratings as of its day: the home team's
+        expected margin, spread and chances of winning
         """
-        game_stats = self.get_game_stats(reload)
+        (home, away) = (self.team_a.team_name, self.team_b.team_name)
+        if not self.is_home_game:
+            (home, away) = (away, home)
+        neutral = 0
+
+        # The league game table knows the neutral site games
+        games = get_season(self.year).matchup(home, away)
+        games = games.loc[games["datetime"].dt.normalize() == self.date.normalize()]
+        if not games.empty:
+            game = games.iloc[0]
+            (home, away) = (game["home_team"], game["away_team"])
+            neutral = game["neutral"]
 
-        for team_name in [self.team_a.team_name, self.team_b.team_name]:
-            team = game_stats.loc[game_stats["team"] == team_name]
-            all_team_players = self.team_a.get_roster()
-            player_names = [p for p in all_team_players["player"]]
-            active_players = [p for p in team["player"] if p in player_names]
-            active_players
+        game = pd.DataFrame(
+            {"home": [home], "away": [away], "neutral": [neutral], "date": [self.date]}
+        )
+        return predict_games(game).iloc[0]
 
-        all_team_a_players = self.team_b.get_roster(reload)
-        print(all_team_a_players)
+    def get_game_players(self, reload: bool = False) -> pd.DataFrame:
+        """
+        Get the players of both teams in the game, with their minutes, if
+        they started and if they are on their team's roster
+        """
+        game_stats = self.get_game_stats(reload)
+        if "contest_id" not in game_stats.columns:
+            game_stats = game_stats.assign(contest_id=self.contest_id)
+
+        rosters = load_cached_table("roster", self.year)
+        if rosters.empty:
+            rosters = pd.DataFrame(columns=["team", "player"])
+        team_names = [self.team_a.team_name, self.team_b.team_name]
+        rosters = rosters.loc[rosters["team"].isin(team_names)]
+        return player_games(game_stats, rosters, get_team_registry())
 
     def get_game_stats(self, reload: bool = False):
         """
@@ -50,16 +79,15 @@ class TeamGame:
         if self.game_stats is not None and not reload:
             return self.game_stats
 
-        team1_stats_file = self.team_a.team_dir / f"{self.team_b.team_name}.csv"
-        team2_stats_file = self.team_b.team_dir / f"{self.team_a.team_name}.csv"
-
-        if not team1_stats_file.exists() or not team2_stats_file.exists():
-            (team1, stats1, team2, stats2) = download_game_data(
-                self.team_a.team_name, self.team_b.team_name, self.year
+        if self.contest_id is None:
+            # Games saved before contest ids, the contest is looked up on
+            # the team's Game By Game page once
+            box_score = download_game_data(
+                self.team_a.team_name, self.team_b.team_name, self.year, self.date
             )
-        else:
-            stats1 = pd.read_csv(team1_stats_file)
-            stats2 = pd.read_csv(team2_stats_file)
+            self.contest_id = box_score["contest_id"].iloc[0]
+            self.game_stats = box_score
+            return self.game_stats
 
-        self.game_stats = pd.concat([stats1, stats2], ignore_index=True)
+        self.game_stats = get_saved_box_score(self.contest_id, self.year, reload)
         return self.game_stats
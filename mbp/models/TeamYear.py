@@ -1,8 +1,14 @@
+import threading
 import pandas as pd
-from datetime import datetime, timedelta, date
-from pathlib import Path
-from mbp.paths import SEASONS_DIR, team_save_dir
+from datetime import datetime, date
+from mbp.paths import team_save_dir
+from mbp.player_log import load_player_stats, update_player_log
+from mbp.players import player_keys
+from mbp.schedule import get_schedule_index
+from mbp.sync import sync_teams
 from mbp.data import (
+    has_team_table,
+    load_cached_table,
     download_team_data,
     download_roster_data,
     download_and_save_team_roster,
@@ -22,14 +28,37 @@ def get_next_game(team_year, year: int = date.today().year, date_from=date.today
     return TeamGame(team_year, next_opponent, year)
 
 
+_team_years = {}
+_team_years_lock = threading.Lock()
+
+
+def get_team_year(team_name: str, year: int) -> "TeamYear":
+    """
+    Get the process wide TeamYear of a team's season, so every game
+    against a team shares one object (and its cached tables)
+    """
+    key = (team_name, int(year))
+    with _team_years_lock:
+        if key not in _team_years:
+            _team_years[key] = TeamYear(team_name, year)
+        return _team_years[key]
+
+
+def clear_team_years():
+    with _team_years_lock:
+        _team_years.clear()
+
+
 class TeamYear:
+    """
+    A team's season. Its games, stats and roster are read through the
+    shared frame cache (mbp.frames), they must not be modified in place
+    """
+
     def __init__(self, team_name: str, year: int) -> None:
         self.team_name = team_name
         self.year = year
         self.team_dir = team_save_dir(team_name, year)
-        self.games = None
-        self.roster = None
-        self.stats = None
 
     def download_roster_data(self, force: bool = False):
         """
@@ -41,7 +70,7 @@ class TeamYear:
         """
         Download the latest data for this team
         """
-        if not self.team_dir.exists() or force_update:
+        if not has_team_table("games", self.team_name, self.year) or force_update:
             # New team we haven't seen before
             return download_team_data(self.team_name, self.year, force_update)
         else:
@@ -50,78 +79,72 @@ class TeamYear:
             today_date = pd.to_datetime(datetime.now())
             min_date = pd.to_datetime(df["datetime"].min())
             max_date = pd.to_datetime(df["datetime"].max())
-            # This isn't all that complex, but could really be a lot better
-            # update checking. For now, it will always update everytime
-            # in the future, we should check to see if there is a new update
-            # in the scores because the date has passed, otherwise skip
             if max_date < today_date or min_date > today_date:
                 # If the last date is before today or the min date is after today
                 pass
             else:
-                # We do need to update because we're in the middle of the season
-                return download_team_data(self.team_name, self.year, True)
+                # We're in the middle of the season, only fetch the games
+                # finished since the last sync
+                return sync_teams([self.team_name], self.year)[0]
 
     def get_next_opponent_or_last(self, date_from=date.today()) -> pd.DataFrame:
         """
         Get the next opponent for this team
         """
-
-        df2 = self.get_games()
-        df2["datetime"] = pd.to_datetime(df2["datetime"])
-        df2["difference"] = df2["datetime"].dt.date - date_from
-        future_dates = df2[df2["difference"] > timedelta(days=0)]
-        if future_dates.empty:
+        # Loading the games first moves tables only saved as csv to the store
+        games = self.get_games()
+        next_game = get_schedule_index(self.year).next_game(self.team_name, date_from)
+        if next_game is None:
             # Return the last possible row
-            return df2.iloc[-1]
-        else:
-            next_future_date = future_dates.loc[future_dates["difference"].idxmin()]
-            return next_future_date
+            return games.iloc[-1]
+        return next_game.drop("team")
+
+    def get_games_on_date(self, day: date) -> pd.DataFrame:
+        """
+        Get the games this team plays on a day
+        """
+        games = get_schedule_index(self.year).games_on(day, self.team_name)
+        return games.drop(columns=["team"])
 
     def get_games(self, reload: bool = False) -> pd.DataFrame:
         """
         Get the games previously save for a team
         """
-        if self.games is not None and not reload:
-            return self.games
-
         if reload:
             download_raw_team_games_for_year(self.team_name, self.year)
 
-        self.games = pd.read_csv(self.team_dir / "games.csv", index_col=0)
-        return self.games
+        return load_cached_table("games", self.year, self.team_name)
 
     def get_stats(self, reload: bool = False) -> pd.DataFrame:
         """
         Get the stats previously save for a team
         """
-        if self.stats is not None and not reload:
-            return self.stats
-
         if reload:
             download_raw_team_stats_for_year(self.team_name, self.year)
 
-        self.stats = pd.read_csv(self.team_dir / "stats.csv", index_col=0)
-        return self.stats
+        return load_cached_table("stats", self.year, self.team_name)
 
     def get_roster(self, reload: bool = False) -> pd.DataFrame:
         """
         Get the roster previously save for a team
         """
-        if self.roster is not None and not reload:
-            return self.roster
-
         if reload:
             download_and_save_team_roster(self.team_name, self.year)
 
-        team_roster_file = self.team_dir / "roster.csv"
-
-        self.roster = pd.read_csv(team_roster_file, index_col=0)
-        return self.roster
+        return load_cached_table("roster", self.year, self.team_name)
 
     def get_roster_stats(self, reload: bool = False):
         """
-        Get roster details along with game stats merged
+        Get roster details along with the players' totals and rates from
+        the player game log
         """
         roster = self.get_roster(reload)
-        stats = self.get_stats(reload)
-        return pd.merge(roster, stats, on="player")
+        if reload:
+            update_player_log(self.year)
+
+        roster = roster.assign(player_key=player_keys(roster["player"]))
+        stats = load_player_stats(self.year, self.team_name)
+        if stats.empty:
+            return roster
+        stats = stats.drop(columns=["team", "player"])
+        return pd.merge(roster, stats, on="player_key", how="left")
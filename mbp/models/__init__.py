@@ -1,3 +1,4 @@
 from .TeamGame import *
 from .TeamYear import *
 from .Player import *
+from .Season import *
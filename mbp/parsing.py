@@ -0,0 +1,378 @@
+import logging
+import re
+
+import pandas as pd
+from bs4 import BeautifulSoup
+from bs4.element import Tag
+
+# Parsing helpers for stats.ncaa.org pages.
+#
+# Everything in here works on a single html snapshot (``driver.page_source``
+# or the body of an HTTP response), so a whole table costs one round trip to
+# the browser instead of one per cell. The functions only take strings which
+# makes them easy to run against saved html files.
+
+logger = logging.getLogger(__name__)
+
+
+def make_soup(html: str) -> BeautifulSoup:
+    """
+    Parse an html document with the parser built into python
+    """
+    return BeautifulSoup(html, "html.parser")
+
+
+def cell_text(tag: Tag) -> str:
+    """
+    Get the text of an element the way selenium's ``.text`` renders it:
+    whitespace collapsed and ``<br>`` turned into new lines
+    """
+    if tag is None:
+        return ""
+
+    for br in tag.find_all("br"):
+        br.replace_with("\n")
+
+    lines = [" ".join(line.split()) for line in tag.get_text().split("\n")]
+    return "\n".join(line for line in lines if line)
+
+
+def row_text(row: Tag) -> str:
+    """
+    Get the text of a table row, cells separated by a space
+    """
+    cells = row.find_all(["td", "th"], recursive=False)
+    if not cells:
+        return cell_text(row)
+    return " ".join(t for t in (cell_text(c) for c in cells) if t)
+
+
+def table_headings(table: Tag) -> list:
+    """
+    Get the lowercased headings of a table
+    """
+    headings = table.select("thead th")
+    if not headings:
+        headings = table.find_all("th")
+    return [cell_text(h).lower() for h in headings]
+
+
+def table_body_rows(table: Tag) -> list:
+    """
+    Get the data rows of a table (skipping the header rows)
+    """
+    rows = []
+    for row in table.find_all("tr"):
+        if row.find_parent("thead") is not None:
+            continue
+        if row.find("td", recursive=False) is None:
+            continue
+        rows.append(row)
+    return rows
+
+
+def row_cells(row: Tag) -> list:
+    """
+    Get the text of every cell in a row
+    """
+    return [cell_text(td) for td in row.find_all("td", recursive=False)]
+
+
+def parse_stat_grid(html: str) -> pd.DataFrame:
+    """
+    Parse the ``table#stat_grid`` table into a dataframe using the
+    lowercased table headings as columns
+    """
+    soup = make_soup(html)
+    table = soup.select_one("table#stat_grid")
+    if table is None:
+        raise ValueError("Could not find the stats table on the page")
+
+    headings = table_headings(table)
+    data = []
+    for row in table_body_rows(table):
+        cells = row_cells(row)
+        # Pad short rows (eg. empty trailing cells) so every column lines up
+        cells = (cells + [""] * len(headings))[: len(headings)]
+        data.append(cells)
+
+    return pd.DataFrame(data, columns=headings)
+
+
+ROSTER_COLUMNS = [
+    "jersey",
+    "player",
+    "position",
+    "height",
+    "year",
+    "games_played",
+    "games_scored",
+]
+
+
+def parse_roster(html: str) -> pd.DataFrame:
+    """
+    Parse the roster page into the raw roster dataframe
+    """
+    soup = make_soup(html)
+    table = soup.select_one("table#stat_grid")
+    if table is None:
+        raise ValueError("Could not find the roster table on the page")
+
+    players = []
+    for row in table_body_rows(table):
+        cells = row_cells(row)
+        cells = (cells + [""] * len(ROSTER_COLUMNS))[: len(ROSTER_COLUMNS)]
+        players.append(dict(zip(ROSTER_COLUMNS, cells)))
+
+    return pd.DataFrame(players, columns=ROSTER_COLUMNS)
+
+
+def parse_box_score_table(table: Tag) -> (str, pd.DataFrame):
+    """
+    Parse one team's box score table
+    """
+    # First table heading
+    first_table_heading = table.select_one("tr.heading")
+    team = row_text(first_table_heading) if first_table_heading else ""
+
+    # Get all headers
+    all_headings = [cell_text(h).lower() for h in table.find_all("th")]
+
+    # get all players for each row
+    players_and_stats = []
+    for row in table.select("tr.smtext"):
+        cells = row_cells(row)
+        player_and_stats = {}
+        for idx, heading in enumerate(all_headings):
+            player_and_stats[heading] = cells[idx] if idx < len(cells) else ""
+
+        player_and_stats["team"] = team
+        players_and_stats.append(player_and_stats)
+
+    game_df = pd.DataFrame(players_and_stats)
+    if "player" in game_df.columns:
+        game_df = game_df.drop(game_df[game_df["player"] == "TEAM"].index)
+
+    return (team, game_df)
+
+
+def parse_box_score(html: str) -> (str, pd.DataFrame, str, pd.DataFrame):
+    """
+    Parse a box score page, the last two tables hold each team's stats
+    """
+    soup = make_soup(html)
+    tables = soup.find_all("table")
+    if len(tables) < 2:
+        raise ValueError("Could not find the box score tables on the page")
+
+    team1, stats_team1 = parse_box_score_table(tables[-2])
+    team2, stats_team2 = parse_box_score_table(tables[-1])
+    return (team1, stats_team1, team2, stats_team2)
+
+
+CONTEST_ID_PATTERNS = [
+    re.compile(r"/contests/(\d+)"),
+    re.compile(r"/game/index/(\d+)"),
+    re.compile(r"[?&]game_id=(\d+)"),
+]
+
+
+def contest_id_from_url(url: str) -> str:
+    """
+    Get the contest id out of a box score link, or None
+    """
+    if not url:
+        return None
+    for pattern in CONTEST_ID_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return match.group(1)
+    return None
+
+
+def row_contest_id(row: Tag) -> str:
+    """
+    Get the contest id of the first box score link in a row
+    """
+    for a in row.find_all("a", href=True):
+        contest_id = contest_id_from_url(a["href"])
+        if contest_id is not None:
+            return contest_id
+    return None
+
+
+def parse_schedule(html: str) -> list:
+    """
+    Parse the Schedule/Results table of a team page into a list of
+    (date, opponent, result, attendance, contest_id) tuples
+    """
+    soup = make_soup(html)
+
+    schedule_result_element = None
+    for legend in soup.select("#contentarea fieldset > legend"):
+        if cell_text(legend) == "Schedule/Results":
+            schedule_result_element = legend.find_parent("fieldset")
+            break
+
+    if schedule_result_element is None:
+        raise ValueError("Could not find the Schedule/Results table on the page")
+
+    listing = schedule_result_element.select("table tr")
+    games = [li for li in listing if not li.get("style")]
+
+    season_games = []
+    # Skip the heading row
+    for game in games[1:]:
+        cells = row_cells(game)
+        if not cells:
+            continue
+        date = cells[0]
+        opponent = cells[1] if len(cells) > 1 else None
+        result = (cells[2] if len(cells) > 2 else "") or None
+        attendance = (cells[3] if len(cells) > 3 else "") or None
+        contest_id = row_contest_id(game)
+        season_games.append((date, opponent, result, attendance, contest_id))
+
+    return season_games
+
+
+def find_link(html: str, text: str) -> str:
+    """
+    Get the href of the first link with the given text, or None
+    """
+    soup = make_soup(html)
+    for a in soup.find_all("a", href=True):
+        if cell_text(a) == text:
+            return a["href"]
+    return None
+
+
+def find_season_url(html: str, formatted_year: str) -> (str, bool):
+    """
+    Find the url of the team page for a season from the ``year_id``
+    select. Returns the url and whether that season is the one shown
+    """
+    soup = make_soup(html)
+    select = soup.select_one("select[name=year_id]")
+    if select is None:
+        return (None, False)
+
+    for option in select.find_all("option"):
+        if cell_text(option) != formatted_year:
+            continue
+        selected = option.has_attr("selected")
+        value = option.get("value", "")
+        if value.startswith("/") or value.startswith("http"):
+            return (value, selected)
+        return (f"/teams/{value}", selected)
+
+    return (None, False)
+
+
+def parse_team_list(html: str) -> dict:
+    """
+    Parse the team list page into a dict of team name to team page link
+    """
+    soup = make_soup(html)
+    teams = {}
+    for a in soup.select("table tr td > a[href]"):
+        teams[cell_text(a)] = a["href"]
+    return teams
+
+
+def parse_game_by_game(html: str) -> list:
+    """
+    Parse the Game By Game table into a list of (cells, links) for each game
+    """
+    soup = make_soup(html)
+    table = soup.select_one("#game_breakdown_div table")
+    if table is None:
+        raise ValueError("Could not find the game by game table on the page")
+
+    games = []
+    # skip the first two rows
+    for row in table.find_all("tr")[2:]:
+        if row.get("class"):
+            continue
+        cells = row_cells(row)
+        if not cells:
+            continue
+        links = [a["href"] for a in row.find_all("a", href=True)]
+        games.append((cells, links))
+    return games
+
+
+def team_id_from_href(href: str) -> str:
+    match = re.search(r"/teams/(\d+)", href or "")
+    return match.group(1) if match else None
+
+
+def parse_scoreboard(html: str) -> list:
+    """
+    Parse the livestream scoreboard into a list of contests. Each contest
+    has the away and home team (name, id and score), whether it is final,
+    whether it is at a neutral site ("@ Las Vegas, NV" under the teams,
+    like on the schedules) and its contest id
+    """
+    soup = make_soup(html)
+
+    contests = []
+    seen = set()
+    for a in soup.find_all("a", href=True):
+        contest_id = contest_id_from_url(a["href"])
+        if contest_id is None or contest_id in seen:
+            continue
+
+        # The smallest table around the box score link holding both teams
+        container = a.find_parent("table")
+        while container is not None:
+            team_rows = [
+                row
+                for row in container.find_all("tr")
+                if row.find("a", href=re.compile(r"/teams/\d+"))
+            ]
+            if len(team_rows) >= 2:
+                break
+            container = container.find_parent("table")
+        if container is None:
+            logger.warning(
+                "Skipping contest %s, the scoreboard doesn't list both teams",
+                contest_id,
+            )
+            continue
+        seen.add(contest_id)
+
+        teams = []
+        for row in team_rows[:2]:
+            link = row.find("a", href=re.compile(r"/teams/\d+"))
+            total = row.select_one("td.totalcol")
+            cells = [total] if total else row.find_all("td")
+            scores = [cell_text(c) for c in cells if cell_text(c).isdigit()]
+            teams.append(
+                {
+                    "name": cell_text(link),
+                    "id": team_id_from_href(link["href"]),
+                    "score": int(scores[-1]) if scores else None,
+                }
+            )
+
+        (away, home) = teams
+        lines = cell_text(container).split("\n")
+        neutral = any(line.startswith("@") for line in lines)
+        contests.append(
+            {
+                "contest_id": contest_id,
+                "box_score_url": a["href"],
+                "away_team": away["name"],
+                "away_team_id": away["id"],
+                "away_score": away["score"],
+                "home_team": home["name"],
+                "home_team_id": home["id"],
+                "home_score": home["score"],
+                "neutral": neutral,
+                "final": "final" in cell_text(container).lower(),
+            }
+        )
+
+    return contests
@@ -0,0 +1,271 @@
+import pandas as pd
+
+from mbp.data import load_box_score_hashes, load_cached_table
+from mbp.players import player_games, player_keys
+from mbp.store import get_store
+from mbp.teams import TeamRegistry, get_team_registry
+
+# Player game log
+#
+# Every player line of every box score of a season, joined to the rosters
+# and dated, is kept in the "player_games" store table. Next to it the
+# "player_totals" table keeps per player sums over the season and over
+# their last few games. Both are updated incrementally: only the box
+# scores not logged yet are read, their sums are added to the saved
+# totals and the recent sums are recomputed for the teams they played
+# for. Box scores are hashed when they are saved ("box_score_hashes") and
+# the hashes they were logged with are kept in "logged_box_scores", so only
+# the hash tables are compared to find what to log and a box score
+# downloaded again with corrections is logged again (its old sums are
+# taken out of the totals first). Rates (per 40 minutes, shooting splits,
+# usage) are derived from the sums when they are read.
+
+# Box score columns to game log columns
+BOX_SCORE_STATS = {
+    "fgm": "fgm",
+    "fga": "fga",
+    "3fg": "fg3m",
+    "3fga": "fg3a",
+    "ft": "ftm",
+    "fta": "fta",
+    "pts": "pts",
+    "orebs": "oreb",
+    "drebs": "dreb",
+    "tot reb": "reb",
+    "ast": "ast",
+    "to": "tov",
+    "stl": "stl",
+    "blk": "blk",
+    "fouls": "pf",
+}
+STATS = list(BOX_SCORE_STATS.values())
+
+# Stats given per 40 minutes
+PER_40_STATS = ["pts", "reb", "ast", "tov", "stl", "blk"]
+
+# The recent sums are over this many games played
+RECENT_GAMES = 5
+
+PLAYER_KEY = ["team", "player_key"]
+
+
+def player_game_log(
+    box_scores: pd.DataFrame,
+    rosters: pd.DataFrame,
+    games: pd.DataFrame,
+    teams: TeamRegistry = None,
+) -> pd.DataFrame:
+    """
+    The game log rows of box scores: the player games with their stats and
+    the date of the game (from the games table)
+    """
+    log = player_games(box_scores, rosters, teams)
+    for column, stat in BOX_SCORE_STATS.items():
+        if column in box_scores.columns:
+            log[stat] = pd.to_numeric(box_scores[column].array, errors="coerce")
+        else:
+            log[stat] = float("nan")
+
+    dates = games.dropna(subset=["contest_id"]).drop_duplicates("contest_id")
+    dates = dates.set_index(dates["contest_id"].astype("string"))["datetime"]
+    log.insert(1, "datetime", log["contest_id"].map(dates))
+    return log
+
+
+def sum_totals(log: pd.DataFrame) -> pd.DataFrame:
+    """
+    Season sums of game log rows, one row per player
+    """
+    played = log.loc[log["played"].astype(bool)]
+    grouped = played.groupby(PLAYER_KEY, observed=True, sort=False)
+    totals = grouped[["minutes"] + STATS].sum(min_count=0)
+    totals["games"] = grouped.size()
+    totals["starts"] = grouped["starter"].sum()
+    totals["player"] = grouped["player"].last()
+    totals["last_datetime"] = grouped["datetime"].max()
+    return totals
+
+
+def combine_totals(saved: pd.DataFrame, added: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add the sums of newly logged games to saved totals
+    """
+    if saved.empty:
+        return added
+    saved = saved.set_index(PLAYER_KEY)
+    sums = ["minutes", "games", "starts"] + STATS
+    totals = saved[sums].add(added[sums], fill_value=0)
+    totals["player"] = added["player"].combine_first(saved["player"])
+    totals["last_datetime"] = pd.concat(
+        [saved["last_datetime"], added["last_datetime"]], axis=1
+    ).max(axis=1)
+    return totals
+
+
+def remove_totals(totals: pd.DataFrame, removed: pd.DataFrame) -> pd.DataFrame:
+    """
+    Take the sums of games logged again out of the totals, players left
+    without games are dropped
+    """
+    if removed.empty:
+        return totals
+    sums = ["minutes", "games", "starts"] + STATS
+    removed = removed[sums].reindex(totals.index, fill_value=0)
+    totals = totals.assign(**totals[sums].sub(removed, fill_value=0))
+    return totals.loc[totals["games"] > 0]
+
+
+def recent_totals(log: pd.DataFrame, games: int = RECENT_GAMES) -> pd.DataFrame:
+    """
+    Sums over each player's last `games` games played
+    """
+    played = log.loc[log["played"].astype(bool)]
+    played = played.sort_values("datetime", kind="stable")
+    recent = played.groupby(PLAYER_KEY, observed=True, sort=False).tail(games)
+    recent = recent.groupby(PLAYER_KEY, observed=True, sort=False)
+    totals = recent[["minutes"] + STATS].sum(min_count=0)
+    totals["games"] = recent.size()
+    return totals.add_prefix("recent_")
+
+
+def update_player_log(
+    year: int, teams: TeamRegistry = None, rebuild: bool = False
+) -> pd.DataFrame:
+    """
+    Log the box scores of a season not logged yet, or changed since they
+    were logged, and update the player totals of their teams (every box
+    score and every team when `rebuild`). Returns the new game log rows
+    """
+    store = get_store()
+    teams = teams or get_team_registry()
+
+    hashes = load_box_score_hashes(year)
+    logged = {}
+    if not rebuild:
+        saved_hashes = store.read("logged_box_scores", year)
+        if not saved_hashes.empty:
+            logged = dict(
+                zip(saved_hashes["contest_id"], saved_hashes["box_score_hash"])
+            )
+    new_ids = [c for (c, digest) in hashes.items() if logged.get(c) != digest]
+    if not new_ids:
+        return pd.DataFrame()
+
+    box_scores = store.read("box_scores", year, filters=[("contest_id", "in", new_ids)])
+    rosters = load_cached_table("roster", year)
+    if rosters.empty:
+        rosters = pd.DataFrame(columns=["team", "player"])
+    games = load_cached_table("games", year)
+    if games.empty:
+        games = pd.DataFrame(columns=["contest_id", "datetime"])
+
+    # The rows of box scores logged before, which are about to be replaced
+    previous = pd.DataFrame(columns=["team"])
+    if not rebuild:
+        filters = [("contest_id", "in", new_ids)]
+        logged_rows = store.read("player_games", year, filters=filters)
+        if not logged_rows.empty:
+            previous = logged_rows
+
+    log = player_game_log(box_scores, rosters, games, teams)
+    store.write("player_games", year, log)
+
+    team_names = set(log["team"].dropna().astype(str))
+    team_names = sorted(team_names | set(previous["team"].dropna().astype(str)))
+    saved = pd.DataFrame()
+    if not rebuild:
+        saved = store.read("player_totals", year, filters=[("team", "in", team_names)])
+        if not saved.empty and not previous.empty:
+            saved = remove_totals(saved.set_index(PLAYER_KEY), sum_totals(previous))
+            saved = saved.reset_index()
+    totals = combine_totals(saved, sum_totals(log))
+
+    # The recent games can be from before this update, take them from the
+    # whole log of the teams
+    team_log = store.read("player_games", year, filters=[("team", "in", team_names)])
+    totals = totals.join(recent_totals(team_log))
+    store.write("player_totals", year, totals.reset_index())
+    store.write(
+        "logged_box_scores",
+        year,
+        pd.DataFrame(
+            {"contest_id": new_ids, "box_score_hash": hashes[new_ids].to_numpy()}
+        ),
+    )
+    return log
+
+
+def safe_divide(numerator: pd.Series, denominator: pd.Series) -> pd.Series:
+    return (numerator / denominator.where(denominator > 0)).astype("float32")
+
+
+def player_rates(totals: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add per game, per 40 minute, shooting and usage rates to player totals
+    """
+    rates = totals.copy()
+    sums = rates[["minutes", "games"] + STATS].astype("float64")
+    rates["mpg"] = safe_divide(sums["minutes"], sums["games"])
+    rates["ppg"] = safe_divide(sums["pts"], sums["games"])
+    for stat in PER_40_STATS:
+        rates[f"{stat}_per_40"] = safe_divide(sums[stat] * 40, sums["minutes"])
+
+    rates["fg_pct"] = safe_divide(sums["fgm"], sums["fga"])
+    rates["fg3_pct"] = safe_divide(sums["fg3m"], sums["fg3a"])
+    rates["ft_pct"] = safe_divide(sums["ftm"], sums["fta"])
+    rates["efg_pct"] = safe_divide(sums["fgm"] + 0.5 * sums["fg3m"], sums["fga"])
+    rates["ts_pct"] = safe_divide(sums["pts"], 2 * (sums["fga"] + 0.44 * sums["fta"]))
+    rates["fg3a_rate"] = safe_divide(sums["fg3a"], sums["fga"])
+    rates["fta_rate"] = safe_divide(sums["fta"], sums["fga"])
+
+    # Usage: the share of the team's possessions a player finishes (with a
+    # shot, free throws or a turnover) while on the floor
+    used = sums["fga"] + 0.44 * sums["fta"] + sums["tov"]
+    team_used = used.groupby(rates["team"], observed=True).transform("sum")
+    team_minutes = (
+        sums["minutes"].groupby(rates["team"], observed=True).transform("sum")
+    )
+    rates["used_per_40"] = safe_divide(used * 40, sums["minutes"])
+    rates["usage"] = safe_divide(used * team_minutes / 5, sums["minutes"] * team_used)
+
+    if "recent_minutes" in rates.columns:
+        recent = rates[["recent_minutes", "recent_games", "recent_pts"]].astype(
+            "float64"
+        )
+        rates["recent_mpg"] = safe_divide(
+            recent["recent_minutes"], recent["recent_games"]
+        )
+        rates["recent_pts_per_40"] = safe_divide(
+            recent["recent_pts"] * 40, recent["recent_minutes"]
+        )
+    return rates
+
+
+def load_player_stats(year: int, team_name: str = None) -> pd.DataFrame:
+    """
+    The player totals and rates of a season, or of one team
+    """
+    totals = load_cached_table("player_totals", year)
+    if totals.empty:
+        return totals
+    if team_name is not None:
+        totals = totals.loc[totals["team"] == team_name]
+    return player_rates(totals.reset_index(drop=True))
+
+
+def load_player_game_log(
+    year: int, team_name: str = None, player: str = None
+) -> pd.DataFrame:
+    """
+    The game log of a season, a team or a player, by date
+    """
+    filters = []
+    if team_name is not None:
+        filters.append(("team", "==", team_name))
+    if player is not None:
+        key = player_keys(pd.Series([player])).iloc[0]
+        filters.append(("player_key", "==", key))
+    log = get_store().read("player_games", year, filters=filters or None)
+    if log.empty:
+        return log
+    return log.sort_values("datetime", kind="stable").reset_index(drop=True)
@@ -0,0 +1,120 @@
+import pandas as pd
+
+from mbp.data import load_cached_table
+from mbp.teams import TeamRegistry, get_team_registry
+from mbp.transform import canonical_names
+
+# Players in games
+#
+# Box score lines and rosters spell players differently ("Doe, John",
+# "John Doe", "DOE, JOHN JR."), so both are joined on a normalized player
+# key. Starters are the lines with a position, stats.ncaa.org leaves it
+# empty for the bench.
+
+# Name suffixes left out of the player key
+NAME_SUFFIXES = r"\b(jr|sr|ii|iii|iv|v)\b"
+
+# Roster columns added to the player game lines
+ROSTER_FIELDS = ["jersey", "position", "year", "height_ft", "height_in"]
+
+PLAYER_GAME_COLUMNS = [
+    "contest_id",
+    "team",
+    "player",
+    "player_key",
+    "minutes",
+    "starter",
+    "played",
+    "on_roster",
+] + ROSTER_FIELDS
+
+
+def normalize_player_names(names: pd.Series) -> pd.Series:
+    """
+    The normalized form of player names, "Doe, John Jr." and "john doe"
+    both become "john doe"
+    """
+    names = names.str.casefold().str.strip()
+    # Last, First to First Last
+    parts = names.str.extract(r"^([^,]+),\s*(.+)$")
+    names = (parts[1] + " " + parts[0]).fillna(names)
+    names = names.str.replace(r"[.'`]", "", regex=True)
+    names = names.str.replace(NAME_SUFFIXES, "", regex=True)
+    names = names.str.replace(r"[^\w]+", " ", regex=True)
+    return names.str.split().str.join(" ").astype("string")
+
+
+def player_keys(names: pd.Series) -> pd.Series:
+    """
+    The player keys of names, a season repeats the same few thousand names
+    so each is normalized once
+    """
+    (codes, uniques) = pd.factorize(names)
+    keys = normalize_player_names(pd.Series(uniques, dtype="string"))
+    return pd.Series(keys.array.take(codes, allow_fill=True), index=names.index)
+
+
+def minutes_column(box_scores: pd.DataFrame) -> pd.Series:
+    for column in ["mp", "min"]:
+        if column in box_scores.columns:
+            return box_scores[column].astype("float32")
+    return pd.Series(float("nan"), index=box_scores.index, dtype="float32")
+
+
+def player_games(
+    box_scores: pd.DataFrame, rosters: pd.DataFrame, teams: TeamRegistry = None
+) -> pd.DataFrame:
+    """
+    Join box score lines (of any number of games) to the team rosters, one
+    row per player and game with the minutes played, if they started and
+    if they are on the roster
+    """
+    lines = pd.DataFrame(
+        {
+            "contest_id": box_scores["contest_id"].astype("string"),
+            "team": canonical_names(box_scores["team"].astype("string"), teams).astype(
+                "string"
+            ),
+            "player": box_scores["player"].astype("string"),
+            "minutes": minutes_column(box_scores),
+        },
+        index=box_scores.index,
+    )
+    lines["player_key"] = player_keys(lines["player"])
+    if "pos" in box_scores.columns:
+        lines["starter"] = box_scores["pos"].astype("string").str.strip().ne("")
+        lines["starter"] = lines["starter"].fillna(False).astype(bool)
+    else:
+        lines["starter"] = False
+    lines["played"] = lines["minutes"].fillna(0).gt(0) | lines["starter"]
+
+    roster = rosters[["team", "player"] + [c for c in ROSTER_FIELDS if c in rosters]]
+    roster = roster.assign(
+        team=roster["team"].astype("string"),
+        player_key=player_keys(roster["player"]),
+    ).drop(columns=["player"])
+    roster = roster.drop_duplicates(subset=["team", "player_key"])
+
+    players = lines.merge(
+        roster, on=["team", "player_key"], how="left", indicator="on_roster"
+    )
+    players["on_roster"] = players["on_roster"] == "both"
+    for field in ROSTER_FIELDS:
+        if field not in players.columns:
+            players[field] = pd.NA
+    return players[PLAYER_GAME_COLUMNS]
+
+
+def season_player_games(year: int, teams: TeamRegistry = None) -> pd.DataFrame:
+    """
+    Every player line of every saved box score of a season, joined to the
+    rosters
+    """
+    teams = teams or get_team_registry()
+    box_scores = load_cached_table("box_scores", year)
+    if box_scores.empty:
+        return pd.DataFrame(columns=PLAYER_GAME_COLUMNS)
+    rosters = load_cached_table("roster", year)
+    if rosters.empty:
+        rosters = pd.DataFrame(columns=["team", "player"])
+    return player_games(box_scores, rosters, teams)
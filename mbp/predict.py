@@ -0,0 +1,267 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from mbp.ratings import ELO_HOME, Ratings, load_ratings, ratings_on
+from mbp.store import get_store
+from mbp.teams import TeamRegistry, get_team_registry
+from mbp.transform import canonical_names
+from mbp.utils import get_season_for_date
+
+# Game predictions
+#
+# The spread and win probabilities of any number of games in one call,
+# from the saved ratings as of each game's day (mbp/ratings.py). Games are
+# grouped by the ratings they use, a day's slate is one group, and each
+# group is a handful of array operations.
+#
+# The matchup matrix holds the neutral court margin and win probability
+# of every pair of rated teams. When the ratings change only the rows and
+# columns of the teams whose ratings moved are computed again.
+
+# Spread of the actual margin around the expected one, in points
+MARGIN_SD = 11.0
+
+PREDICTION_COLUMNS = ["margin", "spread", "win_probability", "elo_probability"]
+
+# Ratings changes smaller than this don't change the matchup matrix
+RATING_TOLERANCE = 1e-6
+
+
+def win_probability(margin, margin_sd: float = MARGIN_SD) -> np.ndarray:
+    """
+    The chance of winning with an expected margin
+    """
+    from scipy.special import ndtr
+
+    return ndtr(np.asarray(margin, dtype="float64") / margin_sd)
+
+
+def elo_probability(elo_difference) -> np.ndarray:
+    return 1 / (1 + 10 ** (-np.asarray(elo_difference, dtype="float64") / 400))
+
+
+def predict_with(
+    ratings: Ratings,
+    home,
+    away,
+    neutral=False,
+    margin_sd: float = MARGIN_SD,
+    elo_home: float = ELO_HOME,
+) -> pd.DataFrame:
+    """
+    Predict games from one set of ratings: the home team's expected margin,
+    its spread (the negated margin, like a betting line) and its chance of
+    winning from the margin and from Elo
+    """
+    home = ratings.teams.get_indexer(np.atleast_1d(home))
+    away = ratings.teams.get_indexer(np.atleast_1d(away))
+    neutral = np.broadcast_to(np.asarray(neutral, dtype="float64"), home.shape)
+    # Unknown teams (-1) take the NaN appended at the end
+    net = np.append(ratings.offense + ratings.defense, np.nan)
+    elo = np.append(ratings.elo, np.nan)
+
+    per_100 = net[home] - net[away] + ratings.home_court * (1 - neutral)
+    margin = per_100 * ratings.pace / 100
+    elo_difference = elo[home] - elo[away] + elo_home * (1 - neutral)
+    return pd.DataFrame(
+        {
+            "margin": margin,
+            "spread": -margin,
+            "win_probability": win_probability(margin, margin_sd),
+            "elo_probability": elo_probability(elo_difference),
+        }
+    )
+
+
+def predict_games(
+    games: pd.DataFrame, ratings: Ratings = None, teams: TeamRegistry = None
+) -> pd.DataFrame:
+    """
+    Predict games given as home, away, neutral (optional) and date columns,
+    each from the saved ratings as of its date (or all from `ratings`).
+    Returns the games with PREDICTION_COLUMNS added, NaN when a team or
+    the date has no ratings
+    """
+    teams = teams or get_team_registry()
+    home = canonical_names(games["home"].astype("string"), teams).to_numpy(str)
+    away = canonical_names(games["away"].astype("string"), teams).to_numpy(str)
+    if "neutral" in games.columns:
+        neutral = games["neutral"].fillna(0).to_numpy("float64")
+    else:
+        neutral = np.zeros(len(games))
+
+    predictions = pd.DataFrame(
+        np.nan, index=np.arange(len(games)), columns=PREDICTION_COLUMNS
+    )
+    if ratings is not None:
+        groups = {None: np.arange(len(games))}
+        found = {None: ratings}
+    else:
+        days = pd.to_datetime(games["date"]).dt.normalize()
+        groups = pd.Series(np.arange(len(games))).groupby(days.to_numpy()).indices
+        groups = {pd.Timestamp(day): rows for (day, rows) in groups.items()}
+        found = season_ratings(list(groups))
+
+    for day, rows in groups.items():
+        if found.get(day) is None:
+            continue
+        predicted = predict_with(found[day], home[rows], away[rows], neutral[rows])
+        predictions.iloc[rows] = predicted.to_numpy()
+
+    predictions.index = games.index
+    return games.join(predictions)
+
+
+def season_ratings(days: list) -> dict:
+    """
+    The saved ratings as of each day, reading each season's ratings once
+    """
+    seasons = {}
+    for day in days:
+        seasons.setdefault(get_season_for_date(day), []).append(day)
+    found = {}
+    for year, season_days in seasons.items():
+        found.update(zip(season_days, ratings_on(year, season_days)))
+    return found
+
+
+class MatchupMatrix:
+    """
+    The neutral court margin and win probability of every pair of rated
+    teams, rows against columns
+    """
+
+    def __init__(self, ratings: Ratings) -> None:
+        self.teams = pd.Index([])
+        self.margins = np.empty((0, 0))
+        self.probabilities = np.empty((0, 0))
+        self.elo_probabilities = np.empty((0, 0))
+        self._net = np.empty(0)
+        self._elo = np.empty(0)
+        self._pace = None
+        self.update(ratings)
+
+    def __len__(self) -> int:
+        return len(self.teams)
+
+    def update(self, ratings: Ratings) -> int:
+        """
+        Move the matrix to new ratings, only computing again the rows and
+        columns of the teams whose ratings changed. Returns how many teams
+        changed
+        """
+        teams = self.teams.union(ratings.teams)
+        positions = ratings.teams.get_indexer(teams)
+        known = positions >= 0
+        net = np.full(len(teams), np.nan)
+        elo = np.full(len(teams), np.nan)
+        net[known] = (ratings.offense + ratings.defense)[positions[known]]
+        elo[known] = ratings.elo[positions[known]]
+
+        if len(teams) != len(self.teams):
+            # New teams, the matrix is laid out again
+            self._resize(teams)
+        changed = ~(
+            (np.abs(net - self._net) <= RATING_TOLERANCE)
+            & (np.abs(elo - self._elo) <= RATING_TOLERANCE)
+        )
+        changed &= ~(np.isnan(net) & np.isnan(self._net))
+        if ratings.pace != self._pace:
+            # Every margin is scaled by the pace
+            changed[:] = True
+
+        self._net = net
+        self._elo = elo
+        self._pace = ratings.pace
+        rows = np.flatnonzero(changed)
+        if len(rows):
+            self._compute(rows)
+        return len(rows)
+
+    def _resize(self, teams: pd.Index):
+        old = teams.get_indexer(self.teams)
+        for name in ["margins", "probabilities", "elo_probabilities"]:
+            matrix = np.full((len(teams), len(teams)), np.nan)
+            matrix[np.ix_(old, old)] = getattr(self, name)
+            setattr(self, name, matrix)
+        net = np.full(len(teams), np.nan)
+        elo = np.full(len(teams), np.nan)
+        net[old] = self._net
+        elo[old] = self._elo
+        (self.teams, self._net, self._elo) = (teams, net, elo)
+
+    def _compute(self, rows: np.ndarray):
+        """
+        Compute the rows and columns of some teams
+        """
+        margins = (self._net[rows, None] - self._net[None, :]) * self._pace / 100
+        probabilities = win_probability(margins)
+        elo_probabilities = elo_probability(self._elo[rows, None] - self._elo[None, :])
+        self.margins[rows, :] = margins
+        self.probabilities[rows, :] = probabilities
+        self.elo_probabilities[rows, :] = elo_probabilities
+        # The columns are the other side of the same games
+        self.margins[:, rows] = -margins.T
+        self.probabilities[:, rows] = 1 - probabilities.T
+        self.elo_probabilities[:, rows] = 1 - elo_probabilities.T
+
+    def lookup(self, team_a, team_b) -> pd.DataFrame:
+        """
+        The neutral court margin and win probabilities of team_a against
+        team_b (names or arrays of names)
+        """
+        a = self.teams.get_indexer(np.atleast_1d(team_a))
+        b = self.teams.get_indexer(np.atleast_1d(team_b))
+        known = (a >= 0) & (b >= 0)
+        (a, b) = (np.where(known, a, 0), np.where(known, b, 0))
+        return pd.DataFrame(
+            {
+                "margin": np.where(known, self.margins[a, b], np.nan),
+                "win_probability": np.where(known, self.probabilities[a, b], np.nan),
+                "elo_probability": np.where(
+                    known, self.elo_probabilities[a, b], np.nan
+                ),
+            }
+        )
+
+    def frame(self, teams: list = None, values: str = "probabilities"):
+        """
+        The matrix (or the part of it between some teams) labeled by team,
+        KeyError for teams that aren't in it
+        """
+        teams = self.teams if teams is None else pd.Index(teams)
+        positions = self.teams.get_indexer(teams)
+        if (positions < 0).any():
+            missing = teams[positions < 0]
+            raise KeyError(f"No matchups for {', '.join(map(str, missing))}")
+        matrix = getattr(self, values)[np.ix_(positions, positions)]
+        return pd.DataFrame(matrix, index=teams, columns=teams)
+
+
+_matrices = {}
+_matrices_lock = threading.Lock()
+
+
+def get_matchup_matrix(year: int) -> MatchupMatrix:
+    """
+    Get the process wide matchup matrix of a season's latest ratings,
+    updated when ratings have been saved since. None without ratings
+    """
+    version = get_store().version("ratings", year)
+    with _matrices_lock:
+        cached = _matrices.get(int(year))
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        ratings = load_ratings(year)
+        if ratings is None:
+            return None
+        if cached is None:
+            matrix = MatchupMatrix(ratings)
+        else:
+            matrix = cached[1]
+            matrix.update(ratings)
+        _matrices[int(year)] = (version, matrix)
+        return matrix
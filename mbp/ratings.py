@@ -0,0 +1,593 @@
+import copy
+import threading
+from dataclasses import dataclass, replace
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from mbp.data import load_cached_table
+from mbp.store import get_store
+from mbp.teams import TeamRegistry, get_team_registry
+
+# Team ratings
+#
+# Two ratings of every team from the scores of every game of a season:
+#
+# - Adjusted efficiency: the points per 100 possessions a team scores
+#   (offense) and holds its opponents to (defense), adjusted for who it
+#   played and where. Every game gives two rows of a linear system,
+#       100 * pts / poss = mean + off[team] - def[opponent] +/- home_court / 2
+#   (no home court term on neutral sites), which is solved in the least
+#   squares sense. It's sparse (four nonzeros a row, ~12,000 rows by ~700
+#   columns), a small ridge keeps teams with few games near average, and
+#   it's solved iteratively (LSQR) from the previous solution: a day of
+#   new games barely moves it, so it takes a few iterations.
+# - Elo, with a margin of victory multiplier, every game of a day updated
+#   at once from the ratings going into the day.
+#
+# Ratings "as of" a day only use the games played before it. The rows of
+# the system are sorted by date once, the ratings as of a day solve over
+# the rows before it, so the ratings of every day of a season are one
+# pass, each day starting from the day before. When games come in the
+# process wide system keeps the rows of the games before the first new (or
+# changed) one and only adds the rows from there on.
+#
+# Ratings are kept in the "ratings" store table, a row per team and as of
+# day.
+
+# Weight of the prior (every team average), in team games
+RIDGE = 2.0
+
+LSQR_TOLERANCE = 1e-6
+
+# Possessions per game before any game with a box score
+DEFAULT_PACE = 70.0
+
+ELO_START = 1500.0
+ELO_K = 20.0
+# Elo points given to the home team
+ELO_HOME = 80.0
+# Share of the way back to the start an Elo rating goes between seasons
+ELO_REGRESS = 1 / 3
+
+# Columns telling if a game of a rating system changed
+COMPARED_COLUMNS = [
+    "contest_id",
+    "datetime",
+    "home_team",
+    "away_team",
+    "home_score",
+    "away_score",
+    "neutral",
+    "poss",
+]
+
+RATING_COLUMNS = [
+    "as_of",
+    "team",
+    "games",
+    "off",
+    "def",
+    "net",
+    "elo",
+    "mean",
+    "home_court",
+    "pace",
+]
+
+
+def day_start(day) -> pd.Timestamp:
+    return pd.Timestamp(day).normalize()
+
+
+def day_key(day) -> str:
+    return pd.Timestamp(day).strftime("%Y-%m-%d")
+
+
+def rating_games(year: int, teams: TeamRegistry = None) -> pd.DataFrame:
+    """
+    The finished games of a season, one row per game, with their
+    possessions (from the team features, the season's average when the
+    game has no box score)
+    """
+    from mbp.models.Season import SEASON_GAME_COLUMNS, reconcile_games
+
+    teams = teams or get_team_registry()
+    games = load_cached_table("games", year)
+    if games.empty:
+        return pd.DataFrame(columns=SEASON_GAME_COLUMNS + ["poss"])
+    games = reconcile_games(games, teams)
+    games = games.dropna(subset=["home_score", "away_score"])
+
+    features = load_cached_table("team_features", year)
+    if features.empty:
+        poss = pd.Series(np.nan, index=games.index)
+    else:
+        features = features.dropna(subset=["contest_id"])
+        features = features.drop_duplicates("contest_id").set_index("contest_id")
+        poss = games["contest_id"].map(features["poss"]).astype("float64")
+    return games.assign(poss=poss).reset_index(drop=True)
+
+
+@dataclass
+class Ratings:
+    """
+    The ratings of every team as of a day
+    """
+
+    as_of: pd.Timestamp
+    teams: pd.Index
+    games: np.ndarray
+    offense: np.ndarray
+    defense: np.ndarray
+    elo: np.ndarray
+    mean: float = 0.0
+    home_court: float = 0.0
+    pace: float = float("nan")
+
+    def frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "as_of": day_key(self.as_of),
+                "team": self.teams,
+                "games": self.games,
+                "off": self.offense,
+                "def": self.defense,
+                "net": self.offense + self.defense,
+                "elo": self.elo,
+                "mean": self.mean,
+                "home_court": self.home_court,
+                "pace": self.pace,
+            }
+        )[RATING_COLUMNS]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "Ratings":
+        """
+        The ratings of one as of day of the ratings table
+        """
+        first = df.iloc[0]
+        return cls(
+            as_of=pd.Timestamp(first["as_of"]),
+            teams=pd.Index(df["team"].astype(str)),
+            games=df["games"].to_numpy("int64"),
+            offense=df["off"].to_numpy("float64"),
+            defense=df["def"].to_numpy("float64"),
+            elo=df["elo"].to_numpy("float64"),
+            mean=float(first["mean"]),
+            home_court=float(first["home_court"]),
+            pace=float(first["pace"]),
+        )
+
+
+def carry_over(ratings: Ratings) -> Ratings:
+    """
+    Last season's final ratings as the start of a new season, the Elo
+    ratings regressed towards the start
+    """
+    if ratings is None:
+        return None
+    elo = ratings.elo + (ELO_START - ratings.elo) * ELO_REGRESS
+    return replace(ratings, elo=elo)
+
+
+def elo_update(
+    elo,
+    home,
+    away,
+    home_score,
+    away_score,
+    neutral,
+    k: float = ELO_K,
+    home_elo: float = ELO_HOME,
+) -> np.ndarray:
+    """
+    Update Elo ratings with games all played from the same ratings (the
+    games of one day), in place
+    """
+    diff = elo[home] - elo[away] + home_elo * (1 - neutral)
+    expected = 1 / (1 + 10 ** (-diff / 400))
+    margin = home_score - away_score
+    result = np.sign(margin) / 2 + 0.5
+    # Bigger wins count more, less so when the winner was the favorite
+    winner_diff = np.where(margin >= 0, diff, -diff)
+    multiplier = np.log1p(np.abs(margin)) * 2.2 / (winner_diff * 0.001 + 2.2)
+    change = k * multiplier * (result - expected)
+    np.add.at(elo, home, change)
+    np.add.at(elo, away, -change)
+    return elo
+
+
+class RatingSystem:
+    """
+    The rating system of a season's games: the sparse least squares system
+    with its rows sorted by date, and the games in the order Elo takes
+    them
+    """
+
+    def __init__(
+        self,
+        games: pd.DataFrame,
+        ridge: float = RIDGE,
+        elo_k: float = ELO_K,
+        elo_home: float = ELO_HOME,
+    ) -> None:
+        from scipy import sparse
+
+        self.elo_k = elo_k
+        self.elo_home = elo_home
+        games = games.sort_values("datetime", kind="stable").reset_index(drop=True)
+        self.teams = pd.Index(
+            np.unique(pd.concat([games["home_team"], games["away_team"]]).to_numpy())
+        )
+        n_teams = len(self.teams)
+
+        # One ridge row per team rating, then two rows per game (see _append)
+        self.n_columns = 2 * n_teams + 2
+        team_columns = 2 * n_teams
+        diagonal = np.arange(team_columns)
+        self._ridge_rows = team_columns
+        self._matrix = sparse.csr_matrix(
+            (np.full(team_columns, np.sqrt(ridge)), (diagonal, diagonal)),
+            shape=(team_columns, self.n_columns),
+        )
+        self._target = np.zeros(team_columns)
+
+        self.games = games.iloc[0:0]
+        self._home = np.empty(0, dtype="int64")
+        self._away = np.empty(0, dtype="int64")
+        self._home_score = np.empty(0)
+        self._away_score = np.empty(0)
+        self._neutral = np.empty(0)
+        self._days = np.empty(0, dtype="datetime64[ns]")
+        self._poss = np.empty(0)
+        self._pace = np.empty(0)
+        self.iterations = 0
+        self._append(games)
+
+    def _append(self, games: pd.DataFrame):
+        """
+        Add the rows of games played after every game of the system, of
+        teams it has
+        """
+        from scipy import sparse
+
+        n_teams = len(self.teams)
+        n_games = len(games)
+        home = self.teams.get_indexer(games["home_team"])
+        away = self.teams.get_indexer(games["away_team"])
+        home_score = games["home_score"].to_numpy("float64")
+        away_score = games["away_score"].to_numpy("float64")
+        neutral = games["neutral"].fillna(0).to_numpy("float64")
+        days = pd.to_datetime(games["datetime"]).dt.normalize()
+
+        self.games = pd.concat([self.games, games], ignore_index=True)
+        self._home = np.concatenate([self._home, home])
+        self._away = np.concatenate([self._away, away])
+        self._home_score = np.concatenate([self._home_score, home_score])
+        self._away_score = np.concatenate([self._away_score, away_score])
+        self._neutral = np.concatenate([self._neutral, neutral])
+        self._days = np.concatenate([self._days, days.to_numpy("datetime64[ns]")])
+        self._poss = np.concatenate([self._poss, games["poss"].to_numpy("float64")])
+
+        poss = self._poss
+        known = np.isfinite(poss)
+        # Games without possessions take the average of the games before
+        # them which have them
+        known_poss = np.where(known, poss, 0)
+        known_sum = np.cumsum(known_poss) - known_poss
+        known_count = np.cumsum(known) - known
+        average = known_sum / np.maximum(known_count, 1)
+        poss = np.where(known, poss, np.where(known_count > 0, average, DEFAULT_PACE))
+        # Running average possessions of the games before each game
+        self._pace = np.cumsum(poss) / np.arange(1, len(poss) + 1)
+
+        # Two rows per game, the home team's offense then the away team's
+        team_columns = 2 * n_teams
+        offense = np.column_stack([home, away]).ravel()
+        defense = np.column_stack([away, home]).ravel() + n_teams
+        home_column = np.full(2 * n_games, team_columns)
+        mean = np.full(2 * n_games, team_columns + 1)
+        side = np.tile([0.5, -0.5], n_games) * np.repeat(1 - neutral, 2)
+        ones = np.ones(2 * n_games)
+
+        rows = np.repeat(np.arange(2 * n_games), 4)
+        columns = np.column_stack([offense, defense, home_column, mean]).ravel()
+        values = np.column_stack([ones, -ones, side, ones]).ravel()
+        block = sparse.csr_matrix(
+            (values, (rows, columns)), shape=(2 * n_games, self.n_columns)
+        )
+        self._matrix = sparse.vstack([self._matrix, block], format="csr")
+        points = np.column_stack([home_score, away_score]).ravel()
+        new_poss = poss[len(poss) - n_games :]
+        self._target = np.concatenate(
+            [self._target, 100 * points / np.repeat(new_poss, 2)]
+        )
+
+    def _truncate(self, n_games: int):
+        """
+        Drop the games from the `n_games`th on
+        """
+        rows = self._ridge_rows + 2 * n_games
+        self._matrix = self._matrix[:rows]
+        self._target = self._target[:rows]
+        self.games = self.games.iloc[:n_games]
+        for name in [
+            "_home",
+            "_away",
+            "_home_score",
+            "_away_score",
+            "_neutral",
+            "_days",
+            "_poss",
+            "_pace",
+        ]:
+            setattr(self, name, getattr(self, name)[:n_games])
+
+    def same_games(self, games: pd.DataFrame) -> int:
+        """
+        How many of the first games of the system are the first games of
+        `games` (sorted by date)
+        """
+        n_games = min(len(self.games), len(games))
+        same = np.ones(n_games, dtype=bool)
+        for column in COMPARED_COLUMNS:
+            old = self.games[column].iloc[:n_games].reset_index(drop=True)
+            new = games[column].iloc[:n_games].reset_index(drop=True)
+            present = (old.notna() & new.notna()).to_numpy(bool)
+            equal = (old.isna() & new.isna()).to_numpy(bool)
+            equal[present] = (
+                old[present].astype(object).to_numpy()
+                == new[present].astype(object).to_numpy()
+            )
+            same &= equal
+        return n_games if same.all() else int(np.argmin(same))
+
+    def extended(self, games: pd.DataFrame) -> "RatingSystem":
+        """
+        The system of a season's games (every game, as rating_games gives
+        them) built from this one: the rows of the games before the first
+        game that changed are kept and only the games from there on are
+        added. None when the games have teams this system doesn't, it has
+        to be built again
+        """
+        games = games.sort_values("datetime", kind="stable").reset_index(drop=True)
+        teams = pd.concat([games["home_team"], games["away_team"]])
+        if not teams.isin(self.teams).all():
+            return None
+        same = self.same_games(games)
+        if same == len(self.games) == len(games):
+            return self
+
+        system = copy.copy(self)
+        system._truncate(same)
+        system._append(games.iloc[same:])
+        return system
+
+    def games_before(self, day) -> int:
+        """
+        The number of games played before a day
+        """
+        return int(np.searchsorted(self._days, np.datetime64(day_start(day)), "left"))
+
+    def initial(self, previous: Ratings = None) -> (np.ndarray, np.ndarray):
+        """
+        The starting solution and Elo ratings, from earlier ratings of the
+        teams when given
+        """
+        x0 = np.zeros(self.n_columns)
+        elo = np.full(len(self.teams), ELO_START)
+        if previous is None:
+            return (x0, elo)
+        n_teams = len(self.teams)
+        positions = previous.teams.get_indexer(self.teams)
+        known = positions >= 0
+        x0[:n_teams][known] = previous.offense[positions[known]]
+        x0[n_teams : 2 * n_teams][known] = previous.defense[positions[known]]
+        x0[-2:] = [previous.home_court, previous.mean]
+        elo[known] = previous.elo[positions[known]]
+        return (x0, elo)
+
+    def solve(self, n_games: int, x0: np.ndarray = None) -> np.ndarray:
+        """
+        Solve the system over the first `n_games` games, from `x0`
+        """
+        from scipy.sparse.linalg import lsqr
+
+        if n_games == 0:
+            return np.zeros(self.n_columns)
+        rows = self._ridge_rows + 2 * n_games
+        result = lsqr(
+            self._matrix[:rows],
+            self._target[:rows],
+            atol=LSQR_TOLERANCE,
+            btol=LSQR_TOLERANCE,
+            x0=x0,
+        )
+        self.iterations += result[2]
+        return result[0]
+
+    def play(self, elo: np.ndarray, start: int, stop: int) -> np.ndarray:
+        """
+        Update Elo ratings with the games from `start` to `stop`, a day at
+        a time
+        """
+        days = self._days[start:stop]
+        bounds = np.flatnonzero(np.diff(days)) + 1
+        for first, last in zip(
+            np.concatenate([[0], bounds]) + start,
+            np.concatenate([bounds, [len(days)]]) + start,
+        ):
+            elo_update(
+                elo,
+                self._home[first:last],
+                self._away[first:last],
+                self._home_score[first:last],
+                self._away_score[first:last],
+                self._neutral[first:last],
+                self.elo_k,
+                self.elo_home,
+            )
+        return elo
+
+    def ratings_from(self, day, solution, elo, n_games) -> Ratings:
+        n_teams = len(self.teams)
+        played = np.bincount(
+            np.concatenate([self._home[:n_games], self._away[:n_games]]),
+            minlength=n_teams,
+        )
+        return Ratings(
+            as_of=day_start(day),
+            teams=self.teams,
+            games=played,
+            offense=solution[:n_teams],
+            defense=solution[n_teams : 2 * n_teams],
+            elo=elo.copy(),
+            mean=float(solution[-1]),
+            home_court=float(solution[-2]),
+            pace=float(self._pace[n_games - 1]) if n_games else DEFAULT_PACE,
+        )
+
+    def ratings(self, day, previous: Ratings = None) -> Ratings:
+        """
+        The ratings as of a day. `previous` (earlier ratings of the same
+        season) is the starting point: the solve starts from its solution
+        and Elo only plays the games since
+        """
+        n_games = self.games_before(day)
+        (x0, elo) = self.initial(previous)
+        start = 0 if previous is None else self.games_before(previous.as_of)
+        if start > n_games:
+            # Ratings from after the day, Elo has to start over
+            (_, elo) = self.initial()
+            start = 0
+        solution = self.solve(n_games, x0)
+        elo = self.play(elo, start, n_games)
+        return self.ratings_from(day, solution, elo, n_games)
+
+    def game_days(self) -> list:
+        """
+        Every day with games
+        """
+        return [pd.Timestamp(day) for day in np.unique(self._days)]
+
+    def each_day(self, days: list, start: Ratings = None):
+        """
+        Yield the ratings as of each of the days, in order, each solve
+        starting from the one before. `start` (earlier ratings, see
+        carry_over) seeds the solve and Elo
+        """
+        (solution, elo) = self.initial(start)
+        played = 0
+        for day in sorted(day_start(day) for day in days):
+            n_games = self.games_before(day)
+            solution = self.solve(n_games, solution) if n_games else solution
+            elo = self.play(elo, played, n_games)
+            played = n_games
+            yield self.ratings_from(day, solution, elo, n_games)
+
+    def history(self, days: list = None, start: Ratings = None) -> pd.DataFrame:
+        """
+        The ratings as of every day (every day with games and the day after
+        the last one by default)
+        """
+        if days is None:
+            days = self.game_days()
+            if days:
+                days.append(days[-1] + pd.Timedelta(days=1))
+        frames = [ratings.frame() for ratings in self.each_day(days, start)]
+        if not frames:
+            return pd.DataFrame(columns=RATING_COLUMNS)
+        return pd.concat(frames, ignore_index=True)
+
+
+_systems = {}
+_systems_lock = threading.Lock()
+
+
+def get_rating_system(year: int) -> RatingSystem:
+    """
+    Get the process wide rating system of a season. When its games or
+    team features have been written since, the rows of the new (or
+    changed) games are added to it, it's only built again for new teams
+    """
+    store = get_store()
+    version = (store.version("games", year), store.version("team_features", year))
+    with _systems_lock:
+        cached = _systems.get(int(year))
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+    games = rating_games(year)
+    system = None if cached is None else cached[1].extended(games)
+    if system is None:
+        system = RatingSystem(games)
+    with _systems_lock:
+        _systems[int(year)] = (version, system)
+    return system
+
+
+def saved_ratings(year: int, before=None) -> Ratings:
+    """
+    The latest saved ratings of a season (before a day), None when there
+    are none
+    """
+    filters = None if before is None else [("as_of", "<", day_key(before))]
+    saved = get_store().read("ratings", year, filters=filters)
+    if saved.empty:
+        return None
+    return Ratings.from_frame(saved.loc[saved["as_of"] == saved["as_of"].max()])
+
+
+def update_ratings(year: int, day: date = None) -> Ratings:
+    """
+    Rate every team as of a day (tomorrow by default, so today's games
+    count) starting from the latest saved ratings before it, and save them
+    """
+    day = day_start(day or pd.Timestamp.today() + pd.Timedelta(days=1))
+    system = get_rating_system(year)
+    previous = saved_ratings(year, before=day)
+    if previous is None:
+        previous = carry_over(saved_ratings(year - 1))
+    ratings = system.ratings(day, previous)
+    get_store().write("ratings", year, ratings.frame())
+    return ratings
+
+
+def build_rating_history(year: int) -> pd.DataFrame:
+    """
+    Rate every team as of every day of a season and save them all
+    """
+    history = get_rating_system(year).history(start=carry_over(saved_ratings(year - 1)))
+    if not history.empty:
+        get_store().write("ratings", year, history)
+    return history
+
+
+def load_ratings(year: int, day: date = None) -> Ratings:
+    """
+    The saved ratings of a season as of a day (the latest saved ratings on
+    or before it), the latest ones when no day is given
+    """
+    before = None if day is None else day_start(day) + pd.Timedelta(days=1)
+    return saved_ratings(year, before)
+
+
+def ratings_on(year: int, days: list) -> list:
+    """
+    The saved ratings of a season as of each of many days (None for days
+    before the first saved ones), reading the ratings table once
+    """
+    saved = load_cached_table("ratings", year)
+    if saved.empty:
+        return [None] * len(days)
+    positions = saved.groupby("as_of", observed=True).indices
+    as_of = np.array(sorted(positions))
+    found = np.searchsorted(as_of, [day_key(day) for day in days], "right") - 1
+
+    ratings = {}
+    for position in set(found[found >= 0]):
+        rows = saved.iloc[positions[as_of[position]]]
+        ratings[position] = Ratings.from_frame(rows)
+    return [ratings.get(position) for position in found]
@@ -0,0 +1,153 @@
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from mbp.data import load_cached_table
+from mbp.store import get_store
+
+# Season schedule index
+#
+# The games table of a season sorted once by team and date, with the
+# arrays needed to answer schedule questions by binary search: the next or
+# previous game of a team as of a day, and every game on a day. Lookups
+# for every team at once are a single searchsorted over a (team, time) key.
+
+DAY = pd.Timedelta(days=1)
+
+
+def day_start(day) -> pd.Timestamp:
+    return pd.Timestamp(day).normalize()
+
+
+class ScheduleIndex:
+    def __init__(self, games: pd.DataFrame) -> None:
+        games = games.loc[games["datetime"].notna()]
+        games = games.assign(team=games["team"].astype("string"))
+        games = games.sort_values(["team", "datetime"], kind="stable")
+        self.games = games.reset_index(drop=True)
+
+        (codes, team_names) = pd.factorize(self.games["team"], sort=True)
+        self.team_names = list(team_names)
+        self._codes = {name: code for code, name in enumerate(self.team_names)}
+        times = self.games["datetime"].to_numpy("datetime64[s]").astype(np.int64)
+        self._start = times.min() if len(times) else 0
+        # One sorted key per game: the team code, then the seconds into the
+        # season, so a single searchsorted finds positions for many teams
+        self._span = (times.max() - self._start + 1) if len(times) else 1
+        self._keys = codes * self._span + (times - self._start)
+        # First row of each team, plus the end
+        self._bounds = np.searchsorted(codes, np.arange(len(self.team_names) + 1))
+
+        # Every game by time
+        self._by_time = np.argsort(times, kind="stable")
+        self._times = (times - self._start)[self._by_time]
+
+    def __len__(self) -> int:
+        return len(self.games)
+
+    def _seconds(self, moment: pd.Timestamp) -> int:
+        return int(moment.value // 10**9) - self._start
+
+    def _search(self, code, moment: pd.Timestamp):
+        """
+        Positions of the first game of each team (code) at or after `moment`
+        """
+        # Clipped so a moment outside of the season stays in the team's keys
+        seconds = np.clip(self._seconds(moment), 0, self._span)
+        return np.searchsorted(self._keys, code * self._span + seconds)
+
+    def team_games(self, team_name: str) -> pd.DataFrame:
+        code = self._codes.get(team_name)
+        if code is None:
+            return self.games.iloc[0:0]
+        return self.games.iloc[self._bounds[code] : self._bounds[code + 1]]
+
+    def next_game(self, team_name: str, day: date) -> pd.Series:
+        """
+        The first game a team plays after `day`, None if there are none
+        """
+        code = self._codes.get(team_name)
+        if code is None:
+            return None
+        position = self._search(code, day_start(day) + DAY)
+        if position >= self._bounds[code + 1]:
+            return None
+        return self.games.iloc[int(position)]
+
+    def previous_game(self, team_name: str, day: date) -> pd.Series:
+        """
+        The last game a team played before `day`, None if there are none
+        """
+        code = self._codes.get(team_name)
+        if code is None:
+            return None
+        position = self._search(code, day_start(day)) - 1
+        if position < self._bounds[code]:
+            return None
+        return self.games.iloc[int(position)]
+
+    def next_games(self, day: date, teams: list = None) -> pd.DataFrame:
+        """
+        The next game after `day` of every team (or just `teams`) which has
+        one left, one row per team
+        """
+        return self._games_around(day_start(day) + DAY, teams, 0)
+
+    def previous_games(self, day: date, teams: list = None) -> pd.DataFrame:
+        """
+        The last game before `day` of every team (or just `teams`) which has
+        played one, one row per team
+        """
+        return self._games_around(day_start(day), teams, -1)
+
+    def _games_around(self, moment: pd.Timestamp, teams: list, shift: int):
+        if teams is None:
+            codes = np.arange(len(self.team_names))
+        else:
+            codes = np.array(
+                [self._codes[t] for t in teams if t in self._codes], dtype=np.int64
+            )
+        positions = self._search(codes, moment) + shift
+        found = (positions >= self._bounds[codes]) & (
+            positions < self._bounds[codes + 1]
+        )
+        return self.games.iloc[positions[found]].reset_index(drop=True)
+
+    def games_on(self, day: date, team_name: str = None) -> pd.DataFrame:
+        """
+        The games played on a day, by every team or just one
+        """
+        if team_name is not None:
+            code = self._codes.get(team_name)
+            if code is None:
+                return self.games.iloc[0:0]
+            low = self._search(code, day_start(day))
+            high = self._search(code, day_start(day) + DAY)
+            return self.games.iloc[low:high]
+
+        low = np.searchsorted(self._times, self._seconds(day_start(day)))
+        high = np.searchsorted(self._times, self._seconds(day_start(day) + DAY))
+        return self.games.iloc[np.sort(self._by_time[low:high])]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_schedule_index(year: int) -> ScheduleIndex:
+    """
+    Get the schedule index of a season, built again when the games table
+    has been written since
+    """
+    version = get_store().version("games", year)
+    with _indexes_lock:
+        cached = _indexes.get(int(year))
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+    index = ScheduleIndex(load_cached_table("games", year))
+    with _indexes_lock:
+        _indexes[int(year)] = (version, index)
+    return index
@@ -0,0 +1,416 @@
+import re
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# Typed table schemas
+#
+# Scraped tables come in as strings. Each stored table type declares the
+# dtype of its columns here, and values are parsed into them when the
+# table is written: small ints for counts, float32 for rates, categoricals
+# for repeated labels (teams, positions, class) and nullable ints so a
+# missing value stays missing instead of turning into a 0. Columns not
+# declared get the smallest type their values fit in.
+
+# Cell values which mean there is no value
+MISSING_VALUES = ["", "-", "--", "—", "nan", "NaN", "None", "<NA>"]
+
+
+class SchemaError(ValueError):
+    """
+    Raised when a value doesn't fit the type of its column
+    """
+
+
+@dataclass(frozen=True)
+class Column:
+    """
+    A column type. `parse` is how raw values are read: "number", "text",
+    "datetime", "height" ("6-3" to inches) or "minutes" ("32:30" to 32.5),
+    by default it follows the dtype
+    """
+
+    dtype: str
+    parse: str = None
+
+    @property
+    def parser(self) -> str:
+        if self.parse is not None:
+            return self.parse
+        if self.dtype in ("string", "category"):
+            return "text"
+        if self.dtype == "datetime64[ns]":
+            return "datetime"
+        return "number"
+
+
+# Columns of unknown type: the smallest type the values fit in
+AUTO = Column("auto")
+
+TEXT = Column("string")
+CATEGORY = Column("category")
+DATETIME = Column("datetime64[ns]")
+FLAG = Column("Int8")
+COUNT = Column("Int16")
+RATE = Column("float32")
+HEIGHT = Column("Int8", "height")
+MINUTES = Column("float32", "minutes")
+
+
+@dataclass(frozen=True)
+class Schema:
+    columns: dict
+    # (regex, Column) for columns not named in `columns`, checked in order
+    patterns: list = field(default_factory=list)
+    default: Column = AUTO
+    # Other cell values which mean there is no value in the table's number
+    # columns (like "DNP" in a box score)
+    placeholders: tuple = ()
+
+    def column(self, name: str) -> Column:
+        if name in self.columns:
+            return self.columns[name]
+        for pattern, column in self.patterns:
+            if re.search(pattern, name):
+                return column
+        return self.default
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Parse every column of a frame into its type
+        """
+        df = df.copy()
+        for name in df.columns:
+            column = self.column(name)
+            values = df[name]
+            if self.placeholders and column.parser != "text":
+                values = without_placeholders(values, self.placeholders)
+            df[name] = parse_column(values, column)
+        return df
+
+
+def as_text(values: pd.Series) -> pd.Series:
+    """
+    Values as stripped strings, with the missing markers as NA
+    """
+    text = values.astype("string").str.strip()
+    return text.mask(text.isin(MISSING_VALUES))
+
+
+def without_placeholders(values: pd.Series, placeholders: tuple) -> pd.Series:
+    """
+    Values with the placeholders (in any case) as NA
+    """
+    if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_datetime64_dtype(
+        values
+    ):
+        return values
+    text = values.astype("string").str.strip().str.upper()
+    return values.mask(text.isin([p.upper() for p in placeholders]))
+
+
+def parse_numbers(values: pd.Series, strict: bool = True) -> pd.Series:
+    """
+    Parse "1,234" like strings into numbers. Values which aren't numbers
+    raise a SchemaError (or come back as NaN when not `strict`)
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype("float64")
+
+    text = as_text(values).str.replace(",", "", regex=False)
+    numbers = pd.to_numeric(text, errors="coerce").astype("float64")
+    bad = numbers.isna() & text.notna()
+    if strict and bad.any():
+        examples = ", ".join(repr(v) for v in text[bad].unique()[:3])
+        raise SchemaError(f"{values.name}: not a number ({examples})")
+    return numbers
+
+
+def parse_height(values: pd.Series) -> pd.Series:
+    """
+    "6-3" to 75 inches, heights already in inches are kept
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype("float64")
+
+    text = as_text(values)
+    parts = text.str.extract(r"^(\d+)-(\d+)$").astype("float64")
+    inches = parts[0] * 12 + parts[1]
+    # A plain number is inches already, "0" means the height is unknown
+    plain = pd.to_numeric(text.where(inches.isna()), errors="coerce")
+    inches = inches.fillna(plain)
+    return inches.mask(inches == 0)
+
+
+def parse_minutes(values: pd.Series) -> pd.Series:
+    """
+    "32:30" (or "1,023:30") to 32.5 minutes, plain numbers are minutes
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype("float64")
+
+    text = as_text(values).str.replace(",", "", regex=False)
+    parts = text.str.extract(r"^(\d+):(\d+)$").astype("float64")
+    minutes = parts[0] + parts[1] / 60
+    plain = parse_numbers(text.where(minutes.isna()).rename(values.name))
+    return minutes.fillna(plain)
+
+
+def smallest_int_dtype(numbers: pd.Series) -> str:
+    low, high = numbers.min(), numbers.max()
+    for dtype in ["Int8", "Int16", "Int32"]:
+        info = np.iinfo(dtype.lower())
+        if pd.isna(low) or (info.min <= low and high <= info.max):
+            return dtype
+    return "Int64"
+
+
+def to_dtype(numbers: pd.Series, dtype: str, name: str) -> pd.Series:
+    """
+    Cast parsed numbers to a column's dtype, checking they fit
+    """
+    if dtype.lower().startswith(("int", "uint")):
+        present = numbers.dropna()
+        if not (present == present.round()).all():
+            raise SchemaError(f"{name}: fractional values in an integer column")
+        info = np.iinfo(dtype.lower())
+        if len(present) and (present.min() < info.min or present.max() > info.max):
+            raise SchemaError(
+                f"{name}: values from {present.min()} to {present.max()} "
+                f"don't fit in {dtype}"
+            )
+        if dtype[0] == "i" and present.size < numbers.size:
+            # Numpy ints can't hold missing values
+            raise SchemaError(f"{name}: missing values in a {dtype} column")
+    return numbers.astype(dtype)
+
+
+def parse_column(values: pd.Series, column: Column) -> pd.Series:
+    """
+    Parse the values of a column into the column's type. Scraped columns
+    repeat a handful of values, so text is parsed once per distinct value
+    """
+    if str(values.dtype) == column.dtype:
+        return values
+    if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_datetime64_dtype(
+        values
+    ):
+        return parse_values(values, column)
+
+    codes, uniques = pd.factorize(values)
+    parsed = parse_values(pd.Series(uniques, name=values.name), column)
+    # Missing values have code -1, which takes the NA appended at the end
+    missing = pd.Series([None], dtype=parsed.dtype)
+    parsed = pd.concat([parsed, missing], ignore_index=True)
+    codes[codes == -1] = len(uniques)
+    return pd.Series(parsed.take(codes).array, index=values.index, name=values.name)
+
+
+def parse_values(values: pd.Series, column: Column) -> pd.Series:
+    parser = column.parser
+    if column.dtype == "auto":
+        numbers = parse_numbers(values, strict=False)
+        if numbers.isna().sum() > as_text(values).isna().sum():
+            # Not every value is a number
+            return as_text(values)
+        if ((numbers == numbers.round()) | numbers.isna()).all():
+            return numbers.astype(smallest_int_dtype(numbers))
+        return numbers.astype("float32")
+
+    if parser == "text":
+        return as_text(values).astype(column.dtype)
+    if parser == "datetime":
+        return pd.to_datetime(values, format="mixed")
+    if parser == "height":
+        numbers = parse_height(values)
+    elif parser == "minutes":
+        numbers = parse_minutes(values)
+    else:
+        numbers = parse_numbers(values)
+    return to_dtype(numbers, column.dtype, values.name)
+
+
+# Shooting percentages and per game averages
+RATE_PATTERNS = [(r"%$", RATE), (r"^avg", RATE)]
+
+GAMES_SCHEMA = Schema(
+    {
+        "team": CATEGORY,
+        "opponent": CATEGORY,
+        "datetime": DATETIME,
+        "result": TEXT,
+        "attendance": Column("Int32"),
+        "contest_id": TEXT,
+        "win": FLAG,
+        "home": FLAG,
+        "neutral": FLAG,
+        "team_score": COUNT,
+        "opp_score": COUNT,
+    }
+)
+
+STATS_SCHEMA = Schema(
+    {
+        "team": CATEGORY,
+        # The jersey column of the stats pages, "00" isn't "0"
+        "#": TEXT,
+        "jersey": TEXT,
+        "player": TEXT,
+        "yr": CATEGORY,
+        "year": FLAG,
+        "pos": CATEGORY,
+        "ht": HEIGHT,
+        "mp": MINUTES,
+        "min": MINUTES,
+    },
+    RATE_PATTERNS,
+    COUNT,
+)
+
+ROSTER_SCHEMA = Schema(
+    {
+        "team": CATEGORY,
+        "jersey": TEXT,
+        "player": TEXT,
+        "position": CATEGORY,
+        "year": CATEGORY,
+        "height": HEIGHT,
+        "height_ft": FLAG,
+        "height_in": FLAG,
+        "games_played": COUNT,
+        "games_scored": COUNT,
+    }
+)
+
+# Box score cells of players who didn't play
+BOX_SCORE_PLACEHOLDERS = ("DNP", "DNP-CD", "DND", "NWT")
+
+# A box score line repeats its contest id and player name all season
+BOX_SCORE_SCHEMA = Schema(
+    {
+        "contest_id": CATEGORY,
+        "team": CATEGORY,
+        "#": TEXT,
+        "player": CATEGORY,
+        "pos": CATEGORY,
+        "mp": MINUTES,
+        "min": MINUTES,
+    },
+    RATE_PATTERNS,
+    COUNT,
+    BOX_SCORE_PLACEHOLDERS,
+)
+
+CONTESTS_SCHEMA = Schema(
+    {
+        "contest_id": TEXT,
+        "date": TEXT,
+        "team": CATEGORY,
+        "opponent": CATEGORY,
+        "home": FLAG,
+        "neutral": FLAG,
+        "box_score_url": TEXT,
+        "team_id": TEXT,
+        "opponent_id": TEXT,
+        "team_score": COUNT,
+        "opp_score": COUNT,
+    }
+)
+
+# Player lines of box scores, joined to the rosters (mbp/player_log.py)
+PLAYER_GAMES_SCHEMA = Schema(
+    {
+        "contest_id": CATEGORY,
+        "datetime": DATETIME,
+        "team": CATEGORY,
+        "player": TEXT,
+        "player_key": TEXT,
+        "minutes": RATE,
+        "starter": FLAG,
+        "played": FLAG,
+        "on_roster": FLAG,
+        "jersey": TEXT,
+        "position": CATEGORY,
+        "year": CATEGORY,
+        "height_ft": FLAG,
+        "height_in": FLAG,
+    },
+    default=COUNT,
+)
+
+# A hash of each saved (or logged) box score, to log corrected box scores
+# again
+BOX_SCORE_HASHES_SCHEMA = Schema(
+    {
+        "contest_id": TEXT,
+        "box_score_hash": TEXT,
+    }
+)
+
+# Season and recent sums per player
+PLAYER_TOTALS_SCHEMA = Schema(
+    {
+        "team": CATEGORY,
+        "player_key": TEXT,
+        "player": TEXT,
+        "last_datetime": DATETIME,
+    },
+    [(r"minutes$", RATE)],
+    COUNT,
+)
+
+# Team game metrics and the features going into each game (mbp/features.py)
+TEAM_FEATURES_SCHEMA = Schema(
+    {
+        "team": CATEGORY,
+        "opponent": CATEGORY,
+        "contest_id": TEXT,
+        "datetime": DATETIME,
+        "home": FLAG,
+        "rest_days": COUNT,
+        "games_before": COUNT,
+        "home_games_before": COUNT,
+    },
+    default=RATE,
+)
+
+# Team ratings as of each day (mbp/ratings.py)
+RATINGS_SCHEMA = Schema(
+    {
+        "as_of": TEXT,
+        "team": CATEGORY,
+        "games": COUNT,
+    },
+    default=RATE,
+)
+
+TEAMS_SCHEMA = Schema(
+    {
+        "team_name": TEXT,
+        "team_id": TEXT,
+        "academic_year": COUNT,
+    }
+)
+
+SCHEMAS = {
+    "games": GAMES_SCHEMA,
+    "stats": STATS_SCHEMA,
+    "roster": ROSTER_SCHEMA,
+    "box_scores": BOX_SCORE_SCHEMA,
+    "contests": CONTESTS_SCHEMA,
+    "player_games": PLAYER_GAMES_SCHEMA,
+    "box_score_hashes": BOX_SCORE_HASHES_SCHEMA,
+    "logged_box_scores": BOX_SCORE_HASHES_SCHEMA,
+    "player_totals": PLAYER_TOTALS_SCHEMA,
+    "team_features": TEAM_FEATURES_SCHEMA,
+    "ratings": RATINGS_SCHEMA,
+    "teams": TEAMS_SCHEMA,
+}
+
+
+def apply_schema(table: str, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parse a table into the types of its schema
+    """
+    return SCHEMAS[table].apply(df)
@@ -0,0 +1,145 @@
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from mbp.cache import CachingFetcher
+from mbp.constants import DAYS
+from mbp.data import save_season_contests
+from mbp.fetchers import (
+    FallbackFetcher,
+    Fetcher,
+    HttpFetcher,
+    RateLimitedFetcher,
+    RateLimiter,
+)
+from mbp.harvest import harvest_box_scores
+from mbp.teams import TeamRegistry, get_team_registry
+from mbp.transform import canonical_names
+from mbp.utils import get_season_for_date, is_in_season
+from mbp.webscraping import get_scoreboard
+
+# Daily scoreboard ingestion
+#
+# One scoreboard page lists every game of the day, so finding the results
+# of a date range costs one page per day instead of one page per team.
+# Finished contests go into each season's contest table and their box
+# scores are fetched with the harvester.
+
+
+def scoreboard_days(start: date, end: date) -> list:
+    """
+    Every in-season day from start to end (inclusive)
+    """
+    days = []
+    day = start
+    while day <= end:
+        if is_in_season(day):
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def scoreboard_contests_to_season_rows(
+    contests: pd.DataFrame, teams: TeamRegistry = None
+) -> pd.DataFrame:
+    """
+    Turn scoreboard rows into contest table rows, seen from the home team
+    (the second team listed, not at home on a neutral site)
+    """
+    teams = teams or get_team_registry()
+    neutral = contests["neutral"].fillna(False).astype(bool)
+    return pd.DataFrame(
+        {
+            "date": contests["date"].dt.strftime("%m/%d/%Y"),
+            "team": canonical_names(contests["home_team"].astype("string"), teams),
+            "opponent": canonical_names(contests["away_team"].astype("string"), teams),
+            "home": (~neutral).astype(int),
+            "neutral": neutral.astype(int),
+            "contest_id": contests["contest_id"],
+            "box_score_url": contests["box_score_url"],
+            "team_id": contests["home_team_id"],
+            "opponent_id": contests["away_team_id"],
+            "team_score": contests["home_score"],
+            "opp_score": contests["away_score"],
+        }
+    )
+
+
+def get_finished_contests(
+    start: date, end: date, fetcher: Fetcher, workers: int = 4
+) -> pd.DataFrame:
+    """
+    Get every finished contest from start to end, one scoreboard per day
+    """
+    days = scoreboard_days(start, end)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        frames = list(executor.map(lambda day: get_scoreboard(fetcher, day), days))
+
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=["date", "contest_id", "final"])
+
+    contests = pd.concat(frames, ignore_index=True)
+    contests = contests[contests["final"]]
+    return contests.drop_duplicates(subset=["contest_id"]).reset_index(drop=True)
+
+
+def ingest_scoreboards(
+    start: date = None,
+    end: date = None,
+    box_scores: bool = True,
+    workers: int = 4,
+    rate: float = 4.0,
+    fetcher: Fetcher = None,
+) -> pd.DataFrame:
+    """
+    Ingest the finished contests from start to end (the last DAYS days by
+    default) into the season contest tables, and download their box scores
+    """
+    end = end or date.today()
+    start = start or end - timedelta(days=DAYS)
+
+    owns_fetcher = fetcher is None
+    if owns_fetcher:
+        fetcher = FallbackFetcher(primary=HttpFetcher(pool_size=workers))
+    limited = RateLimitedFetcher(fetcher, RateLimiter(rate, burst=workers))
+    # Scoreboards of the current season expire quickly, older ones never do
+    cached = CachingFetcher(limited, season=get_season_for_date(end))
+
+    contests = get_finished_contests(start, end, cached, workers)
+    print(f"Found {len(contests)} finished contests from {start} to {end}")
+
+    if not contests.empty:
+        contests["season"] = [get_season_for_date(d) for d in contests["date"]]
+        for season, season_contests in contests.groupby("season"):
+            rows = scoreboard_contests_to_season_rows(season_contests)
+            save_season_contests(season, rows)
+            if box_scores:
+                harvest_box_scores(season, rows, cached, workers)
+
+    if owns_fetcher:
+        fetcher.close()
+
+    return contests
+
+
+def parse_date(s: str) -> date:
+    return datetime.strptime(s, "%Y-%m-%d").date()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest daily scoreboards")
+    parser.add_argument("--from", dest="start", type=parse_date, help="YYYY-MM-DD")
+    parser.add_argument("--to", dest="end", type=parse_date, help="YYYY-MM-DD")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=4.0, help="requests per second")
+    parser.add_argument("--no-box-scores", dest="box_scores", action="store_false")
+    args = parser.parse_args()
+
+    ingest_scoreboards(args.start, args.end, args.box_scores, args.workers, args.rate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,475 @@
+import os
+import sqlite3
+import threading
+from datetime import date, datetime
+from pathlib import Path
+
+import pandas as pd
+
+from mbp.files import atomic_path, file_lock
+from mbp.paths import STORE_DIR
+from mbp.schema import apply_schema
+
+# Columnar season store
+#
+# Every table (games, stats, roster, box_scores, box_score_hashes,
+# contests, player_games, logged_box_scores, player_totals, team_features,
+# ratings) is kept as parquet files per season:
+# store/{table}/season={year}/part-{n}.parquet.
+# A write adds a part with its rows, rows of earlier parts with the same
+# keys (team, contest id or day) are replaced by it and are dropped when
+# the parts are read. So a write costs the rows it writes, not the whole
+# season. After a write the newest part is merged into the one before it
+# while it's at least as big, like carrying in a binary counter, so a
+# season stays a handful of parts and each row is rewritten O(log n)
+# times. `compact` merges every part into one.
+#
+# Rows are sorted by their key so reads filtering on it only touch the
+# row groups they need, and only the requested columns are read off disk.
+# Columns are stored in the types of their table's schema
+# (mbp/schema.py). Writers in other processes wait on a lock file next to
+# the parts (mbp/files.py).
+#
+# With MBP_STORE=sqlite the same tables are kept in one sqlite database
+# instead (WAL mode, indexed), for many concurrent writers and point
+# lookups.
+
+# The column identifying which rows a write replaces
+TABLE_KEYS = {
+    "games": "team",
+    "stats": "team",
+    "roster": "team",
+    "box_scores": "contest_id",
+    "contests": "contest_id",
+    "player_games": "contest_id",
+    "box_score_hashes": "contest_id",
+    "logged_box_scores": "contest_id",
+    "player_totals": "team",
+    "team_features": "team",
+    "ratings": "as_of",
+    "teams": "team_name",
+}
+
+ROW_GROUP_SIZE = 4096
+
+
+class SeasonStore:
+    def __init__(self, root: Path = STORE_DIR) -> None:
+        self.root = Path(root)
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def path(self, table: str, year: int) -> Path:
+        """
+        The directory of a season table's parts
+        """
+        return self.root / table / f"season={year}"
+
+    def parts(self, table: str, year: int) -> list:
+        """
+        The parts of a season table, oldest first
+        """
+        return sorted(self.path(table, year).glob("part-*.parquet"))
+
+    def _lock(self, table: str, year: int) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault((table, int(year)), threading.Lock())
+
+    def version(self, table: str, year: int) -> int:
+        """
+        Changes whenever the table is written, 0 when it doesn't exist
+        """
+        versions = []
+        for part in self.parts(table, year):
+            try:
+                versions.append(part.stat().st_mtime_ns)
+            except FileNotFoundError:
+                # Merged away since it was listed
+                continue
+        return max(versions, default=0)
+
+    def read(
+        self,
+        table: str,
+        year: int,
+        columns: list = None,
+        filters: list = None,
+    ) -> pd.DataFrame:
+        """
+        Read a season table. Only `columns` are read and `filters` (pyarrow
+        filters, eg. [("team", "==", "Arizona")]) are applied while reading
+        """
+        while True:
+            try:
+                return self._read_parts(
+                    self.parts(table, year), table, columns, filters
+                )
+            except FileNotFoundError:
+                # A writer merged parts while they were read, read the new ones
+                continue
+
+    def _read_parts(
+        self, parts: list, table: str, columns: list = None, filters: list = None
+    ) -> pd.DataFrame:
+        import pyarrow.parquet as pq
+
+        if not parts:
+            return pd.DataFrame(columns=columns or [])
+        if len(parts) == 1:
+            return pq.read_table(parts[0], columns=columns, filters=filters).to_pandas()
+
+        key = TABLE_KEYS[table]
+        read_columns = columns if columns is None or key in columns else columns + [key]
+        frames = []
+        replaced = set()
+        # Newest first, each part's keys replace the rows of the parts before
+        for part in reversed(parts):
+            df = pq.read_table(part, columns=read_columns, filters=filters).to_pandas()
+            frames.append(df.loc[~df[key].isin(replaced)])
+            replaced.update(pq.read_table(part, columns=[key])[key].to_pylist())
+
+        frames = [frame for frame in frames[::-1] if not frame.empty] or frames[:1]
+        df = pd.concat(frames, ignore_index=True)
+        # The parts can have different categories or int sizes
+        df = apply_schema(table, df.sort_values(key, kind="stable"))
+        return df[columns or df.columns].reset_index(drop=True)
+
+    def has(self, table: str, year: int, value: str) -> bool:
+        """
+        Check if the table has rows for a key (team name or contest id)
+        """
+        key = TABLE_KEYS[table]
+        df = self.read(table, year, columns=[key], filters=[(key, "==", str(value))])
+        return not df.empty
+
+    def keys(self, table: str, year: int) -> set:
+        """
+        All the keys (team names or contest ids) stored in the table
+        """
+        key = TABLE_KEYS[table]
+        return set(self.read(table, year, columns=[key])[key])
+
+    def write(self, table: str, year: int, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Write rows to a season table, replacing the stored rows with the
+        same keys
+        """
+        import pyarrow.parquet as pq
+
+        key = TABLE_KEYS[table]
+        df = apply_schema(table, df.astype({key: str}).sort_values(key, kind="stable"))
+        df = df.reset_index(drop=True)
+        path = self.path(table, year)
+
+        # Other processes writing the same table wait for the lock file
+        with self._lock(table, year), file_lock(path / ".lock"):
+            parts = self.parts(table, year)
+            number = int(parts[-1].stem.split("-")[1]) + 1 if parts else 1
+            parts.append(path / f"part-{number:06d}.parquet")
+            self._write_file(parts[-1], df)
+
+            rows = [pq.read_metadata(part).num_rows for part in parts]
+            merged = 1
+            while merged < len(parts) and rows[-merged] >= rows[-merged - 1]:
+                rows[-merged - 1] += rows[-merged]
+                merged += 1
+            if merged > 1:
+                self._merge(table, parts[-merged:])
+        return df
+
+    def compact(self, table: str, year: int):
+        """
+        Merge every part of a season table into one
+        """
+        with self._lock(table, year), file_lock(self.path(table, year) / ".lock"):
+            parts = self.parts(table, year)
+            if len(parts) > 1:
+                self._merge(table, parts)
+
+    def _merge(self, table: str, parts: list):
+        """
+        Replace parts by one part with their rows, taking the place of the
+        newest. Until the older parts are removed their rows are replaced
+        by it, so readers see the same rows throughout
+        """
+        df = self._read_parts(parts, table)
+        self._write_file(parts[-1], df)
+        for part in parts[:-1]:
+            part.unlink()
+
+    def _write_file(self, path: Path, df: pd.DataFrame):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        with atomic_path(path, suffix=".parquet") as tmp:
+            pq.write_table(
+                pa.Table.from_pandas(df, preserve_index=False),
+                tmp,
+                row_group_size=ROW_GROUP_SIZE,
+                compression="zstd",
+            )
+
+
+# Indexes of the sqlite tables, created once their columns exist
+SQLITE_INDEXES = {
+    "games": [("season", "team"), ("season", "datetime"), ("contest_id",)],
+    "stats": [("season", "team")],
+    "roster": [("season", "team")],
+    "box_scores": [("season", "contest_id"), ("contest_id",), ("team",)],
+    "contests": [("season", "contest_id"), ("season", "date"), ("contest_id",)],
+    "player_games": [("season", "contest_id"), ("season", "team", "player_key")],
+    "box_score_hashes": [("season", "contest_id")],
+    "logged_box_scores": [("season", "contest_id")],
+    "player_totals": [("season", "team")],
+    "team_features": [("season", "team"), ("season", "datetime")],
+    "ratings": [("season", "as_of"), ("season", "team")],
+    "teams": [("season", "team_name"), ("team_id",)],
+}
+
+SQL_OPERATORS = {"==": "=", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+# Max number of variables in one sqlite statement
+SQLITE_MAX_VARIABLES = 900
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def quote(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def sql_value(value):
+    """
+    Convert a value to what sqlite stores for it
+    """
+    if value is None or value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return pd.Timestamp(value).strftime(DATETIME_FORMAT)
+    if isinstance(value, float) and value != value:
+        return None
+    if hasattr(value, "item"):
+        # numpy scalars
+        return value.item()
+    return value
+
+
+def sql_type(dtype) -> str:
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+class SqliteStore:
+    """
+    The season tables in one sqlite database, for many concurrent
+    writers (threads or processes). Same interface as SeasonStore, every
+    table has a season column and indexes on the columns it's queried by
+    """
+
+    def __init__(self, path: Path = STORE_DIR / "mbp.sqlite3") -> None:
+        self.path = Path(path)
+        self._local = threading.local()
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        The connection of the current thread
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS versions "
+                "(name TEXT, season INTEGER, version INTEGER, "
+                "PRIMARY KEY (name, season))"
+            )
+            self._local.conn = conn
+        return conn
+
+    def columns(self, table: str) -> list:
+        rows = self.connection().execute(f"PRAGMA table_info({quote(table)})")
+        return [row[1] for row in rows]
+
+    def version(self, table: str, year: int) -> int:
+        row = (
+            self.connection()
+            .execute(
+                "SELECT version FROM versions WHERE name = ? AND season = ?",
+                (table, int(year)),
+            )
+            .fetchone()
+        )
+        return row[0] if row else 0
+
+    def _where(self, year: int, filters: list) -> (str, list):
+        clauses = ["season = ?"]
+        values = [int(year)]
+        for column, op, value in filters or []:
+            if op == "in":
+                value = list(value)
+                clauses.append(f"{quote(column)} IN ({', '.join('?' * len(value))})")
+                values += [sql_value(v) for v in value]
+            else:
+                clauses.append(f"{quote(column)} {SQL_OPERATORS[op]} ?")
+                values.append(sql_value(value))
+        return " AND ".join(clauses), values
+
+    def read(
+        self,
+        table: str,
+        year: int,
+        columns: list = None,
+        filters: list = None,
+    ) -> pd.DataFrame:
+        existing = self.columns(table)
+        if not existing:
+            return pd.DataFrame(columns=columns or [])
+
+        selected = columns or [c for c in existing if c != "season"]
+        where, values = self._where(year, filters)
+        # Sorted by key like the parquet store
+        order = quote(TABLE_KEYS[table])
+        df = pd.read_sql_query(
+            f"SELECT {', '.join(map(quote, selected))} FROM {quote(table)} "
+            f"WHERE {where} ORDER BY {order}, rowid",
+            self.connection(),
+            params=values,
+        )
+
+        # sqlite only knows text and numbers
+        return apply_schema(table, df)
+
+    def has(self, table: str, year: int, value: str) -> bool:
+        key = TABLE_KEYS[table]
+        if not self.columns(table):
+            return False
+        row = (
+            self.connection()
+            .execute(
+                f"SELECT 1 FROM {quote(table)} WHERE season = ? AND {quote(key)} = ? "
+                "LIMIT 1",
+                (int(year), str(value)),
+            )
+            .fetchone()
+        )
+        return row is not None
+
+    def keys(self, table: str, year: int) -> set:
+        key = TABLE_KEYS[table]
+        if not self.columns(table):
+            return set()
+        rows = self.connection().execute(
+            f"SELECT DISTINCT {quote(key)} FROM {quote(table)} WHERE season = ?",
+            (int(year),),
+        )
+        return {row[0] for row in rows}
+
+    def _ensure_table(self, table: str, df: pd.DataFrame):
+        conn = self.connection()
+        existing = self.columns(table)
+        if not existing:
+            definitions = ["season INTEGER"] + [
+                f"{quote(col)} {sql_type(df[col].dtype)}" for col in df.columns
+            ]
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {quote(table)} ({', '.join(definitions)})"
+            )
+        else:
+            for col in df.columns:
+                if col not in existing:
+                    conn.execute(
+                        f"ALTER TABLE {quote(table)} ADD COLUMN "
+                        f"{quote(col)} {sql_type(df[col].dtype)}"
+                    )
+
+        columns = set(self.columns(table))
+        for index in SQLITE_INDEXES.get(table, []):
+            if set(index) <= columns:
+                name = quote(f"ix_{table}_{'_'.join(index)}")
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {name} ON {quote(table)} "
+                    f"({', '.join(map(quote, index))})"
+                )
+
+    def write(self, table: str, year: int, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Write rows to a season table, replacing the stored rows with the
+        same keys, in one transaction
+        """
+        key = TABLE_KEYS[table]
+        df = apply_schema(table, df.astype({key: str})).reset_index(drop=True)
+        for col in df.columns:
+            if pd.api.types.is_datetime64_any_dtype(df[col]):
+                df[col] = df[col].dt.strftime(DATETIME_FORMAT)
+
+        rows = [
+            [int(year)] + [sql_value(v) for v in row]
+            for row in df.itertuples(index=False, name=None)
+        ]
+        insert = (
+            f"INSERT INTO {quote(table)} "
+            f"(season, {', '.join(map(quote, df.columns))}) "
+            f"VALUES ({', '.join('?' * (len(df.columns) + 1))})"
+        )
+        keys = list(df[key].unique())
+
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._ensure_table(table, df)
+            for i in range(0, len(keys), SQLITE_MAX_VARIABLES):
+                chunk = keys[i : i + SQLITE_MAX_VARIABLES]
+                conn.execute(
+                    f"DELETE FROM {quote(table)} WHERE season = ? AND "
+                    f"{quote(key)} IN ({', '.join('?' * len(chunk))})",
+                    [int(year)] + chunk,
+                )
+            conn.executemany(insert, rows)
+            conn.execute(
+                "INSERT INTO versions VALUES (?, ?, 1) ON CONFLICT (name, season) "
+                "DO UPDATE SET version = version + 1",
+                (table, int(year)),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return df
+
+    def compact(self, table: str, year: int):
+        """
+        Nothing to merge, sqlite replaces rows in place
+        """
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+STORES = {
+    "parquet": SeasonStore,
+    "sqlite": SqliteStore,
+}
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store(backend: str = None):
+    """
+    Get the process wide season store. The backend ("parquet" or
+    "sqlite") comes from MBP_STORE when not given
+    """
+    global _store
+    backend = backend or os.environ.get("MBP_STORE", "parquet")
+    with _store_lock:
+        if _store is None or not isinstance(_store, STORES[backend]):
+            _store = STORES[backend]()
+    return _store
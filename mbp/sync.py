@@ -0,0 +1,185 @@
+import argparse
+import hashlib
+import json
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from mbp.crawler import get_d1_team_names
+from mbp.data import (
+    download_box_score,
+    download_roster_data,
+    has_box_score,
+    has_team_table,
+    save_team_table,
+)
+from mbp.features import update_team_features
+from mbp.fetchers import Fetcher, get_fetcher
+from mbp.files import write_atomic
+from mbp.paths import team_save_dir
+from mbp.player_log import update_player_log
+from mbp.ratings import update_ratings
+from mbp.teams import TeamRegistry, get_team_registry
+
+# Incremental mid-season sync
+#
+# Each team directory keeps a manifest.json with when the team was last
+# synced, the contest ids we already have box scores for and a hash of
+# every saved table. A sync fetches the schedule, downloads only the box
+# scores of newly finished games, refreshes the season stats only when
+# new games came in and only rewrites tables whose contents changed.
+#
+# The player log, team features and ratings cover the whole league, so
+# they are brought up to date once after a batch of teams is synced, not
+# after each team.
+
+
+def manifest_file(team_name: str, year: int) -> Path:
+    return team_save_dir(team_name, year) / "manifest.json"
+
+
+def load_manifest(team_name: str, year: int) -> dict:
+    path = manifest_file(team_name, year)
+    if not path.exists():
+        return {"last_synced": None, "contest_ids": [], "hashes": {}}
+    return json.loads(path.read_text())
+
+
+def save_manifest(team_name: str, year: int, manifest: dict):
+    write_atomic(
+        manifest_file(team_name, year), json.dumps(manifest, indent=2).encode()
+    )
+
+
+def frame_hash(df: pd.DataFrame) -> str:
+    return hashlib.sha256(df.to_csv().encode()).hexdigest()
+
+
+def write_if_changed(
+    df: pd.DataFrame, table: str, team_name: str, year: int, manifest: dict
+) -> bool:
+    """
+    Save a team table unless it's the same as what we saved last time
+    """
+    digest = frame_hash(df)
+    if manifest["hashes"].get(table) == digest and has_team_table(
+        table, team_name, year
+    ):
+        return False
+    save_team_table(table, team_name, year, df)
+    manifest["hashes"][table] = digest
+    return True
+
+
+def completed_contest_ids(games_df: pd.DataFrame) -> list:
+    """
+    Contest ids of the games that have a final result
+    """
+    if "contest_id" not in games_df.columns:
+        return []
+    played = games_df[games_df["result"].notna() & games_df["contest_id"].notna()]
+    return [str(int(c)) for c in played["contest_id"]]
+
+
+def sync_team(team_name: str, year: int, fetcher: Fetcher = None) -> dict:
+    """
+    Bring a team's saved season up to date, fetching only what changed.
+    Returns a summary of what was updated. The league wide tables are
+    left to update_season_tables (sync_teams calls it)
+    """
+    from mbp.webscraping import get_team_games_for_year, get_team_stats
+
+    owns_fetcher = fetcher is None
+    fetcher = fetcher or get_fetcher(season=year)
+
+    teams = get_team_registry()
+    manifest = load_manifest(team_name, year)
+
+    # The schedule is one page and tells us which games are new
+    games_df = get_team_games_for_year(fetcher, teams, team_name, year)
+    games_changed = write_if_changed(games_df, "games", team_name, year, manifest)
+
+    known = set(manifest["contest_ids"])
+    new_contest_ids = [c for c in completed_contest_ids(games_df) if c not in known]
+    for contest_id in new_contest_ids:
+        # The opponent may have synced this game already
+        if not has_box_score(year, contest_id):
+            download_box_score(contest_id, year, fetcher=fetcher)
+        known.add(contest_id)
+
+    # Season totals only move when games are played
+    stats_changed = False
+    if new_contest_ids or not has_team_table("stats", team_name, year):
+        stats_df = get_team_stats(fetcher, teams, team_name, year)
+        stats_changed = write_if_changed(stats_df, "stats", team_name, year, manifest)
+
+    if not has_team_table("roster", team_name, year):
+        download_roster_data(team_name, year, fetcher=fetcher)
+
+    manifest["contest_ids"] = sorted(known)
+    manifest["last_synced"] = datetime.now().isoformat()
+    save_manifest(team_name, year, manifest)
+
+    if owns_fetcher:
+        fetcher.close()
+
+    return {
+        "team": team_name,
+        "new_games": new_contest_ids,
+        "games_changed": games_changed,
+        "stats_changed": stats_changed,
+    }
+
+
+def update_season_tables(year: int, teams: TeamRegistry = None, rebuild: bool = False):
+    """
+    Bring the league wide tables (player log, team features and ratings)
+    up to date with the saved box scores, or build the player log and
+    features again from every box score when `rebuild`
+    """
+    teams = teams or get_team_registry()
+    update_player_log(year, teams, rebuild=rebuild)
+    update_team_features(year, teams, rebuild=rebuild)
+    update_ratings(year)
+
+
+def sync_teams(team_names: list, year: int, fetcher: Fetcher = None) -> list:
+    """
+    Sync a batch of teams, then update the league wide tables once if any
+    of them had new games. Returns the summary of each team
+    """
+    owns_fetcher = fetcher is None
+    fetcher = fetcher or get_fetcher(season=year)
+
+    summaries = []
+    for team_name in team_names:
+        try:
+            summaries.append(sync_team(team_name, year, fetcher))
+        except Exception as e:
+            print(f"Failed to sync {team_name}: {e}")
+            summaries.append({"team": team_name, "error": str(e)})
+
+    if any(summary.get("new_games") for summary in summaries):
+        update_season_tables(year)
+
+    if owns_fetcher:
+        fetcher.close()
+    return summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync the new games of a season")
+    parser.add_argument(
+        "year", type=int, help="season start year, eg. 2022 for 2022-23"
+    )
+    parser.add_argument("--team", action="append", dest="teams")
+    args = parser.parse_args()
+
+    teams = args.teams or get_d1_team_names()
+    for summary in sync_teams(teams, args.year):
+        print(summary)
+
+
+if __name__ == "__main__":
+    main()
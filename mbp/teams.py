@@ -0,0 +1,249 @@
+import json
+import re
+import threading
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from pathlib import Path
+
+import pandas as pd
+
+from mbp.files import atomic_path
+from mbp.paths import TEAM_ALIASES_FILE, TEAM_NAMES_TO_ID_FILE
+
+# Team registry
+#
+# The team name to id table loaded once per process, with dict lookups by
+# id, canonical name (the spelling of the team list) and known aliases.
+# Names are normalized first (case, punctuation, "State" to "St", "Saint"
+# to "St", a few common abbreviations). Names nobody has seen yet are
+# matched against a trigram index of the canonical names, and the
+# spellings matched that way are remembered as aliases (saved next to the
+# team table) so they are only matched once.
+
+# How similar an unknown name has to be to a team to be matched
+FUZZY_CUTOFF = 0.85
+# How far ahead of the runner up the best match has to be
+FUZZY_MARGIN = 0.05
+# How many trigram candidates get a full similarity check
+FUZZY_CANDIDATES = 10
+
+
+# Spellings of words in team names, by their form in lookups
+WORD_FORMS = [
+    (r"\bstate\b", "st"),
+    (r"\bsaint\b", "st"),
+    (r"\ba and m\b", "am"),
+]
+
+# Other names of teams, normalized, by the normalized name of the team list
+ABBREVIATIONS = {
+    "north carolina st": "nc st",
+    "connecticut": "uconn",
+    "miami florida": "miami fl",
+    "miami fla": "miami fl",
+    "miami ohio": "miami oh",
+}
+
+
+def normalize_name(name: str) -> str:
+    """
+    The form of a team name used for lookups, so "Saint Mary's (CA)",
+    "st marys ca" and "St. Mary's CA" are the same team, as are "Iowa
+    State" and "Iowa St."
+    """
+    name = str(name).casefold().replace("&", " and ")
+    name = re.sub(r"^#\d+\s*", "", name.strip())
+    name = re.sub(r"[.'`]", "", name)
+    name = " ".join(re.sub(r"[()\-,]", " ", name).split())
+    for pattern, form in WORD_FORMS:
+        name = re.sub(pattern, form, name)
+    return ABBREVIATIONS.get(name, name)
+
+
+def unqualified_name(name: str) -> str:
+    """
+    The normalized name of a team without the state in parentheses after
+    it ("Saint Mary's (CA)" to "st marys"), None when it has none
+    """
+    match = re.match(r"^(.*\S)\s*\([^)]*\)$", str(name).strip())
+    return normalize_name(match.group(1)) if match else None
+
+
+def trigrams(name: str) -> set:
+    padded = f"  {name} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class TeamRegistry:
+    def __init__(
+        self,
+        teams: pd.DataFrame,
+        aliases: dict = None,
+        aliases_file: Path = None,
+    ) -> None:
+        self.aliases_file = aliases_file
+        self._lock = threading.Lock()
+
+        self.ids = {}
+        self.names_by_id = {}
+        for name, team_id in zip(teams["team_name"], teams["team_id"]):
+            self.ids[name] = str(team_id)
+            self.names_by_id.setdefault(str(team_id), name)
+
+        # Normalized canonical names and aliases to canonical names
+        self._lookup = {normalize_name(name): name for name in self.ids}
+        # Names are looked up without their state when no other team has
+        # the same name (Saint Mary's, but not Miami)
+        unqualified = Counter(unqualified_name(name) for name in self.ids)
+        for name in self.ids:
+            short = unqualified_name(name)
+            if short is not None and unqualified[short] == 1:
+                self._lookup.setdefault(short, name)
+        self.aliases = {}
+        # Names the fuzzy index couldn't match either
+        self._unknown = set()
+        for alias, name in (aliases or {}).items():
+            self._add_alias(alias, name)
+
+        self._trigrams = defaultdict(set)
+        for normalized in self._lookup:
+            for gram in trigrams(normalized):
+                self._trigrams[gram].add(normalized)
+
+    @classmethod
+    def load(
+        cls,
+        teams_file: Path = TEAM_NAMES_TO_ID_FILE,
+        aliases_file: Path = TEAM_ALIASES_FILE,
+    ) -> "TeamRegistry":
+        teams = pd.read_csv(teams_file, index_col=0, dtype={"team_id": str})
+        aliases = {}
+        if Path(aliases_file).exists():
+            aliases = json.loads(Path(aliases_file).read_text())
+        return cls(teams, aliases, aliases_file)
+
+    def names(self) -> list:
+        """
+        Every canonical team name
+        """
+        return list(self.ids)
+
+    def __contains__(self, name: str) -> bool:
+        return self.find(name, fuzzy=False) is not None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _add_alias(self, alias: str, name: str):
+        if name not in self.ids:
+            return
+        self.aliases[alias] = name
+        self._lookup.setdefault(normalize_name(alias), name)
+
+    def find(self, name: str, fuzzy: bool = True) -> str:
+        """
+        Get the canonical name of a team, or None when it's unknown
+        """
+        if name in self.ids:
+            return name
+        canonical = self.aliases.get(name) or self._lookup.get(normalize_name(name))
+        if canonical is not None or not fuzzy:
+            return canonical
+
+        if name in self._unknown:
+            return None
+        canonical = self._fuzzy_match(normalize_name(name))
+        if canonical is not None:
+            self.learn_alias(name, canonical)
+        else:
+            self._unknown.add(name)
+        return canonical
+
+    def _fuzzy_match(self, normalized: str) -> str:
+        """
+        Match a name against the names sharing the most trigrams with it
+        """
+        if not normalized:
+            return None
+        shared = Counter()
+        for gram in trigrams(normalized):
+            shared.update(self._trigrams.get(gram, ()))
+
+        scores = sorted(
+            (
+                (SequenceMatcher(None, normalized, candidate).ratio(), candidate)
+                for candidate, _ in shared.most_common(FUZZY_CANDIDATES)
+            ),
+            reverse=True,
+        )
+        if not scores or scores[0][0] < FUZZY_CUTOFF:
+            return None
+        if len(scores) > 1 and scores[0][0] - scores[1][0] < FUZZY_MARGIN:
+            # Too close to call
+            return None
+        return self._lookup[scores[0][1]]
+
+    def canonical_name(self, name: str) -> str:
+        """
+        Get the canonical name of a team, the name itself when it's unknown
+        (like teams outside of D1)
+        """
+        return self.find(name) or name
+
+    def team_id(self, name: str) -> str:
+        canonical = self.find(name)
+        if canonical is None:
+            raise ValueError(f"Unknown team {name}")
+        return self.ids[canonical]
+
+    def team_name(self, team_id) -> str:
+        return self.names_by_id.get(str(team_id))
+
+    def learn_alias(self, alias: str, name: str):
+        """
+        Remember another spelling of a team and save it
+        """
+        with self._lock:
+            self._add_alias(alias, name)
+            if self.aliases_file is not None:
+                self._save_aliases()
+
+    def _save_aliases(self):
+        with atomic_path(self.aliases_file) as tmp:
+            with open(tmp, "w") as f:
+                json.dump(self.aliases, f, indent=2, sort_keys=True)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_team_registry() -> TeamRegistry:
+    """
+    Get the process wide team registry, loaded on first use
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = TeamRegistry.load()
+    return _registry
+
+
+def clear_team_registry():
+    """
+    Forget the loaded registry, the next use loads the team table again
+    """
+    global _registry
+    with _registry_lock:
+        _registry = None
+
+
+def as_team_registry(teams) -> TeamRegistry:
+    """
+    Accept either a registry or a team name to id table
+    """
+    if isinstance(teams, TeamRegistry):
+        return teams
+    if teams is None:
+        return get_team_registry()
+    return TeamRegistry(teams)
@@ -0,0 +1,140 @@
+import pandas as pd
+
+from mbp.teams import TeamRegistry
+
+# Transform stage
+#
+# Turns the raw scraped tables into the tables we store. Everything works
+# on whole columns, so the raw tables of every team of a season can be
+# concatenated (with a team column) and transformed in one pass instead of
+# row by row per team.
+
+GAMES_RAW_COLUMNS = ["raw_datetime", "opponent", "result", "attendance", "contest_id"]
+
+# Class to the number of the student year, anything else (graduate
+# students, redshirts...) is 5
+STUDENT_YEARS = {"fr": 1, "so": 2, "jr": 3, "sr": 4}
+
+
+def parse_datetimes(raw: pd.Series) -> pd.Series:
+    """
+    Parse "11/07/2022 07:00 PM" like dates, the time is optional (or TBA)
+    """
+    parts = raw.astype("string").str.strip().str.extract(r"^(\S+)(?:\s+(.+))?$")
+    days = pd.to_datetime(parts[0], format="%m/%d/%Y")
+
+    times = parts[1].mask(parts[1] == "TBA")
+    times = pd.to_datetime(times, format="%I:%M %p")
+    offsets = (times - times.dt.normalize()).fillna(pd.Timedelta(0))
+    return days + offsets
+
+
+def clean_opponents(raw: pd.Series) -> (pd.Series, pd.Series, pd.Series):
+    """
+    Clean the opponent names of a schedule, "@ #5 Arizona St." is an away
+    game against Arizona St. and "Duke @ Las Vegas, NV" a neutral site
+    game. Returns the names, if the game is at home (1) or not (0) and if
+    it is at a neutral site
+    """
+    names = raw.astype("string").str.replace(r"#\d+\s*", "", regex=True).str.strip()
+    away = names.str.contains("@", regex=False).fillna(False)
+    at_opponent = names.str.startswith("@").fillna(False)
+    names = names.where(~at_opponent, names.str.slice(1))
+    names = names.str.split("@", n=1).str[0]
+    names = names.str.split("\n", n=1).str[0].str.strip()
+    return names, (~away).astype(int), (away & ~at_opponent).astype(int)
+
+
+def canonical_names(names: pd.Series, teams: TeamRegistry) -> pd.Series:
+    """
+    Map names to the canonical team names, resolving each distinct name once
+    """
+    if teams is None:
+        return names
+    mapping = {name: teams.canonical_name(name) for name in names.dropna().unique()}
+    return names.map(mapping)
+
+
+def transform_games(raw: pd.DataFrame, teams: TeamRegistry = None) -> pd.DataFrame:
+    """
+    Transform raw schedule rows (GAMES_RAW_COLUMNS, plus a team column when
+    they are from several teams) into the games table
+    """
+    games = raw.drop(columns=["raw_datetime"])
+    games["datetime"] = parse_datetimes(raw["raw_datetime"])
+
+    # W/L [team-score]-[opp-score], games not played yet don't have a result
+    result = raw["result"].astype("string").str.extract(r"^([WL])\s+((\d+)-(\d+))")
+    games["result"] = result[1].fillna(raw["result"].astype("string"))
+    games["win"] = result[0].map({"W": 1.0, "L": 0.0}).astype("float64")
+    games["team_score"] = pd.to_numeric(result[2])
+    games["opp_score"] = pd.to_numeric(result[3])
+
+    (names, home, neutral) = clean_opponents(raw["opponent"])
+    games["opponent"] = canonical_names(names, teams)
+    games["home"] = home
+    games["neutral"] = neutral
+    return games
+
+
+def split_heights(raw: pd.Series) -> pd.DataFrame:
+    """
+    Split "6-3" heights into feet and inches
+    """
+    parts = raw.astype("string").str.extract(r"^\s*(\d+)-(\d+)\s*$")
+    return pd.DataFrame(
+        {
+            "height_ft": pd.to_numeric(parts[0]),
+            "height_in": pd.to_numeric(parts[1]),
+        },
+        index=raw.index,
+    )
+
+
+def transform_roster(raw: pd.DataFrame) -> pd.DataFrame:
+    """
+    Transform raw roster rows into the roster table
+    """
+    roster = raw.drop(columns=["height"])
+    return roster.join(split_heights(raw["height"]))
+
+
+def student_years(raw: pd.Series) -> pd.Series:
+    """
+    Fr/So/Jr/Sr to 1-4, anything else is 5
+    """
+    years = raw.astype("string").str.strip().str.lower().map(STUDENT_YEARS)
+    return years.fillna(5).astype(int)
+
+
+def transform_stats(raw: pd.DataFrame) -> pd.DataFrame:
+    """
+    Transform raw season stats rows into the stats table
+    """
+    stats = raw.copy()
+    if "yr" in stats.columns:
+        stats["year"] = student_years(stats["yr"])
+    return stats
+
+
+TRANSFORMS = {
+    "games": transform_games,
+    "roster": transform_roster,
+    "stats": transform_stats,
+}
+
+
+def transform_season(
+    table: str, raw_tables: dict, teams: TeamRegistry = None
+) -> pd.DataFrame:
+    """
+    Transform the raw tables of many teams ({team name: raw frame}) in one
+    pass, the result has a team column
+    """
+    frames = [df.assign(team=team) for team, df in raw_tables.items()]
+    if not frames:
+        return pd.DataFrame(columns=["team"])
+    raw = pd.concat(frames, ignore_index=True)
+    if table == "games":
+        return transform_games(raw, teams)
+    return TRANSFORMS[table](raw)
@@ -1,6 +1,32 @@
-from datetime import datetime
+from datetime import date, datetime
+
+from mbp.constants import OFF_SEASON_START, REGULAR_SEASON_START
 
 
 def get_formatted_year(raw_year: int) -> str:
     dt = datetime.strptime(str(raw_year), "%Y")
     return f"{raw_year}-{str(int(dt.strftime('%y')) + 1)}"
+
+
+def get_academic_year(day: date = None) -> int:
+    """
+    Get the academic year (the year the season ends in) for a date
+    """
+    day = day or date.today()
+    if day.month >= OFF_SEASON_START:
+        return day.year + 1
+    return day.year
+
+
+def get_season_for_date(day: date) -> int:
+    """
+    Get the season (the year it starts in, like TeamYear.year) of a date
+    """
+    return get_academic_year(day) - 1
+
+
+def is_in_season(day: date) -> bool:
+    """
+    Check if games can be played on a date
+    """
+    return not (OFF_SEASON_START <= day.month < REGULAR_SEASON_START)
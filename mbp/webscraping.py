@@ -4,27 +4,40 @@ TEAMS_URL = f"{BASE_URL}/teams"
 SCOREBOARD_URL = f"{BASE_URL}/contests/livestream_scoreboards"
 TEAM_LIST_URL = f"{BASE_URL}/team/inst_team_list"
 
-import time
-from bs4 import BeautifulSoup as soup
-from urllib.parse import urlencode, urljoin, urlparse
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 import pandas as pd
-from datetime import datetime
-
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.select import Select
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.wait import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.remote.webelement import WebElement
+from datetime import date
 
 BASE_URL = "https://stats.ncaa.org"
 
 from mbp.utils import get_formatted_year
-from mbp.paths import team_save_dir
-
-
-def activate_web_driver(browser: str, headless: bool = True) -> webdriver:
+from mbp.fetchers import Fetcher, as_fetcher
+from mbp.parsing import (
+    contest_id_from_url,
+    find_link,
+    find_season_url,
+    parse_box_score,
+    parse_game_by_game,
+    parse_roster,
+    parse_schedule,
+    parse_scoreboard,
+    parse_stat_grid,
+    parse_team_list,
+)
+from mbp.teams import TeamRegistry, as_team_registry
+from mbp.transform import (
+    GAMES_RAW_COLUMNS,
+    canonical_names,
+    clean_opponents,
+    transform_games,
+    transform_roster,
+    transform_stats,
+)
+
+
+def activate_web_driver(browser: str, headless: bool = True) -> "webdriver":
     options = [
         "--log-level=3",
         "--window-size=1920,1200",
@@ -61,6 +74,7 @@ def activate_web_driver(browser: str, headless: bool = True) -> webdriver:
         driver = webdriver.Firefox(service=service, options=firefox_options)
     else:
         from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
         from webdriver_manager.chrome import ChromeDriverManager
         from selenium.webdriver.chrome.service import Service as ChromiumService
         from webdriver_manager.core.os_manager import ChromeType
@@ -75,202 +89,132 @@ def activate_web_driver(browser: str, headless: bool = True) -> webdriver:
     return driver
 
 
-# TODO: split up this method
-def get_team_name_to_ids(driver: webdriver, params: dict = {}) -> dict:
-    wait = WebDriverWait(driver, 10)
-    TEAM_LIST_URL = f"{BASE_URL}/team/inst_team_list"
+def team_id_from_url(url: str) -> str:
+    """
+    Get the team id from a ``/teams/{id}`` url, or None for any other url
+    """
+    parts = urlparse(url).path.rstrip("/").split("/")
+    if len(parts) >= 2 and parts[-2] == "teams" and parts[-1].isdigit():
+        return parts[-1]
+    return None
+
+
+def get_team_name_to_ids(fetcher: Fetcher, params: dict = {}, workers: int = 8) -> dict:
+    """
+    Get a dict of team name to the team id used on stats.ncaa.org
+    """
+    fetcher = as_fetcher(fetcher)
 
-    # def scrape_team_names(driver: webdriver, params: dict):
     # "academic_year": float(2023),
     defaults = {
         "sport_code": "MBB",
         "division": int(1),
     }
     merged_params = {k: params.get(k, v) for k, v in defaults.items()}
-    query_string = urlencode(merged_params)
+    if "academic_year" in params:
+        merged_params["academic_year"] = params["academic_year"]
 
-    # start_url = urljoin(TEAM_LIST_URL, query_string)
-    start_url = f"{TEAM_LIST_URL}?{query_string}"
-
-    driver.get(start_url)
-    time.sleep(2)
-    # source = soup(driver.page_source, "html.parser")
+    html = fetcher.get("/team/inst_team_list", merged_params, expect="table td > a")
 
     # Get team names to real url
-    teams = {}
-
-    columns = driver.find_elements(By.CSS_SELECTOR, "table>tbody>tr")
+    teams = parse_team_list(html)
 
-    for col in columns:
-        elems = col.find_elements(By.CSS_SELECTOR, "td > a")
-        for a in elems:
-            link = a.get_attribute("href")
-            team_name = a.text
-            teams[team_name] = link
-
-    # Finally translate teams to team ids
+    # Most links on the list point at the team page directly, the rest
+    # redirect there so we only need to follow the redirect
     team_ids = {}
+    unresolved = {}
     for name, link in teams.items():
-        driver.get(link)
-        wait.until(lambda d: driver.find_element(By.CSS_SELECTOR, "a").is_displayed())
-        url = urlparse(driver.current_url)
-        team_id = url.path.split("/")[-1]
-        team_ids[name] = team_id
+        team_id = team_id_from_url(link)
+        if team_id is not None:
+            team_ids[name] = team_id
+        else:
+            unresolved[name] = link
+
+    def resolve(link: str) -> str:
+        url = fetcher.resolve(link)
+        return team_id_from_url(url) or urlparse(url).path.split("/")[-1]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        resolved = executor.map(resolve, unresolved.values())
+        for name, team_id in zip(unresolved.keys(), resolved):
+            team_ids[name] = team_id
 
     return team_ids
 
 
-# Direct the webdriver to the team page
+# Get the team page for the season
 def get_team_page(
-    driver: webdriver, df: pd.DataFrame, team_name: str, raw_year: int = 2023
-) -> pd.DataFrame:
-    team_id = df[:][df["team_name"].str.contains(team_name)]["team_id"].iloc[0]
+    fetcher: Fetcher, teams: TeamRegistry, team_name: str, raw_year: int = 2023
+) -> str:
+    """
+    Fetch the team page for the season and return its html
+    """
+    fetcher = as_fetcher(fetcher)
+    team_id = as_team_registry(teams).team_id(team_name)
 
-    team_url = f"{TEAMS_URL}/{team_id}"
-    driver.get(team_url)
+    html = fetcher.get(f"/teams/{team_id}", expect="a[target=ATHLETICS_URL]")
 
-    wait = WebDriverWait(driver, 10)
-    wait.until(
-        lambda d: driver.find_element(By.CSS_SELECTOR, "a[target=ATHLETICS_URL]")
-    )
     # Format date
     formatted_date = get_formatted_year(raw_year)
 
-    select_form = driver.find_element(By.NAME, "year_id")
-    select = Select(select_form)
-    select.select_by_visible_text(formatted_date)
+    # The year select navigates to the team page of that season
+    (season_url, selected) = find_season_url(html, formatted_date)
+    if season_url is None:
+        raise ValueError(f"No {formatted_date} season for {team_name}")
+    if not selected:
+        html = fetcher.get(season_url, expect="a[target=ATHLETICS_URL]")
 
+    return html
+
+
+def get_team_tab(fetcher: Fetcher, html: str, link_text: str, expect: str) -> str:
+    """
+    Follow one of the tabs (Roster, Team Statistics, ...) of a team page
+    """
+    link = find_link(html, link_text)
+    if link is None:
+        raise ValueError(f"Could not find the {link_text} link on the page")
+    return fetcher.get(link, expect=expect)
 
-# Select the schedule and results page
-def get_schedule_and_results_page(driver: webdriver) -> list:
-    # Select schedule and results
-    tables = driver.find_elements(By.CSS_SELECTOR, "#contentarea table>tbody")
-
-    schedule_result_element = None
-    for table in tables:
-        try:
-            legend = table.find_element(By.CSS_SELECTOR, "fieldset>legend")
-            if legend.text == "Schedule/Results":
-                schedule_result_element = table
-        except:
-            pass
-
-    # Find the game dates, opponent, results, and attendance (if available)
-    listing = schedule_result_element.find_elements(
-        By.CSS_SELECTOR, "fieldset table > tbody tr"
-    )
-    games = []
-    for li in listing:
-        if li.get_attribute("style") == "":
-            games.append(li)
 
-    return games
+# Select the schedule and results page
+def get_schedule_and_results_page(html: str) -> list:
+    """
+    Get the (date, opponent, result, attendance) rows of the
+    Schedule/Results table from a team page
+    """
+    return parse_schedule(html)
 
 
 # Get team games for the year
 def get_team_games_for_year(
-    driver: webdriver, df: pd.DataFrame, team_name: str, raw_year: int = 2023
+    fetcher: Fetcher,
+    teams: TeamRegistry,
+    team_name: str,
+    raw_year: int = 2023,
+    transform: bool = True,
 ) -> pd.DataFrame:
-    from mbp.webscraping import TEAMS_URL
-    from selenium.webdriver.support.wait import WebDriverWait
-    from selenium.webdriver.common.by import By
-
-    get_team_page(driver, df, team_name, raw_year)
+    """
+    The games of a team's season, or the raw schedule rows (to transform a
+    whole league at once with mbp.transform) when not `transform`
+    """
+    teams = as_team_registry(teams)
+    html = get_team_page(fetcher, teams, team_name, raw_year)
 
     # Select schedule and results
-    games = get_schedule_and_results_page(driver)
-
-    # Get all the dates
-    season_games = []
-    for idx, game in enumerate(games[1:]):
-        # for i in range(4):
-        rows = game.find_elements(By.CSS_SELECTOR, "td")
-        date = rows[0].text
-        try:
-            opponent = rows[1].text
-        except:
-            opponent = None
-        try:
-            result = rows[2].text or None
-        except:
-            result = None
-        try:
-            attendance = rows[3].text or None
-        except:
-            attendance = None
-
-        res = (date, opponent, result, attendance)
-        season_games.append(res)
-
-    # Save to a dataframe
-    games_df = pd.DataFrame(season_games)
-    games_df.rename(
-        columns={
-            0: "raw_datetime",
-            1: "opponent",
-            2: "result",
-            3: "attendance",
-            4: "home",
-            5: "win",
-            6: "team_score",
-            7: "opp_score",
-        },
-        inplace=True,
-    )
-
-    # Format datetime
-    games_df2 = games_df.copy()
-    for idx, row in games_df.iterrows():
-        dt = split_and_parse_datetime(row["raw_datetime"])
-        games_df2.at[idx, "datetime"] = pd.to_datetime(dt)
-
-        if "W" in row["result"] or "L" in row["result"]:
-            # W/L [home-score]-[opp-score]
-            parts = row["result"].split(" ")
-            games_df2.at[idx, "result"] = parts[1]
-            if parts[0] == "W":
-                games_df2.at[idx, "win"] = 1.0
-            else:
-                games_df2.at[idx, "win"] = 0.0
-            score_parts = parts[1].split("-")
-            games_df2.at[idx, "team_score"] = score_parts[0]
-            games_df2.at[idx, "opp_score"] = score_parts[1]
-
-        opp = row["opponent"]
-        (name, home) = clean_team_name_and_return_home(opp)
-        games_df2.at[idx, "home"] = home
-        games_df2.at[idx, "opponent"] = name
-        # ncaa.stats isn't for machines
-        # if "#" in opp:
-        #     opp = opp.split(" ")[1]
-
-        # if "@" in opp:
-        #     parts = opp.split("@")
-
-        #     if parts[0] == "":
-        #         opp_name = parts[1]
-        #     else:
-        #         opp_name = parts[0]
-
-        #     games_df2.at[idx, "home"] = 0
-        #     games_df2.at[idx, "opponent"] = opp_name.strip()
-        # else:
-        #     games_df2.at[idx, "home"] = 1
-        #     games_df2.at[idx, "opponent"] = opp.strip()
-
-    games_df2 = games_df2.drop(columns=["raw_datetime"])
-    games_df2.reset_index()
-    games_df2 = games_df2.replace("", 0)
-    return games_df2
+    season_games = get_schedule_and_results_page(html)
+    games_df = pd.DataFrame(season_games, columns=GAMES_RAW_COLUMNS)
+    if not transform:
+        return games_df
+    return transform_games(games_df, teams)
 
 
 def clean_team_name_and_return_home(team_name: str) -> (str, int):
     """
     Clean the name from the NCAA page
     """
-    # ncaa.stats isn't for machines
-    if "#" in team_name:
-        team_name = team_name.split(" ")[1]
+    # ncaa.stats isn't for machines, ranked teams show up as "#5 Arizona St."
+    team_name = re.sub(r"#\d+\s*", "", team_name)
 
     if "@" in team_name:
         parts = team_name.split("@")
@@ -293,230 +237,183 @@ def clean_team_name_and_return_home(team_name: str) -> (str, int):
 
 # Get team roster
 def get_team_roster(
-    driver: webdriver, df: pd.DataFrame, team_name: str, raw_year: int = 2023
+    fetcher: Fetcher,
+    teams: TeamRegistry,
+    team_name: str,
+    raw_year: int = 2023,
+    transform: bool = True,
 ) -> pd.DataFrame:
-    from mbp.webscraping import TEAMS_URL
-    from selenium.webdriver.support.wait import WebDriverWait
-    from selenium.webdriver.common.by import By
-
-    get_team_page(driver, df, team_name, raw_year)
+    """
+    The season roster of a team, untransformed when not `transform`
+    """
+    fetcher = as_fetcher(fetcher)
+    html = get_team_page(fetcher, teams, team_name, raw_year)
 
     # Get roster tab
-    roster_link = driver.find_element(By.LINK_TEXT, "Roster")
-    roster_link.click()
-    wait = WebDriverWait(driver, 10)
-    wait.until(lambda d: driver.find_element(By.CSS_SELECTOR, "table.dataTable"))
+    html = get_team_tab(fetcher, html, "Roster", "table#stat_grid")
     # Pluck roster table
-    roster_table = driver.find_element(By.CSS_SELECTOR, "table#stat_grid")
-
-    players = []
-    player_rows = roster_table.find_elements(By.CSS_SELECTOR, "tbody tr")
-    for row in player_rows:
-        jersey = row.find_element(By.XPATH, f"td[1]").text
-        player = row.find_element(By.XPATH, f"td[2]").text
-        position = row.find_element(By.XPATH, f"td[3]").text
-        height = row.find_element(By.XPATH, f"td[4]").text
-        year = row.find_element(By.XPATH, f"td[5]").text
-        games_played = row.find_element(By.XPATH, f"td[6]").text
-        games_scored = row.find_element(By.XPATH, f"td[7]").text
-        players.append(
-            {
-                "jersey": jersey,
-                "player": player,
-                "position": position,
-                "height": height,
-                "year": year,
-                "games_played": games_played,
-                "games_scored": games_scored,
-            }
-        )
-
-    # Beautify name
-    team_roster = pd.DataFrame(players)
-    team_roster1 = team_roster.copy()
-    # team_roster1["first_name"] = ""
-    # team_roster1["last_name"] = ""
-    for idx, row in team_roster1.iterrows():
-        # last_name, first_name = row["player"].split(",")
-        feet, inch = row["height"].split("-")
-
-        # TODO: fix the dtype error
-        # team_roster1.loc[idx, "first_name"] = first_name.strip()
-        # team_roster1.loc[idx, "last_name"] = last_name.strip()
-        team_roster1.loc[idx, "height_ft"] = int(feet)
-        team_roster1.loc[idx, "height_in"] = int(inch)
+    team_roster = parse_roster(html)
 
-    team_roster1 = team_roster1.drop(columns=["height"])
-    team_roster1 = team_roster1.replace("", 0)
-    return team_roster1
+    if not transform:
+        return team_roster
+    return transform_roster(team_roster)
 
 
 # Get team stats
 def get_team_stats(
-    driver: webdriver, df: pd.DataFrame, team_name: str, raw_year: int = 2023
+    fetcher: Fetcher,
+    teams: TeamRegistry,
+    team_name: str,
+    raw_year: int = 2023,
+    transform: bool = True,
 ) -> pd.DataFrame:
-    from mbp.webscraping import TEAMS_URL
-    from selenium.webdriver.support.wait import WebDriverWait
-    from selenium.webdriver.common.by import By
+    """
+    The season stats of a team, untransformed when not `transform`
+    """
+    fetcher = as_fetcher(fetcher)
 
     # Get the roster stats
-    get_team_page(driver, df, team_name, raw_year)
+    html = get_team_page(fetcher, teams, team_name, raw_year)
     formatted_year = get_formatted_year(raw_year)
 
     # Get roster tab
-    roster_link = driver.find_element(By.LINK_TEXT, "Team Statistics")
-    roster_link.click()
-    wait = WebDriverWait(driver, 10)
-    wait.until(lambda d: driver.find_element(By.CSS_SELECTOR, "table.dataTable"))
+    html = get_team_tab(fetcher, html, "Team Statistics", "table#stat_grid")
 
     # Huh?
     # This might be the latest, which for whatever reason does not show up
     # as a link on stats.ncaa.org (fruuuussstraing)
-    try:
-        date_link = driver.find_element(By.LINK_TEXT, formatted_year)
-        date_link.click()
-    except:
-        # Latest date, so don't do anything
-        pass
-
-    stats_table = driver.find_element(By.CSS_SELECTOR, "table#stat_grid")
-    stats_headings = stats_table.find_elements(By.CSS_SELECTOR, "thead th")
-    headings = [h.text.lower() for h in stats_headings]
-    # df = pd.DataFrame(columns=headings)
-    data_df = []
-    stats_rows = driver.find_elements(By.CSS_SELECTOR, "table#stat_grid tbody tr")
-    for row in stats_rows:
-        local_data = []
-        for idx in range(len(stats_headings)):
-            dat = row.find_element(By.XPATH, f"td[{idx + 1}]")
-            local_data.append(dat.text)
-        data_df.append(local_data)
-        # df = pd.concat([df, local_df])
-
-    team_stats = pd.DataFrame(data_df, columns=headings)
-    team_stats = team_stats.replace("", 0)
-    return team_stats
+    date_link = find_link(html, formatted_year)
+    if date_link is not None:
+        html = fetcher.get(date_link, expect="table#stat_grid")
+
+    team_stats = parse_stat_grid(html)
+    if not transform:
+        return team_stats
+    return transform_stats(team_stats)
 
 
 def get_game_stats(
-    driver: webdriver,
-    df: pd.DataFrame,
+    fetcher: Fetcher,
+    teams: TeamRegistry,
     team_name: str,
     opponent_name: str,
     year: int = 2023,
 ):
-    get_team_page(driver, df, team_name, year)
+    fetcher = as_fetcher(fetcher)
+    teams = as_team_registry(teams)
+    html = get_team_page(fetcher, teams, team_name, year)
+    opponent_name = teams.canonical_name(opponent_name)
     # Get game page
-    game_by_game_link = driver.find_element(By.LINK_TEXT, "Game By Game")
-    game_by_game_link.click()
-    wait = WebDriverWait(driver, 10)
-    wait.until(
-        lambda d: driver.find_element(By.CSS_SELECTOR, "#game_breakdown_div table")
-    )
-
-    # Save the main window handle
-    curr_window_handle = driver.current_window_handle
+    html = get_team_tab(fetcher, html, "Game By Game", "#game_breakdown_div table")
 
-    rows = driver.find_elements(By.CSS_SELECTOR, "#game_breakdown_div table > tbody tr")
-    # rows = opp_table.find_elements(By.TAG_NAME, "tr")
-    # skip the first two rows
-    rows = [row for row in rows[2:] if row.get_attribute("class") == ""]
-    for idx, row in enumerate(rows):
-        try:
-            cells = row.find_elements(By.TAG_NAME, "td")
-        except:
-            pass
-
-        opp_link_text = cells[1].text.strip()
+    box_score_link = None
+    for cells, links in parse_game_by_game(html):
+        opp_link_text = cells[1].strip() if len(cells) > 1 else ""
         (name, home) = clean_team_name_and_return_home(opp_link_text)
 
-        if name == opponent_name:
-            row_links = row.find_elements(By.TAG_NAME, "a")
-            row_links[2].click()
+        if teams.canonical_name(name) == opponent_name and len(links) > 2:
+            box_score_link = links[2]
             break
 
-    # Wait for the new window or tab
-    wait.until(EC.number_of_windows_to_be(2))
+    if box_score_link is None:
+        raise ValueError(f"Could not find the {team_name} game against {opponent_name}")
 
-    # Switch to new tab
-    other_handles = [
-        handle for handle in driver.window_handles if handle != curr_window_handle
-    ]
-    if len(other_handles) > 0:
-        driver.switch_to.window(other_handles[0])
-    else:
-        print("Something went wrong")
-
-    wait.until(lambda d: driver.find_elements(By.CSS_SELECTOR, "table.mytable"))
-
-    # Get the last two tables
-    tables = driver.find_elements(By.TAG_NAME, "table")
-    tables = tables[-2:]
-
-    def process_table(table: WebElement):
-        # First table heading
-        first_table_heading = table.find_element(By.CSS_SELECTOR, "tbody > tr.heading")
-        team = first_table_heading.text
-
-        # Get all headers
-        headers = table.find_elements(By.CSS_SELECTOR, "th")
-        all_headings = [heading.text.lower() for heading in headers]
+    html = fetcher.get(box_score_link, expect="table.mytable")
 
-        # get all players for each row
-        player_rows = table.find_elements(By.CSS_SELECTOR, "tr.smtext")
-        players_and_stats = []
-        for row in player_rows:
-            player_and_stats = {}
-            cells = row.find_elements(By.TAG_NAME, "td")
-            for idx, heading in enumerate(all_headings):
-                player_and_stats[heading] = cells[idx].text
-
-            player_and_stats["team"] = team
-            players_and_stats.append(player_and_stats)
-
-        game_df = pd.DataFrame(players_and_stats)
-        game_df = game_df.drop(game_df[game_df["player"] == "TEAM"].index)
-
-        return (team, game_df)
-
-    team1, stats_team1 = process_table(tables[0])
-    team2, stats_team2 = process_table(tables[1])
+    # The last two tables hold the box score of each team
+    team1, stats_team1, team2, stats_team2 = parse_box_score(html)
 
     stats_team1 = stats_team1.replace("", 0)
     stats_team2 = stats_team2.replace("", 0)
 
-    # team1_games_save_dir = team_save_dir(team1, year) / "games"
-    # if not team1_games_save_dir.exists():
-    #     team1_games_save_dir.mkdir(exist_ok=True, parents=True)
-    # stats_team2.to_csv(team1_games_save_dir / f"{team2}.csv")
-
-    # team2_games_save_dir = team_save_dir(team2, year) / "games"
-    # if not team2_games_save_dir.exists():
-    #     team2_games_save_dir.mkdir(exist_ok=True, parents=True)
-    # stats_team1.to_csv(team2_games_save_dir / f"{team1}.csv")
-
     return (team1, stats_team1, team2, stats_team2)
 
 
-# Utils
-
+def get_season_contests(
+    fetcher: Fetcher, teams: TeamRegistry, team_name: str, year: int = 2023
+) -> pd.DataFrame:
+    """
+    Get every game of a team's season from the Game By Game page, along
+    with the contest id and box score link of the games already played
+    """
+    fetcher = as_fetcher(fetcher)
+    teams = as_team_registry(teams)
+    html = get_team_page(fetcher, teams, team_name, year)
+    html = get_team_tab(fetcher, html, "Game By Game", "#game_breakdown_div table")
+
+    contests = []
+    for cells, links in parse_game_by_game(html):
+        box_score_url = None
+        contest_id = None
+        for link in links:
+            contest_id = contest_id_from_url(link)
+            if contest_id is not None:
+                box_score_url = link
+                break
+
+        contests.append(
+            {
+                "date": cells[0],
+                "team": team_name,
+                "opponent": cells[1] if len(cells) > 1 else "",
+                "contest_id": contest_id,
+                "box_score_url": box_score_url,
+            }
+        )
 
-def split_and_parse_datetime(s: str) -> datetime:
-    parts = s.split(" ")
-    dt = datetime.strptime(parts[0], "%m/%d/%Y")
+    contests = pd.DataFrame(
+        contests,
+        columns=["date", "team", "opponent", "contest_id", "box_score_url"],
+    )
+    (names, home, neutral) = clean_opponents(contests["opponent"])
+    contests["opponent"] = canonical_names(names, teams)
+    contests.insert(3, "home", home)
+    contests.insert(4, "neutral", neutral)
+    return contests
 
-    if len(parts) == 1:
-        return dt
 
-    if parts[1] == "TBA":
-        time = None
-    else:
-        if len(parts) == 1:
-            time_str = " ".join(parts[1:])
-        else:
-            time_str = s
+def get_box_score(
+    fetcher: Fetcher, contest_id: str, box_score_url: str = None
+) -> (str, pd.DataFrame, str, pd.DataFrame):
+    """
+    Get the box score of a contest
+    """
+    fetcher = as_fetcher(fetcher)
+    if not isinstance(box_score_url, str) or not box_score_url:
+        box_score_url = f"/contests/{contest_id}/box_score"
+    html = fetcher.get(box_score_url, expect="table.mytable")
+    return parse_box_score(html)
 
-        time = datetime.strptime(time_str, "%I:%M %p")
-        dt = dt.replace(hour=time.hour, minute=time.minute)
 
-    return dt
+def get_scoreboard(fetcher: Fetcher, day: date, params: dict = {}) -> pd.DataFrame:
+    """
+    Get every contest on the scoreboard for a day
+    """
+    fetcher = as_fetcher(fetcher)
+    defaults = {
+        "sport_code": "MBB",
+        "division": int(1),
+        "conference_id": int(0),
+        "tournament_id": "",
+        "game_date": day.strftime("%m/%d/%Y"),
+    }
+    merged_params = {**defaults, **params}
+
+    html = fetcher.get("/contests/livestream_scoreboards", merged_params)
+    contests = pd.DataFrame(
+        parse_scoreboard(html),
+        columns=[
+            "contest_id",
+            "box_score_url",
+            "away_team",
+            "away_team_id",
+            "away_score",
+            "home_team",
+            "home_team_id",
+            "home_score",
+            "neutral",
+            "final",
+        ],
+    )
+    contests.insert(0, "date", pd.Timestamp(day))
+    return contests
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+# Startup benchmark
+#
+# Imports the model and storage layers in fresh interpreters and checks
+# they stay fast and don't drag in the scraping stack. Exits with 1 when
+# a scraping module gets imported or the median time is over the budget,
+# so it can guard changes:
+#
+#   python scripts/startup_benchmark.py --budget 1.5
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PARENT_DIR = Path(__file__).parent.resolve().parent
+
+# Modules analysis jobs shouldn't pay for
+SCRAPING_MODULES = [
+    "selenium",
+    "webdriver_manager",
+    "bs4",
+    "lxml",
+    "requests",
+    "mbp.webscraping",
+    "mbp.parsing",
+    "mbp.driver_pool",
+]
+
+DEFAULT_MODULES = ["mbp.models", "mbp.store", "mbp.data"]
+
+MEASURE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def measure(module: str) -> dict:
+    """
+    Import a module in a fresh interpreter
+    """
+    out = subprocess.run(
+        [sys.executable, "-c", MEASURE.format(module=module)],
+        cwd=PARENT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout)
+
+
+def slowest_imports(module: str, count: int = 10) -> list:
+    """
+    The modules taking the most time (self + children) to import
+    """
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PARENT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = []
+    for line in out.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            times.append((int(parts[1]), parts[2].rstrip()))
+    return sorted(times, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the package startup")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--budget", type=float, default=None, help="max median seconds per import"
+    )
+    parser.add_argument(
+        "--profile", action="store_true", help="show the slowest imports"
+    )
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        runs = [measure(module) for _ in range(args.runs)]
+        median = statistics.median(run["elapsed"] for run in runs)
+        loaded = [
+            m
+            for m in SCRAPING_MODULES
+            if any(name == m or name.startswith(m + ".") for name in runs[0]["modules"])
+        ]
+
+        print(f"{module}: {median * 1000:.0f}ms median of {args.runs} runs")
+        if loaded:
+            print(f"  imports scraping modules: {', '.join(loaded)}")
+            failed = True
+        if args.budget is not None and median > args.budget:
+            print(f"  over the {args.budget:.2f}s budget")
+            failed = True
+        if args.profile:
+            for micros, name in slowest_imports(module):
+                print(f"  {micros / 1000:8.1f}ms {name}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -55,4 +55,5 @@ def activate_web_driver(browser: str) -> webdriver:
     return driver
 
 
-activate_web_driver("firefox")
+if __name__ == "__main__":
+    activate_web_driver("firefox")
@@ -0,0 +1,75 @@
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+# Recorded stats.ncaa.org pages, laid out by url path so they can be served
+# as they are by a local http server
+SITE_DIR = Path(__file__).parent / "fixtures" / "site"
+
+
+@pytest.fixture
+def page():
+    """
+    Read a recorded page by its url path
+    """
+
+    def read(path: str) -> str:
+        return (SITE_DIR / path.strip("/")).read_text()
+
+    return read
+
+
+class SiteHandler(SimpleHTTPRequestHandler):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, directory=str(SITE_DIR), **kwargs)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="session")
+def site():
+    """
+    Serve the recorded pages over http, returns the base url
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """
+    A season store of its own as the process wide store
+    """
+    import mbp.store
+
+    season_store = mbp.store.SeasonStore(tmp_path / "store")
+    monkeypatch.setattr(mbp.store, "_store", season_store)
+    return season_store
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """
+    A small team registry as the process wide one
+    """
+    import pandas as pd
+
+    import mbp.teams
+
+    teams = mbp.teams.TeamRegistry(
+        pd.DataFrame(
+            {
+                "team_name": ["Arizona", "Duke", "Gonzaga", "Purdue"],
+                "team_id": [100, 300, 301, 303],
+            }
+        )
+    )
+    monkeypatch.setattr(mbp.teams, "_registry", teams)
+    return teams
@@ -0,0 +1,71 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mbp.backtest import BacktestConfig, backtest, score_predictions
+
+
+def known_predictions() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "home_score": [80, 65, 72, 60],
+            "away_score": [70, 70, 68, 75],
+            "margin": [6.0, -2.0, 8.0, 3.0],
+            "win_probability": [0.8, 0.3, 0.6, 0.9],
+            "elo_probability": [0.6, 0.55, 0.4, 0.5],
+            # The home team covers the first, the away team the second, the
+            # third is a push and the fourth has no line
+            "line": [-4.0, 2.5, -4.0, np.nan],
+        }
+    )
+
+
+def test_score_predictions():
+    scores = score_predictions(known_predictions())
+    assert scores["games"] == 4
+    assert scores["log_loss"] == pytest.approx(
+        -(np.log(0.8) + np.log(0.7) + np.log(0.6) + np.log(0.1)) / 4
+    )
+    assert scores["brier"] == pytest.approx((0.04 + 0.09 + 0.16 + 0.81) / 4)
+    assert scores["accuracy"] == 0.75
+    assert scores["elo_log_loss"] == pytest.approx(
+        -(np.log(0.6) + np.log(0.45) + np.log(0.4) + np.log(0.5)) / 4
+    )
+    assert scores["elo_brier"] == pytest.approx((0.16 + 0.3025 + 0.36 + 0.25) / 4)
+    # A 50% chance is a pick of the away team
+    assert scores["elo_accuracy"] == 0.5
+    assert scores["margin_mae"] == pytest.approx((4 + 3 + 4 + 18) / 4)
+    # Picked the first right and the second (home by 0.5) wrong
+    assert scores["ats_games"] == 2
+    assert scores["ats_accuracy"] == 0.5
+
+
+def test_score_predictions_without_lines():
+    scores = score_predictions(known_predictions().drop(columns="line"))
+    assert scores["ats_games"] == 0 and np.isnan(scores["ats_accuracy"])
+    assert score_predictions(known_predictions().iloc[0:0])["games"] == 0
+
+
+def test_repeated_configs_are_run_once(monkeypatch):
+    import mbp.backtest
+
+    runs = []
+
+    def run_backtest(year, path, config, lines):
+        runs.append((year, config))
+        return known_predictions().drop(columns="line").assign(season=year)
+
+    monkeypatch.setattr(mbp.backtest, "cache_season_games", lambda year: Path())
+    monkeypatch.setattr(mbp.backtest, "run_backtest", run_backtest)
+    config = BacktestConfig(ridge=2.0)
+    scores = backtest([2022, 2023, 2022], [config, BacktestConfig(2.0)], workers=1)
+
+    assert runs == [(2022, config), (2023, config)]
+    assert scores.index.tolist() == [
+        (config.name, 2022),
+        (config.name, 2023),
+        (config.name, "all"),
+    ]
+    assert scores["games"].tolist() == [4, 4, 8]
@@ -0,0 +1,174 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mbp.bracket import ROUNDS, SEED_ORDER, Field, pool_picks, simulate_bracket
+
+REGIONS = ["East", "West", "South", "Midwest"]
+SEMIFINALS = [("East", "South"), ("West", "Midwest")]
+
+
+def tournament_field() -> pd.DataFrame:
+    """
+    68 teams named by region and seed, with First Four games between 16
+    seeds in the East and South and 11 seeds in the West and Midwest
+    """
+    teams = [
+        {"team": f"{region} {seed}", "region": region, "seed": seed}
+        for region in REGIONS
+        for seed in range(1, 17)
+    ]
+    teams.append({"team": "East 16b", "region": "East", "seed": 16})
+    teams.append({"team": "West 11b", "region": "West", "seed": 11})
+    teams.append({"team": "South 16b", "region": "South", "seed": 16})
+    teams.append({"team": "Midwest 11b", "region": "Midwest", "seed": 11})
+    return pd.DataFrame(teams)
+
+
+def favorites_win(field: Field, strength: dict) -> np.ndarray:
+    """
+    Probabilities of the stronger team always winning
+    """
+    values = field.teams.map(strength).to_numpy(dtype=float)
+    return (values[:, None] > values[None, :]).astype(float)
+
+
+def strengths(field: Field) -> dict:
+    # Better seeds are stronger, and the East is the strongest region
+    return {
+        team: 100 * (17 - seed) - REGIONS.index(region)
+        for (team, (region, seed)) in field.seeds.iterrows()
+    }
+
+
+def test_field_slots():
+    field = Field(tournament_field(), SEMIFINALS)
+    assert len(field) == 68
+    assert field.regions == ["East", "South", "West", "Midwest"]
+
+    first_four = field.slot_a != field.slot_b
+    pairs = {
+        (field.teams[a], field.teams[b])
+        for (a, b) in zip(field.slot_a[first_four], field.slot_b[first_four])
+    }
+    assert pairs == {
+        ("East 16", "East 16b"),
+        ("West 11", "West 11b"),
+        ("South 16", "South 16b"),
+        ("Midwest 11", "Midwest 11b"),
+    }
+    # Every slot is a seed in the first round order of its region
+    seeds = field.seeds["seed"].to_numpy()
+    assert list(seeds[field.slot_a][:16]) == SEED_ORDER
+    regions = field.seeds["region"].to_numpy()[field.slot_a]
+    assert list(regions[16:32]) == ["South"] * 16
+
+
+def test_field_needs_the_semifinals_to_pair_its_regions():
+    with pytest.raises(ValueError, match="semifinals"):
+        Field(tournament_field(), [("East", "West"), ("South", "North")])
+    with pytest.raises(ValueError, match="semifinals"):
+        Field(tournament_field(), [("East", "West", "South", "Midwest")])
+
+
+def test_semifinals_are_played_between_the_pinned_regions():
+    field = Field(tournament_field(), SEMIFINALS)
+    probabilities = favorites_win(field, strengths(field))
+    advancement = simulate_bracket(field, probabilities, 100, workers=1, seed=0)
+    advancement = advancement.set_index("team")
+
+    assert set(advancement.index[advancement["final_4"] == 1]) == {
+        "East 1",
+        "West 1",
+        "South 1",
+        "Midwest 1",
+    }
+    # The East beats the South and the West the Midwest, not the region
+    # listed next to them in the field
+    finalists = advancement.index[advancement["championship"] == 1]
+    assert set(finalists) == {"East 1", "West 1"}
+    assert advancement.loc["East 1", "champion"] == 1
+
+
+def test_seeded_simulations_count_every_game():
+    field = Field(tournament_field(), SEMIFINALS)
+    values = np.random.default_rng(1).normal(size=len(field))
+    probabilities = 1 / (1 + np.exp(values[None, :] - values[:, None]))
+
+    advancement = simulate_bracket(field, probabilities, 5000, workers=1, seed=7)
+    again = simulate_bracket(field, probabilities, 5000, workers=1, seed=7)
+    pd.testing.assert_frame_equal(advancement, again)
+
+    # Each round has half the teams of the one before it, in every
+    # tournament
+    totals = advancement[ROUNDS].sum().to_numpy()
+    np.testing.assert_allclose(totals, [64, 32, 16, 8, 4, 2, 1])
+    # Nobody goes further than they got before
+    rounds = advancement[ROUNDS].to_numpy()
+    assert (np.diff(rounds, axis=1) <= 0).all()
+    # Teams outside the First Four are always in the round of 64
+    shared = field.slot_a != field.slot_b
+    first_four = field.teams[np.r_[field.slot_a[shared], field.slot_b[shared]]]
+    assert len(first_four) == 8
+    others = advancement.loc[~advancement["team"].isin(first_four)]
+    assert (others["round_of_64"] == 1).all()
+
+    split = simulate_bracket(field, probabilities, 5000, workers=2, seed=7)
+    np.testing.assert_allclose(split[ROUNDS].sum().to_numpy(), totals)
+
+
+def test_first_four_winners_fill_their_slot():
+    field = Field(tournament_field(), SEMIFINALS)
+    strength = strengths(field)
+    strength["East 16b"] = strength["East 16"] + 1
+    probabilities = favorites_win(field, strength)
+    # A coin flip between the West 11 seeds
+    (west, west_b) = field.teams.get_indexer(["West 11", "West 11b"])
+    probabilities[west, west_b] = probabilities[west_b, west] = 0.5
+
+    advancement = simulate_bracket(field, probabilities, 4000, workers=1, seed=3)
+    advancement = advancement.set_index("team")
+    assert advancement.loc["East 16b", "round_of_64"] == 1
+    assert advancement.loc["East 16", "round_of_64"] == 0
+    # The winner of the First Four plays the East 1 seed and loses
+    assert advancement.loc["East 16b", "round_of_32"] == 0
+
+    coin = advancement.loc[["West 11", "West 11b"], "round_of_64"]
+    assert coin.sum() == 1
+    assert coin.min() == pytest.approx(0.5, abs=0.05)
+
+
+class SmallField(Field):
+    """
+    A bracket of one team per slot, without the regions of a full field
+    """
+
+    def __init__(self, teams: list, seeds: list) -> None:
+        self.teams = pd.Index(teams)
+        self.seeds = pd.DataFrame({"seed": seeds}, index=self.teams)
+        self.slot_a = self.slot_b = np.arange(len(teams))
+
+
+def test_pool_picks_maximize_expected_points():
+    # A 4 team bracket: A plays B and C plays D
+    field = SmallField(["A", "B", "C", "D"], [1, 2, 1, 2])
+    advancement = pd.DataFrame(
+        {"team": ["A", "B", "C", "D"], "round_of_64": 1.0}
+        | {column: 0.0 for column in ROUNDS[1:]}
+    )
+    advancement["round_of_32"] = [0.55, 0.45, 0.9, 0.1]
+    advancement["sweet_16"] = [0.13, 0.44, 0.38, 0.05]
+
+    # Picking B to win it all: 0.45 + 0.9 + 4 * 0.44 = 3.11 expected points,
+    # against 0.55 + 0.9 + 4 * 0.38 = 2.97 with C and A in the first round
+    picks = pool_picks(field, advancement, points=[1, 4])
+    assert picks[["round", "game", "team", "seed"]].values.tolist() == [
+        ["round_of_64", 0, "B", 2],
+        ["round_of_64", 1, "C", 1],
+        ["round_of_32", 0, "B", 2],
+    ]
+    np.testing.assert_allclose(picks["chance"], [0.45, 0.9, 0.44])
+
+    # With less weight on the final, the favorites of each game are picked
+    picks = pool_picks(field, advancement, points=[1, 1])
+    assert picks["team"].tolist() == ["A", "C", "C"]
@@ -0,0 +1,106 @@
+import socket
+
+import pandas as pd
+import pytest
+
+from mbp.cache import (
+    CacheMiss,
+    CachingFetcher,
+    PageCache,
+    normalize_url,
+    page_type,
+)
+from mbp.fetchers import FetchError, HttpFetcher
+from mbp.teams import TeamRegistry
+from mbp.webscraping import get_box_score, get_team_stats
+
+PAGES = [
+    "/teams/100",
+    "/teams/90",
+    "/team/1/stats/90",
+    "/contests/123/box_score",
+]
+
+
+def disable_network(monkeypatch):
+    def connect(*args, **kwargs):
+        raise OSError("The network is disabled")
+
+    monkeypatch.setattr(socket.socket, "connect", connect)
+
+
+@pytest.fixture
+def teams():
+    return TeamRegistry(pd.DataFrame({"team_name": ["Arizona"], "team_id": [100]}))
+
+
+def test_normalize_url():
+    assert normalize_url("HTTP://Stats.NCAA.org/teams/100/?b=2&a=1") == (
+        "http://stats.ncaa.org/teams/100?a=1&b=2"
+    )
+    assert normalize_url("https://stats.ncaa.org/x?a=1", {"b": 2}) == normalize_url(
+        "https://stats.ncaa.org/x?b=2&a=1"
+    )
+
+
+@pytest.mark.parametrize(
+    ("url", "kind"),
+    [
+        ("https://stats.ncaa.org/contests/123/box_score", "box_score"),
+        ("https://stats.ncaa.org/team/1/roster/90", "roster"),
+        ("https://stats.ncaa.org/teams/100", "team"),
+        ("https://stats.ncaa.org/contests/livestream_scoreboards", "scoreboard"),
+        ("https://stats.ncaa.org/elsewhere", "other"),
+    ],
+)
+def test_page_type(url, kind):
+    assert page_type(url) == kind
+
+
+def test_cache_then_replay_offline(site, tmp_path, teams, monkeypatch):
+    cache = PageCache(tmp_path)
+    fetcher = CachingFetcher(HttpFetcher(base_url=site), cache, season=2022)
+    stats = get_team_stats(fetcher, teams, "Arizona", 2022)
+    get_box_score(fetcher, "123")
+    assert (fetcher.hits, fetcher.misses) == (0, len(PAGES))
+    # Bodies are stored once per content, gzipped
+    assert len(list((tmp_path / "objects").rglob("*.html.gz"))) == len(PAGES)
+
+    # Past season pages are served from the cache again
+    get_box_score(fetcher, "123")
+    assert fetcher.hits == 1
+
+    # Replay with the network disabled
+    disable_network(monkeypatch)
+    offline = CachingFetcher(HttpFetcher(base_url=site), cache, offline=True)
+    pd.testing.assert_frame_equal(
+        get_team_stats(offline, teams, "Arizona", 2022), stats
+    )
+    (team1, _, team2, _) = get_box_score(offline, "123")
+    assert (team1, team2) == ("Phoenix", "#5 Arizona")
+    assert offline.hits == len(PAGES)
+    assert offline.fetcher.pages_fetched == 0
+
+    with pytest.raises(CacheMiss):
+        get_box_score(offline, "124")
+
+    # Without the cache nothing can be fetched
+    with pytest.raises(FetchError):
+        HttpFetcher(base_url=site, retries=0).get("/teams/90")
+
+
+def test_revalidate_stale_pages(site, tmp_path):
+    cache = PageCache(tmp_path)
+    fetcher = CachingFetcher(
+        HttpFetcher(base_url=site), cache, ttls={"team": 0, "other": 0}
+    )
+    html = fetcher.get("/teams/90")
+    entry = cache.lookup(f"{site}/teams/90")
+    assert entry["last_modified"] is not None
+
+    # http.server answers If-Modified-Since with 304, the body comes from
+    # the cache and the entry counts as just fetched
+    page = fetcher.fetch("/teams/90")
+    assert page.text == html
+    assert fetcher.misses == 2
+    assert cache.lookup(f"{site}/teams/90")["fetched_at"] > entry["fetched_at"]
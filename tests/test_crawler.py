@@ -0,0 +1,67 @@
+import pytest
+
+from mbp.cache import CachingFetcher, PageCache
+from mbp.crawler import crawl_season
+from mbp.fetchers import HttpFetcher
+
+
+@pytest.fixture
+def page_cache(tmp_path, monkeypatch):
+    """
+    Cache the crawled pages under tmp_path instead of the data directory
+    """
+    import mbp.crawler
+
+    cache = PageCache(tmp_path / "pages")
+    monkeypatch.setattr(
+        mbp.crawler,
+        "CachingFetcher",
+        lambda fetcher, season: CachingFetcher(fetcher, cache, season=season),
+    )
+    return cache
+
+
+def test_crawl_season_stores_every_table(site, store, registry, page_cache):
+    with HttpFetcher(base_url=site, retries=0) as fetcher:
+        report = crawl_season(
+            2022, workers=2, rate=100, teams=["Arizona", "Duke"], fetcher=fetcher
+        )
+
+    # Duke's pages aren't recorded
+    assert report.teams == 2
+    assert list(report.failed) == ["Duke"]
+    # The team's season page is fetched once for its three tables
+    assert report.pages > 0 and report.cached_pages > 0
+    assert page_cache.lookup(f"{site}/teams/90") is not None
+    for table in ["games", "stats", "roster"]:
+        assert store.keys(table, 2022) == {"Arizona"}
+    games = store.read("games", 2022)
+    assert games["contest_id"].dropna().tolist() == ["123", "124"]
+    assert games["opponent"].astype(str).tolist()[1] == "Duke"
+
+
+def test_crawl_season_skips_saved_tables(site, store, registry, page_cache):
+    with HttpFetcher(base_url=site, retries=0) as fetcher:
+        crawl_season(2022, rate=100, teams=["Arizona"], fetcher=fetcher)
+        stats = store.read("stats", 2022)
+
+        again = crawl_season(2022, rate=100, teams=["Arizona"], fetcher=fetcher)
+        assert (again.pages, again.cached_pages) == (0, 0)
+
+        # Forced crawls of a past season read the cached pages
+        forced = crawl_season(
+            2022, rate=100, teams=["Arizona"], fetcher=fetcher, force=True
+        )
+        assert forced.pages == 0 and forced.cached_pages > 0
+        assert forced.failed == {}
+    assert store.read("stats", 2022).equals(stats)
+
+
+def test_crawl_season_in_batches(site, store, registry, page_cache):
+    with HttpFetcher(base_url=site, retries=0) as fetcher:
+        report = crawl_season(
+            2022, rate=100, teams=["Arizona", "Gonzaga"], fetcher=fetcher, batch_size=1
+        )
+    assert list(report.failed) == ["Gonzaga"]
+    assert store.keys("roster", 2022) == {"Arizona"}
+    assert "Crawled 2 teams for 2022" in str(report)
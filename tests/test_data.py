@@ -0,0 +1,23 @@
+import pytest
+
+from mbp.data import download_game_data, get_saved_box_score
+from mbp.fetchers import HttpFetcher
+
+
+def test_download_game_data_saves_in_the_store(site, store, registry):
+    with HttpFetcher(base_url=site) as fetcher:
+        box_score = download_game_data("Arizona", "Duke", 2022, fetcher=fetcher)
+        assert set(box_score["contest_id"]) == {"124"}
+        assert set(box_score["team"]) == {"#5 Arizona", "Duke"}
+        assert store.keys("box_scores", 2022) == {"124"}
+        assert not list(store.root.parent.glob("**/*.csv"))
+
+        by_day = download_game_data(
+            "Arizona", "Phoenix", 2022, "2022-11-07", fetcher=fetcher
+        )
+        assert set(by_day["contest_id"]) == {"123"}
+        with pytest.raises(ValueError):
+            download_game_data("Arizona", "Phoenix", 2022, "2022-11-08", fetcher)
+
+    saved = get_saved_box_score("124", 2022)
+    assert saved["player"].tolist() == box_score["player"].tolist()
@@ -0,0 +1,64 @@
+import pandas as pd
+
+from mbp.data import save_box_scores, save_team_table
+from mbp.features import update_team_features
+
+
+def team_line(team: str, contest_id: str, points: int) -> dict:
+    return {
+        "player": f"{team} player",
+        "mp": "200:00",
+        "fgm": 30,
+        "fga": 60,
+        "3fg": 8,
+        "3fga": 20,
+        "ft": points - 68,
+        "fta": 20,
+        "pts": points,
+        "orebs": 10,
+        "drebs": 25,
+        "to": 12,
+        "team": team,
+        "contest_id": contest_id,
+    }
+
+
+def team_games(team: str, opponent: str, home: int, scores: tuple) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "opponent": [opponent],
+            "datetime": [pd.Timestamp("2022-11-10 20:00")],
+            "result": [f"{scores[0]}-{scores[1]}"],
+            "contest_id": ["124"],
+            "win": [float(scores[0] > scores[1])],
+            "home": [home],
+            "team_score": [scores[0]],
+            "opp_score": [scores[1]],
+        }
+    )
+
+
+def test_both_teams_of_a_game_synced_separately(store, registry):
+    save_box_scores(
+        2022,
+        [pd.DataFrame([team_line("Arizona", "124", 80), team_line("Duke", "124", 75)])],
+    )
+
+    # Arizona syncs first, Duke's schedule doesn't have the game yet
+    save_team_table(
+        "games", "Arizona", 2022, team_games("Arizona", "Duke", 0, (80, 75))
+    )
+    added = update_team_features(2022)
+    assert added[["team", "contest_id"]].values.tolist() == [["Arizona", "124"]]
+
+    save_team_table("games", "Duke", 2022, team_games("Duke", "Arizona", 1, (75, 80)))
+    added = update_team_features(2022)
+    assert added[["team", "contest_id"]].values.tolist() == [["Duke", "124"]]
+
+    features = store.read("team_features", 2022).sort_values("team")
+    assert features["team"].astype(str).tolist() == ["Arizona", "Duke"]
+    # Each side's offense is the other's defense
+    (arizona, duke) = (features.iloc[0], features.iloc[1])
+    assert arizona["off_eff"] == duke["def_eff"]
+    assert duke["off_eff"] == arizona["def_eff"]
+    assert update_team_features(2022).empty
@@ -0,0 +1,147 @@
+import time
+
+import pandas as pd
+import pytest
+
+from mbp.fetchers import (
+    FallbackFetcher,
+    Fetcher,
+    FetchError,
+    HttpFetcher,
+    Page,
+    RateLimitedFetcher,
+    RateLimiter,
+)
+from mbp.teams import TeamRegistry
+from mbp.webscraping import get_team_name_to_ids, get_team_stats
+
+from tests.conftest import SITE_DIR
+
+
+class FileFetcher(Fetcher):
+    """
+    Stands in for the browser, serves the recorded pages from disk (as if
+    they had rendered whatever was expected) and remembers what it was
+    asked for
+    """
+
+    def __init__(self, base_url: str = None) -> None:
+        super().__init__(base_url)
+        self.urls = []
+
+    def fetch(self, url, params=None, expect=None, headers=None) -> Page:
+        self.urls.append(url)
+        path = SITE_DIR / url.split("?")[0].strip("/")
+        if not path.is_file():
+            raise FetchError(url, "Not found", 404)
+        self.count_page()
+        return Page(self.absolute_url(url), 200, path.read_text())
+
+
+@pytest.fixture
+def teams():
+    return TeamRegistry(
+        pd.DataFrame({"team_name": ["Arizona", "Duke"], "team_id": [100, 300]})
+    )
+
+
+def test_http_fetcher(site):
+    with HttpFetcher(base_url=site) as fetcher:
+        page = fetcher.fetch("/teams/90", expect="a[target=ATHLETICS_URL]")
+        assert page.status == 200
+        assert page.url == f"{site}/teams/90"
+        assert "Schedule/Results" in page.text
+        # Query params don't change which recorded page is served
+        html = fetcher.get("/contests/livestream_scoreboards", {"game_date": "x"})
+        assert "Box Score" in html
+        assert fetcher.resolve("/teams/100") == f"{site}/teams/100"
+        assert fetcher.pages_fetched == 3
+
+
+def test_http_fetcher_errors(site):
+    with HttpFetcher(base_url=site, retries=0) as fetcher:
+        with pytest.raises(FetchError) as error:
+            fetcher.fetch("/teams/1")
+        assert error.value.status == 404
+        with pytest.raises(FetchError, match="missing table#stat_grid"):
+            fetcher.fetch("/teams/90", expect="table#stat_grid")
+
+
+def test_http_fetcher_rewrites_absolute_links(site):
+    fetcher = HttpFetcher(base_url=site)
+    html = fetcher.get("https://stats.ncaa.org/team/1/roster/90")
+    assert "Doe, John" in html
+
+
+def test_scrape_through_http(site, teams):
+    with HttpFetcher(base_url=site) as fetcher:
+        # The 2023-24 team page links to the 2022-23 one
+        stats = get_team_stats(fetcher, teams, "Arizona", 2022)
+        assert stats["player"].tolist() == ["Doe, John"]
+        assert stats["year"].tolist() == [3]
+        assert get_team_name_to_ids(fetcher, workers=2) == {
+            "Arizona": "100",
+            "Duke": "300",
+            "Phoenix": "200",
+        }
+
+
+def test_fallback_when_the_page_is_incomplete(site):
+    fetcher = FallbackFetcher(
+        HttpFetcher(base_url=site), fallback_factory=FileFetcher, base_url=site
+    )
+    page = fetcher.fetch("/teams/90", expect="a[target=ATHLETICS_URL]")
+    # The browser isn't started while plain HTTP works
+    assert fetcher._fallback is None
+    assert page.url == f"{site}/teams/90"
+
+    # Plain HTTP gets the page without the table, the browser renders it
+    page = fetcher.fetch("/team/1/stats/90", expect="table#rendered")
+    assert fetcher.fallback.urls == ["/team/1/stats/90"]
+    assert "Doe, John" in page.text
+    assert fetcher.pages_fetched == 2
+    fetcher.close()
+
+
+def test_fallback_not_for_missing_pages(site):
+    fetcher = FallbackFetcher(
+        HttpFetcher(base_url=site, retries=0),
+        fallback_factory=FileFetcher,
+        base_url=site,
+    )
+    with pytest.raises(FetchError) as error:
+        fetcher.fetch("/teams/1")
+    assert error.value.status == 404
+    assert fetcher._fallback is None
+
+
+def test_fallback_js_paths(site):
+    fetcher = FallbackFetcher(
+        HttpFetcher(base_url=site),
+        fallback_factory=FileFetcher,
+        js_paths=["/players/"],
+        base_url=site,
+    )
+    fetcher.get("/players/90")
+    fetcher.get("/teams/90")
+    assert fetcher.fallback.urls == ["/players/90"]
+
+
+def test_rate_limited_fetcher(site):
+    limiter = RateLimiter(rate=20, burst=2)
+    fetcher = RateLimitedFetcher(HttpFetcher(base_url=site), limiter)
+    start = time.monotonic()
+    for _ in range(6):
+        fetcher.get("/team/1/roster/90")
+    # Two requests go through at once, the other four wait 50ms each
+    assert time.monotonic() - start >= 0.19
+    assert fetcher.pages_fetched == 6
+    assert fetcher.fetcher.pages_fetched == 6
+    assert fetcher.base_url == site
+
+
+def test_fallback_js_paths_not_shared(site):
+    first = FallbackFetcher(HttpFetcher(base_url=site), base_url=site)
+    first.js_paths.append("/players/")
+    second = FallbackFetcher(HttpFetcher(base_url=site), base_url=site)
+    assert second.js_paths == []
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+from mbp.frames import FrameCache, frame_nbytes
+
+
+def frame(rows: int) -> pd.DataFrame:
+    return pd.DataFrame({"x": np.arange(rows, dtype="int64")})
+
+
+def loader(df: pd.DataFrame, loads: list):
+    def load() -> pd.DataFrame:
+        loads.append(1)
+        return df
+
+    return load
+
+
+def test_frames_are_read_again_at_a_new_version():
+    cache = FrameCache(2**20)
+    loads = []
+    first = cache.get(("games", 2023), 1, loader(frame(10), loads))
+    assert cache.get(("games", 2023), 1, loader(frame(20), loads)) is first
+    assert len(cache.get(("games", 2023), 2, loader(frame(20), loads))) == 20
+    assert len(loads) == 2
+    assert (cache.stats.hits, cache.stats.misses) == (1, 2)
+    assert cache.stats.nbytes == frame_nbytes(frame(20))
+    assert len(cache) == 1
+
+
+def test_least_recently_used_frames_are_evicted_over_the_budget():
+    nbytes = frame_nbytes(frame(100))
+    cache = FrameCache(3 * nbytes)
+    for name in ["a", "b", "c"]:
+        cache.put((name,), 1, frame(100))
+    # Using "a" makes "b" the oldest
+    loads = []
+    cache.get(("a",), 1, loader(frame(100), loads))
+    cache.put(("d",), 1, frame(100))
+
+    assert list(cache._frames) == [("c",), ("a",), ("d",)]
+    assert loads == []
+    assert cache.stats.evictions == 1
+    assert cache.stats.frames == 3
+    assert cache.stats.nbytes == 3 * nbytes <= cache.max_bytes
+
+    # A bigger frame pushes out as many as it takes
+    cache.put(("e",), 1, frame(200))
+    assert list(cache._frames) == [("d",), ("e",)]
+    assert cache.stats.nbytes == nbytes + frame_nbytes(frame(200))
+
+
+def test_frames_over_the_budget_are_not_kept():
+    cache = FrameCache(frame_nbytes(frame(100)))
+    cache.put(("a",), 1, frame(100))
+    loads = []
+    big = cache.get(("b",), 1, loader(frame(1000), loads))
+    assert len(big) == 1000
+    # It doesn't push out the frames which fit
+    assert list(cache._frames) == [("a",)]
+    assert cache.stats.evictions == 0
+
+    # Replacing a frame with one too big drops the old one
+    cache.put(("a",), 2, frame(1000))
+    assert len(cache) == 0 and cache.stats.nbytes == 0
+
+
+def test_invalidate():
+    cache = FrameCache(2**20)
+    for name in ["a", "b"]:
+        cache.put((name,), 1, frame(10))
+    cache.invalidate(("a",))
+    assert list(cache._frames) == [("b",)]
+    assert cache.stats.nbytes == frame_nbytes(frame(10))
+    cache.invalidate()
+    assert len(cache) == 0 and cache.stats.nbytes == 0 and cache.stats.frames == 0
+
+
+def test_budget_from_the_environment(monkeypatch):
+    import mbp.frames
+
+    monkeypatch.setattr(mbp.frames, "_frame_cache", None)
+    monkeypatch.setenv("MBP_FRAME_CACHE_MB", "1.5")
+    assert mbp.frames.get_frame_cache().max_bytes == int(1.5 * 2**20)
@@ -0,0 +1,22 @@
+import pandas as pd
+
+from mbp.harvest import dedupe_contests
+
+
+def test_dedupe_contests_keeps_the_same_row_in_any_order():
+    contests = pd.DataFrame(
+        {
+            "date": ["11/07/2022", "11/07/2022", "11/10/2022", "11/10/2022", "12/20"],
+            "team": ["Phoenix", "Arizona", "Duke", "Arizona", "Arizona"],
+            "opponent": ["Arizona", "Phoenix", "Arizona", "Duke", "Gonzaga"],
+            "home": [0, 1, 1, 0, 0],
+            "contest_id": ["123", "123", "124", "124", None],
+        }
+    )
+    expected = dedupe_contests(contests)
+    assert expected["contest_id"].tolist() == ["123", "124"]
+    assert expected["team"].tolist() == ["Arizona", "Arizona"]
+
+    for seed in range(5):
+        shuffled = contests.sample(frac=1, random_state=seed)
+        pd.testing.assert_frame_equal(dedupe_contests(shuffled), expected)
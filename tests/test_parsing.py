@@ -0,0 +1,145 @@
+import pandas as pd
+import pytest
+
+from mbp.parsing import (
+    cell_text,
+    contest_id_from_url,
+    find_link,
+    find_season_url,
+    make_soup,
+    parse_box_score,
+    parse_game_by_game,
+    parse_roster,
+    parse_schedule,
+    parse_scoreboard,
+    parse_stat_grid,
+    parse_team_list,
+)
+
+
+def test_cell_text_renders_like_selenium():
+    soup = make_soup("<td>  #5 Arizona  <br/>@   Phoenix </td>")
+    assert cell_text(soup.td) == "#5 Arizona\n@ Phoenix"
+    assert cell_text(None) == ""
+
+
+def test_parse_stat_grid(page):
+    stats = parse_stat_grid(page("team/1/stats/90"))
+    assert list(stats.columns) == ["jersey", "player", "yr", "pos", "ht", "gp", "pts"]
+    assert stats.iloc[0].tolist() == ["1", "Doe, John", "Jr", "G", "6-3", "30", "300"]
+
+
+def test_parse_roster(page):
+    roster = parse_roster(page("team/1/roster/90"))
+    expected = pd.DataFrame(
+        [["1", "Doe, John", "G", "6-3", "Jr", "30", "20"]],
+        columns=[
+            "jersey",
+            "player",
+            "position",
+            "height",
+            "year",
+            "games_played",
+            "games_scored",
+        ],
+    )
+    pd.testing.assert_frame_equal(roster, expected)
+
+
+def test_parse_box_score(page):
+    (team1, stats1, team2, stats2) = parse_box_score(page("contests/123/box_score"))
+    assert (team1, team2) == ("Phoenix", "#5 Arizona")
+    assert list(stats1.columns) == ["player", "pos", "mp", "pts", "team"]
+    assert stats1["player"].tolist() == ["Roe, Jim", "Poe, Al"]
+    # Empty cells stay empty strings, the TEAM row is dropped
+    assert stats1.loc[1, "pts"] == ""
+    assert stats2["player"].tolist() == ["Doe, John"]
+    assert (stats2["team"] == "#5 Arizona").all()
+
+
+def test_parse_pages_without_tables():
+    with pytest.raises(ValueError):
+        parse_stat_grid("<html></html>")
+    with pytest.raises(ValueError):
+        parse_box_score("<html><table></table></html>")
+    with pytest.raises(ValueError):
+        parse_schedule("<html></html>")
+
+
+def test_parse_schedule(page):
+    assert parse_schedule(page("teams/90")) == [
+        ("11/07/2022", "Phoenix", "W 85-60", "10,000", "123"),
+        ("11/10/2022", "@ #12 Duke", "L 60-70", None, "124"),
+        ("12/20/2022 07:00 PM", "Gonzaga\n@ Las Vegas, NV", None, None, None),
+    ]
+
+
+def test_find_season_url(page):
+    # The 2023-24 page links to the 2022-23 one
+    assert find_season_url(page("teams/100"), "2022-23") == ("/teams/90", False)
+    assert find_season_url(page("teams/90"), "2022-23") == ("/teams/90", True)
+    assert find_season_url(page("teams/90"), "1999-00") == (None, False)
+
+
+def test_find_link(page):
+    html = page("teams/90")
+    assert find_link(html, "Team Statistics") == "/team/1/stats/90"
+    assert find_link(html, "Nothing") is None
+
+
+def test_parse_game_by_game(page):
+    games = parse_game_by_game(page("players/90"))
+    # The heading and totals rows are skipped
+    assert [cells[1] for (cells, _) in games] == [
+        "Phoenix",
+        "@ #12 Duke",
+        "Gonzaga @ Las Vegas, NV",
+    ]
+    assert games[0][1][2] == "/contests/123/box_score"
+    assert games[2][1] == []
+
+
+@pytest.mark.parametrize(
+    ("url", "contest_id"),
+    [
+        ("/contests/123/box_score", "123"),
+        ("https://stats.ncaa.org/game/index/456?org_id=1", "456"),
+        ("/game/box_score?game_id=789", "789"),
+        ("/teams/100", None),
+        (None, None),
+    ],
+)
+def test_contest_id_from_url(url, contest_id):
+    assert contest_id_from_url(url) == contest_id
+
+
+def test_parse_scoreboard(page, caplog):
+    contests = parse_scoreboard(page("contests/livestream_scoreboards"))
+    assert [c["contest_id"] for c in contests] == ["123", "124", "125", "126"]
+    assert contests[0] == {
+        "contest_id": "123",
+        "box_score_url": "/contests/123/box_score",
+        "away_team": "Phoenix",
+        "away_team_id": "200",
+        "away_score": 60,
+        "home_team": "#5 Arizona",
+        "home_team_id": "100",
+        "home_score": 85,
+        "neutral": False,
+        "final": True,
+    }
+    # Scores without a totals column come from the last numeric cell
+    assert (contests[1]["away_score"], contests[1]["home_score"]) == (60, 70)
+    assert not contests[2]["final"]
+    assert contests[2]["home_score"] is None
+    assert contests[3]["neutral"]
+    # A contest without both teams is skipped, but not silently
+    assert "contest 127" in caplog.text
+
+
+def test_parse_team_list(page):
+    assert parse_team_list(page("team/inst_team_list")) == {
+        "Arizona": "/teams/100",
+        "Duke": "/teams/300",
+        "Phoenix": "/teams/200",
+    }
@@ -0,0 +1,60 @@
+import pandas as pd
+
+from mbp.data import box_score_hashes, save_box_scores
+from mbp.player_log import update_player_log
+
+
+def box_score(contest_id: str, points: list, **columns) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "player": ["Doe, John", "Roe, Jim"],
+            "pos": ["G", "F"],
+            "mp": ["30:00", "20:00"],
+            "pts": points,
+            "team": ["Arizona", "Duke"],
+            "contest_id": contest_id,
+            **columns,
+        }
+    )
+
+
+def player_points(store) -> dict:
+    totals = store.read("player_totals", 2022)
+    return dict(zip(totals["player"], zip(totals["games"], totals["pts"])))
+
+
+def test_box_score_hashes_ignore_empty_columns():
+    hashes = box_score_hashes(box_score("1", [10, 5]))
+    widened = pd.concat([box_score("1", [10, 5]), box_score("2", [1, 1], blk=[1, 0])])
+    assert box_score_hashes(widened)["1"] == hashes["1"]
+    assert box_score_hashes(box_score("1", [10, 6]))["1"] != hashes["1"]
+
+
+def test_corrected_box_scores_are_logged_again(store, registry, monkeypatch):
+    save_box_scores(2022, [box_score("1", [10, 5]), box_score("2", [20, 7])])
+    assert len(update_player_log(2022)) == 4
+    assert player_points(store) == {"Doe, John": (2, 30), "Roe, Jim": (2, 12)}
+
+    # Nothing changed, nothing to log, and the box scores aren't read
+    reads = []
+    read = store.read
+    monkeypatch.setattr(
+        store,
+        "read",
+        lambda table, *a, **kw: reads.append(table) or read(table, *a, **kw),
+    )
+    assert update_player_log(2022).empty
+    assert "box_scores" not in reads
+
+    # A corrected box score replaces what was logged for it
+    save_box_scores(2022, [box_score("2", [22, 7])])
+    log = update_player_log(2022)
+    assert set(log["contest_id"]) == {"2"}
+    assert set(store.read("box_score_hashes", 2022)["contest_id"]) == {"1", "2"}
+    assert player_points(store) == {"Doe, John": (2, 32), "Roe, Jim": (2, 12)}
+    assert len(store.read("player_games", 2022)) == 4
+
+    # A new box score with a column the others don't have only logs itself
+    save_box_scores(2022, [box_score("3", [1, 1], blk=[1, 0])])
+    assert set(update_player_log(2022)["contest_id"]) == {"3"}
+    assert player_points(store) == {"Doe, John": (3, 33), "Roe, Jim": (3, 13)}
@@ -0,0 +1,91 @@
+import pandas as pd
+
+from mbp.players import (
+    PLAYER_GAME_COLUMNS,
+    normalize_player_names,
+    player_games,
+    season_player_games,
+)
+
+
+def test_normalize_player_names():
+    names = pd.Series(
+        [
+            "Doe, John Jr.",
+            "john doe",
+            "DOE, JOHN JR.",
+            "O'Neal, Shaq",
+            "Smith-Jones, A.J. III",
+        ]
+    )
+    assert normalize_player_names(names).tolist() == [
+        "john doe",
+        "john doe",
+        "john doe",
+        "shaq oneal",
+        "aj smith jones",
+    ]
+
+
+BOX_SCORES = pd.DataFrame(
+    {
+        "contest_id": ["123", "123", "123", "124", "124"],
+        "team": ["#5 Arizona", "#5 Arizona", "#5 Arizona", "Arizona", "Duke"],
+        "player": [
+            "Doe, John",
+            "Smith, Al",
+            "Walk On, Sam",
+            "DOE, JOHN JR.",
+            "Day, Ed",
+        ],
+        "pos": ["G", "", "", "G", "F"],
+        "mp": [32.5, 12.0, None, 30.0, 25.0],
+    }
+)
+
+ROSTERS = pd.DataFrame(
+    {
+        "team": ["Arizona", "Arizona", "Arizona", "Duke"],
+        "player": ["John Doe", "Al Smith", "Al Smith", "Ed Day"],
+        "jersey": ["00", "12", "12", "3"],
+        "position": ["G", "F", "F", "F"],
+        "year": ["Sr", "Fr", "Fr", "Jr"],
+    }
+)
+
+
+def test_player_games_join_box_scores_to_rosters(registry):
+    players = player_games(BOX_SCORES, ROSTERS, registry)
+    assert list(players.columns) == PLAYER_GAME_COLUMNS
+    # One row per line, in the order of the box scores
+    assert players["player"].tolist() == BOX_SCORES["player"].tolist()
+    assert players["team"].tolist() == ["Arizona"] * 4 + ["Duke"]
+
+    assert players["on_roster"].tolist() == [True, True, False, True, True]
+    assert players["jersey"].tolist()[:2] == ["00", "12"]
+    assert pd.isna(players["jersey"].iloc[2])
+    # Spelled differently in the two games, the same player
+    assert players["player_key"].iloc[0] == players["player_key"].iloc[3]
+    assert players["year"].iloc[3] == "Sr"
+
+    assert players["starter"].tolist() == [True, False, False, True, True]
+    assert players["played"].tolist() == [True, True, False, True, True]
+    assert players["minutes"].iloc[1] == 12.0
+
+
+def test_player_games_without_positions_or_roster_fields(registry):
+    box_scores = BOX_SCORES.drop(columns=["pos", "mp"]).assign(min=0.0)
+    rosters = ROSTERS[["team", "player"]]
+    players = player_games(box_scores, rosters, registry)
+    assert not players["starter"].any() and not players["played"].any()
+    assert players["position"].isna().all()
+    assert players["on_roster"].sum() == 4
+
+
+def test_season_player_games(store, registry):
+    assert season_player_games(2022, registry).empty
+
+    store.write("box_scores", 2022, BOX_SCORES)
+    # Without rosters nobody is on one
+    players = season_player_games(2022, registry)
+    assert len(players) == 5 and not players["on_roster"].any()
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mbp.predict import MatchupMatrix, predict_with
+from mbp.ratings import Ratings
+
+
+def team_ratings(net: dict, elo: dict = None, pace: float = 68.0) -> Ratings:
+    teams = pd.Index(list(net))
+    offense = np.array([net[team] for team in teams], dtype=float)
+    elo = elo or {team: 1500 + 10 * net[team] for team in teams}
+    return Ratings(
+        as_of=pd.Timestamp("2024-01-15"),
+        teams=teams,
+        games=np.full(len(teams), 15),
+        offense=offense,
+        defense=np.zeros(len(teams)),
+        elo=np.array([elo[team] for team in teams], dtype=float),
+        home_court=3.0,
+        pace=pace,
+    )
+
+
+def assert_same_matchups(matrix: MatchupMatrix, fresh: MatchupMatrix):
+    for values in ["margins", "probabilities", "elo_probabilities"]:
+        pd.testing.assert_frame_equal(
+            matrix.frame(fresh.teams, values), fresh.frame(values=values)
+        )
+
+
+def test_updated_matrix_matches_a_new_one():
+    matrix = MatchupMatrix(
+        team_ratings({"Arizona": 20.0, "Duke": 18.0, "Gonzaga": 15.0, "Purdue": 22.0})
+    )
+    assert len(matrix) == 4
+
+    # Two teams move and a new one is rated
+    later = team_ratings(
+        {"Arizona": 21.5, "Duke": 18.0, "Gonzaga": 13.0, "Purdue": 22.0, "Utah": 9.0}
+    )
+    assert matrix.update(later) == 3
+    assert_same_matchups(matrix, MatchupMatrix(later))
+    assert matrix.update(later) == 0
+
+    # A new pace changes every margin
+    faster = team_ratings(
+        {"Arizona": 21.5, "Duke": 18.0, "Gonzaga": 13.0, "Purdue": 22.0, "Utah": 9.0},
+        pace=71.0,
+    )
+    assert matrix.update(faster) == 5
+    assert_same_matchups(matrix, MatchupMatrix(faster))
+
+
+def test_matrix_agrees_with_predictions():
+    ratings = team_ratings({"Arizona": 20.0, "Duke": 18.0, "Purdue": 22.0})
+    matrix = MatchupMatrix(ratings)
+    expected = predict_with(ratings, ["Purdue", "Duke"], ["Arizona", "Purdue"], True)
+    found = matrix.lookup(["Purdue", "Duke"], ["Arizona", "Purdue"])
+    np.testing.assert_allclose(found["margin"], expected["margin"])
+    np.testing.assert_allclose(found["win_probability"], expected["win_probability"])
+    np.testing.assert_allclose(found["elo_probability"], expected["elo_probability"])
+
+    # The two sides of a game add up
+    frame = matrix.frame()
+    np.testing.assert_allclose(frame + frame.T, 1.0)
+
+
+def test_unknown_teams():
+    matrix = MatchupMatrix(team_ratings({"Arizona": 20.0, "Duke": 18.0}))
+    assert matrix.lookup("Arizona", "Nowhere State")["margin"].isna().all()
+    with pytest.raises(KeyError, match="Nowhere State"):
+        matrix.frame(["Arizona", "Nowhere State"])
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+from mbp.ratings import DEFAULT_PACE, RatingSystem
+
+
+def season_games(poss: list) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "datetime": pd.date_range("2023-11-06", periods=len(poss)),
+            "home_team": ["Arizona", "Duke", "Gonzaga", "Purdue"][: len(poss)],
+            "away_team": ["Duke", "Gonzaga", "Purdue", "Arizona"][: len(poss)],
+            "home_score": [80, 70, 75, 65][: len(poss)],
+            "away_score": [70, 72, 60, 68][: len(poss)],
+            "neutral": 0,
+            "poss": poss,
+        }
+    )
+
+
+def test_missing_possessions_only_use_earlier_games():
+    system = RatingSystem(season_games([np.nan, 66.0, np.nan, 80.0]))
+    later = RatingSystem(season_games([np.nan, 66.0, np.nan, 50.0]))
+
+    # The first game has no earlier possessions, the third only the second's
+    assert list(system._pace) == [DEFAULT_PACE, 68.0, 202 / 3, 70.5]
+    np.testing.assert_array_equal(system._pace[:3], later._pace[:3])
+    assert system.ratings_from("2023-11-06", np.zeros(10), np.zeros(4), 0).pace == (
+        DEFAULT_PACE
+    )
+
+
+def team_rows(day: str, contest_id: str, home: str, away: str, scores: tuple):
+    (home_score, away_score) = scores
+    return pd.DataFrame(
+        {
+            "team": [home, away],
+            "opponent": [away, home],
+            "datetime": pd.Timestamp(day),
+            "home": [1, 0],
+            "team_score": [home_score, away_score],
+            "opp_score": [away_score, home_score],
+            "result": ["W", "L"] if home_score > away_score else ["L", "W"],
+            "contest_id": contest_id,
+        }
+    )
+
+
+def test_a_new_day_of_games_extends_the_rating_system(store, registry, monkeypatch):
+    import mbp.ratings
+
+    monkeypatch.setattr(mbp.ratings, "_systems", {})
+    days = [
+        team_rows("2023-11-06 19:00", "1", "Arizona", "Duke", (80, 70)),
+        team_rows("2023-11-06 21:00", "2", "Gonzaga", "Purdue", (75, 60)),
+        team_rows("2023-11-08 19:00", "3", "Duke", "Gonzaga", (70, 72)),
+    ]
+    store.write("games", 2023, pd.concat(days, ignore_index=True))
+    system = mbp.ratings.get_rating_system(2023)
+    assert len(system.games) == 3
+
+    built = []
+    init = RatingSystem.__init__
+    monkeypatch.setattr(
+        RatingSystem,
+        "__init__",
+        lambda self, *a, **kw: built.append(1) or init(self, *a, **kw),
+    )
+    days.append(team_rows("2023-11-10 19:00", "4", "Purdue", "Arizona", (65, 68)))
+    store.write("games", 2023, pd.concat(days, ignore_index=True))
+    extended = mbp.ratings.get_rating_system(2023)
+    assert built == []
+    assert len(extended.games) == 4 and len(system.games) == 3
+
+    # The same system as one built from every game
+    fresh = RatingSystem(mbp.ratings.rating_games(2023))
+    assert (extended._matrix != fresh._matrix).nnz == 0
+    np.testing.assert_array_equal(extended._target, fresh._target)
+    np.testing.assert_array_equal(extended._pace, fresh._pace)
+    day = pd.Timestamp("2023-11-11")
+    np.testing.assert_allclose(
+        extended.ratings(day).offense, fresh.ratings(day).offense
+    )
+
+    # A corrected score keeps the games before it and adds the rest again
+    days[2] = team_rows("2023-11-08 19:00", "3", "Duke", "Gonzaga", (71, 72))
+    store.write("games", 2023, pd.concat(days, ignore_index=True))
+    corrected = mbp.ratings.get_rating_system(2023)
+    assert extended.same_games(corrected.games) == 2
+    assert corrected.games["home_score"].tolist() == [80, 75, 71, 65]
+    # Only `fresh` was built from scratch
+    assert built == [1]
@@ -0,0 +1,102 @@
+import pandas as pd
+import pytest
+
+from mbp.schedule import ScheduleIndex
+
+
+@pytest.fixture
+def schedule() -> ScheduleIndex:
+    games = [
+        ("1", "Arizona", "Duke", "2023-11-06 19:00"),
+        # Tips off exactly at midnight
+        ("2", "Arizona", "Purdue", "2023-11-10 00:00"),
+        # Either side of midnight
+        ("3", "Arizona", "Gonzaga", "2023-11-12 23:30"),
+        ("4", "Duke", "Purdue", "2023-11-13 00:30"),
+        # Not scheduled yet
+        ("5", "Gonzaga", "Purdue", None),
+    ]
+    rows = []
+    for contest_id, home, away, datetime in games:
+        rows.append((contest_id, home, away, datetime))
+        rows.append((contest_id, away, home, datetime))
+    table = pd.DataFrame(rows, columns=["contest_id", "team", "opponent", "datetime"])
+    return ScheduleIndex(table.assign(datetime=pd.to_datetime(table["datetime"])))
+
+
+def contest_ids(games: pd.DataFrame) -> list:
+    return games["contest_id"].tolist()
+
+
+def test_games_at_midnight_belong_to_their_day(schedule):
+    assert len(schedule) == 8
+    assert schedule.next_game("Arizona", "2023-11-09")["contest_id"] == "2"
+    assert schedule.previous_game("Arizona", "2023-11-10")["contest_id"] == "1"
+    assert schedule.previous_game("Arizona", "2023-11-11")["contest_id"] == "2"
+    assert contest_ids(schedule.games_on("2023-11-10")) == ["2", "2"]
+    assert schedule.games_on("2023-11-09").empty
+    assert contest_ids(schedule.games_on("2023-11-10", "Purdue")) == ["2"]
+
+
+def test_first_and_last_games(schedule):
+    assert contest_ids(schedule.team_games("Arizona")) == ["1", "2", "3"]
+    assert schedule.previous_game("Arizona", "2023-11-06") is None
+    assert schedule.next_game("Arizona", "2023-11-05")["contest_id"] == "1"
+    assert schedule.next_game("Arizona", "2023-11-12") is None
+    # Days outside of the season
+    assert schedule.next_game("Duke", "2023-01-01")["contest_id"] == "1"
+    assert schedule.previous_game("Purdue", "2024-04-01")["contest_id"] == "4"
+    assert schedule.next_game("Purdue", "2023-11-13") is None
+    assert schedule.previous_game("Gonzaga", "2023-11-12") is None
+    assert schedule.next_game("Gonzaga", "2023-11-12") is None
+
+
+def test_unknown_teams(schedule):
+    assert schedule.next_game("Nowhere State", "2023-11-09") is None
+    assert schedule.previous_game("Nowhere State", "2023-11-09") is None
+    assert schedule.team_games("Nowhere State").empty
+    assert schedule.games_on("2023-11-10", "Nowhere State").empty
+    next_games = schedule.next_games("2023-11-09", ["Nowhere State", "Duke"])
+    assert next_games[["team", "contest_id"]].values.tolist() == [["Duke", "4"]]
+
+
+def test_games_on_either_side_of_midnight(schedule):
+    late = schedule.games_on("2023-11-12")
+    assert late[["team", "contest_id"]].values.tolist() == [
+        ["Arizona", "3"],
+        ["Gonzaga", "3"],
+    ]
+    early = schedule.games_on("2023-11-13")
+    assert early[["team", "contest_id"]].values.tolist() == [
+        ["Duke", "4"],
+        ["Purdue", "4"],
+    ]
+    assert schedule.games_on("2023-11-12", "Duke").empty
+    assert contest_ids(schedule.games_on("2023-11-13", "Duke")) == ["4"]
+
+
+def test_every_teams_next_and_previous_games(schedule):
+    next_games = schedule.next_games("2023-11-09")
+    assert next_games[["team", "contest_id"]].values.tolist() == [
+        ["Arizona", "2"],
+        ["Duke", "4"],
+        ["Gonzaga", "3"],
+        ["Purdue", "2"],
+    ]
+    previous_games = schedule.previous_games("2023-11-13")
+    assert previous_games[["team", "contest_id"]].values.tolist() == [
+        ["Arizona", "3"],
+        ["Duke", "1"],
+        ["Gonzaga", "3"],
+        ["Purdue", "2"],
+    ]
+    assert schedule.next_games("2023-11-13").empty
+    assert schedule.previous_games("2023-11-06").empty
+
+
+def test_empty_schedule():
+    empty = pd.DataFrame({"team": [], "contest_id": [], "datetime": pd.to_datetime([])})
+    schedule = ScheduleIndex(empty)
+    assert schedule.next_game("Arizona", "2023-11-09") is None
+    assert schedule.games_on("2023-11-09").empty
+    assert schedule.next_games("2023-11-09").empty
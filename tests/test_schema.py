@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+from mbp.schema import SchemaError, apply_schema
+
+
+def test_box_score_placeholders_are_missing():
+    rows = pd.DataFrame(
+        {
+            "contest_id": ["123", "123", "123"],
+            "team": "Arizona",
+            "player": ["Smith, John", "Jones, Al", "Brown, Sam"],
+            "pos": ["G", "F", ""],
+            "mp": ["32:30", "DNP", "-"],
+            "pts": ["12", "DNP", "-"],
+            "fg%": ["45.5", "dnp", ""],
+        }
+    )
+    box_score = apply_schema("box_scores", rows)
+    assert box_score["mp"].tolist()[0] == 32.5
+    assert box_score["mp"].isna().tolist() == [False, True, True]
+    assert str(box_score["pts"].dtype) == "Int16"
+    assert box_score["pts"].isna().tolist() == [False, True, True]
+    assert box_score["fg%"].isna().tolist() == [False, True, True]
+    # Only number columns have placeholders
+    assert box_score["player"].tolist()[1] == "Jones, Al"
+
+
+def test_other_text_in_number_columns_is_an_error():
+    rows = pd.DataFrame(
+        {"contest_id": ["123"], "player": ["Smith, John"], "pts": ["x"]}
+    )
+    with pytest.raises(SchemaError, match="pts"):
+        apply_schema("box_scores", rows)
+    # Placeholders are only known for box scores
+    with pytest.raises(SchemaError, match="gp"):
+        apply_schema("stats", pd.DataFrame({"player": ["Smith, John"], "gp": ["DNP"]}))
+
+
+def test_jersey_numbers_are_text():
+    stats = apply_schema(
+        "stats", pd.DataFrame({"#": ["00", "0", "12"], "gp": ["30", "2", "31"]})
+    )
+    assert stats["#"].tolist() == ["00", "0", "12"]
+    assert str(stats["gp"].dtype) == "Int16"
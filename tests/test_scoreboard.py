@@ -0,0 +1,30 @@
+import pandas as pd
+
+from mbp.parsing import parse_scoreboard
+from mbp.schema import apply_schema
+from mbp.scoreboard import scoreboard_contests_to_season_rows
+from mbp.teams import TeamRegistry
+
+
+def test_scoreboard_contests_to_season_rows(page):
+    teams = TeamRegistry(
+        pd.DataFrame(
+            {
+                "team_name": ["Arizona", "Duke", "Gonzaga", "Purdue"],
+                "team_id": [100, 300, 301, 303],
+            }
+        )
+    )
+    contests = pd.DataFrame(parse_scoreboard(page("contests/livestream_scoreboards")))
+    contests.insert(0, "date", pd.Timestamp("2022-11-07"))
+    contests = contests.loc[contests["final"]]
+
+    rows = scoreboard_contests_to_season_rows(contests, teams)
+    assert rows["contest_id"].tolist() == ["123", "124", "126"]
+    # Ranks are dropped, teams outside the registry keep their name
+    assert rows["team"].tolist() == ["Arizona", "Duke", "Purdue"]
+    assert rows["opponent"].tolist() == ["Phoenix", "Arizona", "Gonzaga"]
+    assert rows["home"].tolist() == [1, 1, 0]
+    assert rows["neutral"].tolist() == [0, 0, 1]
+    assert rows["team_score"].tolist() == [85, 70, 84]
+    assert list(apply_schema("contests", rows).columns) == list(rows.columns)
@@ -0,0 +1,64 @@
+import pandas as pd
+
+from mbp.models.Season import reconcile_games
+from mbp.transform import clean_opponents
+
+
+def test_clean_opponents():
+    raw = pd.Series(["#5 Duke", "@ #12 Purdue", "Gonzaga @ Las Vegas, NV"])
+    (names, home, neutral) = clean_opponents(raw)
+    assert names.tolist() == ["Duke", "Purdue", "Gonzaga"]
+    assert home.tolist() == [1, 0, 0]
+    assert neutral.tolist() == [0, 0, 1]
+
+
+def team_games(rows: list) -> pd.DataFrame:
+    columns = ["contest_id", "team", "opponent", "home", "neutral", "team_score"]
+    games = pd.DataFrame(rows, columns=columns + ["opp_score"])
+    return games.assign(datetime=pd.Timestamp("2023-11-24 14:00"))
+
+
+def test_a_neutral_marker_on_either_row_makes_the_game_neutral(registry):
+    games = team_games(
+        [
+            # Only Arizona's schedule has the game, "Gonzaga @ Las Vegas, NV"
+            ("1", "Arizona", "Gonzaga", 0, 1, 70, 75),
+            # Both schedules, one of them listing it as a home game
+            ("2", "Purdue", "Duke", 1, 0, 80, 78),
+            ("2", "Duke", "Purdue", 0, 1, 78, 80),
+            # A true road game
+            ("3", "Purdue", "Arizona", 0, 0, 66, 71),
+            ("3", "Arizona", "Purdue", 1, 0, 71, 66),
+        ]
+    )
+    season = reconcile_games(games, registry).set_index("contest_id")
+
+    assert season.loc["1", "neutral"] == 1
+    # Neutral site games are seen from the first team by name
+    assert season.loc["1", ["home_team", "away_team"]].tolist() == [
+        "Arizona",
+        "Gonzaga",
+    ]
+    assert season.loc["1", ["home_score", "away_score"]].tolist() == [70, 75]
+    assert season.loc["2", "neutral"] == 1
+    assert season.loc["2", ["home_team", "home_score"]].tolist() == ["Duke", 78]
+    assert season.loc["3", "neutral"] == 0
+    assert season.loc["3", ["home_team", "away_team"]].tolist() == [
+        "Arizona",
+        "Purdue",
+    ]
+
+
+def test_games_without_the_neutral_column(registry):
+    games = team_games(
+        [
+            ("1", "Duke", "Gonzaga", 0, 0, 70, 75),
+            ("1", "Gonzaga", "Duke", 0, 0, 75, 70),
+            ("2", "Purdue", "Arizona", 1, 0, 66, 71),
+        ]
+    ).drop(columns="neutral")
+    season = reconcile_games(games, registry).set_index("contest_id")
+    # Both teams away is still a neutral site
+    assert season["neutral"].tolist() == [1, 0]
+    assert season.loc["1", "home_team"] == "Duke"
+    assert season.loc["2", "home_team"] == "Purdue"
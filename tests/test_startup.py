@@ -0,0 +1,41 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+SCRIPT = Path(__file__).parent.parent / "scripts" / "startup_benchmark.py"
+
+
+def load_benchmark():
+    spec = importlib.util.spec_from_file_location("startup_benchmark", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+benchmark = load_benchmark()
+
+# The model, storage and analysis layers
+ANALYSIS_MODULES = benchmark.DEFAULT_MODULES + [
+    "mbp.ratings",
+    "mbp.predict",
+    "mbp.schedule",
+    "mbp.backtest",
+    "mbp.bracket",
+    "mbp.features",
+    "mbp.player_log",
+]
+
+
+@pytest.mark.parametrize("module", ANALYSIS_MODULES)
+def test_imports_leave_out_the_scraping_stack(module):
+    loaded = benchmark.measure(module)["modules"]
+    scraping = [
+        name
+        for name in loaded
+        if any(
+            name == other or name.startswith(other + ".")
+            for other in benchmark.SCRAPING_MODULES
+        )
+    ]
+    assert scraping == []
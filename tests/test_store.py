@@ -0,0 +1,166 @@
+import os
+import stat
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from mbp.files import write_atomic
+from mbp.store import SeasonStore, SqliteStore
+
+
+BACKENDS = ["parquet", "sqlite"]
+
+
+def open_store(backend: str, root: Path):
+    if backend == "sqlite":
+        return SqliteStore(Path(root) / "mbp.sqlite3")
+    return SeasonStore(root)
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request) -> str:
+    return request.param
+
+
+def write_team(root, team: str, backend: str = "parquet") -> int:
+    store = open_store(backend, root)
+    rows = pd.DataFrame({"player": [f"{team} {i}" for i in range(20)], "gp": 30})
+    store.write("stats", 2022, rows.assign(team=team))
+    return os.getpid()
+
+
+def test_write_replaces_rows_by_key(tmp_path, backend):
+    store = open_store(backend, tmp_path)
+    assert store.version("stats", 2022) == 0
+    store.write("stats", 2022, pd.DataFrame({"team": ["A", "B"], "player": ["x", "y"]}))
+    version = store.version("stats", 2022)
+    store.write("stats", 2022, pd.DataFrame({"team": ["A"], "player": ["z"]}))
+    assert store.version("stats", 2022) not in (0, version)
+
+    stats = store.read("stats", 2022, columns=["team", "player"])
+    assert stats.values.tolist() == [["A", "z"], ["B", "y"]]
+    assert store.keys("stats", 2022) == {"A", "B"}
+    assert store.has("stats", 2022, "B") and not store.has("stats", 2022, "C")
+    # Seasons are kept apart
+    assert store.read("stats", 2023).empty
+    assert store.keys("stats", 2023) == set()
+
+
+def test_read_filters(tmp_path, backend):
+    store = open_store(backend, tmp_path)
+    games = pd.DataFrame(
+        {
+            "team": ["Arizona", "Arizona", "Duke", "Purdue"],
+            "opponent": ["Duke", "Purdue", "Arizona", "Gonzaga"],
+            "datetime": pd.to_datetime(
+                [
+                    "2023-11-06 19:00",
+                    "2023-11-10 20:30",
+                    "2023-11-06 19:00",
+                    "2023-11-10 11:00",
+                ]
+            ),
+            "contest_id": ["1", "2", "1", "3"],
+        }
+    )
+    store.write("games", 2023, games)
+
+    picked = store.read(
+        "games", 2023, filters=[("team", "in", ["Duke", "Purdue", "Gonzaga"])]
+    )
+    assert picked["team"].astype(str).tolist() == ["Duke", "Purdue"]
+    assert picked["datetime"].dtype == "datetime64[ns]"
+
+    later = store.read(
+        "games",
+        2023,
+        columns=["team", "contest_id"],
+        filters=[("datetime", ">=", pd.Timestamp("2023-11-10 12:00"))],
+    )
+    assert later.values.tolist() == [["Arizona", "2"]]
+    assert list(later.columns) == ["team", "contest_id"]
+
+
+def test_get_store_backend_from_the_environment(tmp_path, monkeypatch):
+    import mbp.store
+
+    class TestSqliteStore(SqliteStore):
+        def __init__(self) -> None:
+            super().__init__(tmp_path / "mbp.sqlite3")
+
+    monkeypatch.setitem(mbp.store.STORES, "sqlite", TestSqliteStore)
+    monkeypatch.setattr(mbp.store, "_store", None)
+    monkeypatch.setenv("MBP_STORE", "sqlite")
+    assert isinstance(mbp.store.get_store(), TestSqliteStore)
+
+
+def test_concurrent_processes_keep_every_row(tmp_path, backend):
+    teams = [f"Team {i}" for i in range(24)]
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        args = ([tmp_path] * len(teams), teams, [backend] * len(teams))
+        list(executor.map(write_team, *args))
+
+    stats = open_store(backend, tmp_path).read("stats", 2022)
+    assert set(stats["team"]) == set(teams)
+    assert len(stats) == 20 * len(teams)
+
+
+def test_written_files_follow_the_umask(tmp_path):
+    store = SeasonStore(tmp_path)
+    umask = os.umask(0o027)
+    try:
+        store.write("stats", 2022, pd.DataFrame({"team": ["A"], "player": ["x"]}))
+    finally:
+        os.umask(umask)
+    (path,) = store.parts("stats", 2022)
+    assert stat.S_IMODE(path.stat().st_mode) == 0o640
+    # No temporary files are left behind
+    files = sorted(p.name for p in path.parent.iterdir())
+    assert files == [".lock", "part-000001.parquet"]
+
+
+def test_rewritten_files_keep_their_mode(tmp_path):
+    path = tmp_path / "teams.json"
+    write_atomic(path, b"{}")
+    path.chmod(0o600)
+    write_atomic(path, b"[]")
+    assert path.read_bytes() == b"[]"
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+
+
+def test_writes_add_parts_instead_of_rewriting_the_season(tmp_path):
+    store = SeasonStore(tmp_path)
+    for i in range(7):
+        write_team(tmp_path, f"Team {i}")
+    # Seven equal writes are parts of 4, 2 and 1 teams
+    parts = store.parts("stats", 2022)
+    assert [len(pd.read_parquet(part)) for part in parts] == [80, 40, 20]
+
+    first = parts[0].stat().st_mtime_ns
+    store.write("stats", 2022, pd.DataFrame({"team": ["Team 0"], "player": ["new"]}))
+    assert parts[0].stat().st_mtime_ns == first
+    stats = store.read("stats", 2022, columns=["player"])
+    assert len(stats) == 20 * 6 + 1
+    assert store.keys("stats", 2022) == {f"Team {i}" for i in range(7)}
+
+
+def test_replaced_rows_stay_replaced_under_filters(tmp_path):
+    store = SeasonStore(tmp_path)
+    write_team(tmp_path, "A")
+    write_team(tmp_path, "B")
+    write_team(tmp_path, "C")
+    store.write("stats", 2022, pd.DataFrame({"team": ["A"], "player": ["z"], "gp": 1}))
+    assert len(store.parts("stats", 2022)) > 1
+
+    # The new rows of A don't match, the old ones mustn't come back
+    stats = store.read("stats", 2022, columns=["player"], filters=[("gp", "==", 30)])
+    assert not stats["player"].str.startswith("A ").any()
+    assert len(stats) == 40
+
+    version = store.version("stats", 2022)
+    store.compact("stats", 2022)
+    assert len(store.parts("stats", 2022)) == 1
+    assert store.version("stats", 2022) != version
+    assert len(store.read("stats", 2022)) == 41
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from mbp.fetchers import HttpFetcher
+from mbp.sync import load_manifest, sync_team, sync_teams
+
+
+@pytest.fixture
+def seasons_dir(tmp_path, monkeypatch):
+    """
+    Keep the team manifests under tmp_path
+    """
+    import mbp.sync
+
+    root = tmp_path / "seasons"
+    monkeypatch.setattr(
+        mbp.sync, "team_save_dir", lambda team, year: root / str(year) / team
+    )
+    return root
+
+
+def test_sync_team_only_fetches_what_changed(site, store, registry, seasons_dir):
+    with HttpFetcher(base_url=site, retries=0) as fetcher:
+        summary = sync_team("Arizona", 2022, fetcher)
+        assert summary["new_games"] == ["123", "124"]
+        assert summary["games_changed"] and summary["stats_changed"]
+        assert store.keys("box_scores", 2022) == {"123", "124"}
+        assert store.keys("roster", 2022) == {"Arizona"}
+
+        manifest = json.loads((seasons_dir / "2022/Arizona/manifest.json").read_text())
+        assert manifest["contest_ids"] == ["123", "124"]
+        assert set(manifest["hashes"]) == {"games", "stats"}
+        assert manifest["last_synced"] is not None
+
+        # Nothing new: the schedule is the only page fetched and nothing
+        # is written again
+        fetched = fetcher.pages_fetched
+        version = store.version("games", 2022)
+        again = sync_team("Arizona", 2022, fetcher)
+        assert again["new_games"] == []
+        assert not again["games_changed"] and not again["stats_changed"]
+        assert fetcher.pages_fetched - fetched == 2
+        assert store.version("games", 2022) == version
+        assert load_manifest("Arizona", 2022)["hashes"] == manifest["hashes"]
+
+
+def test_a_lost_table_is_written_again(site, store, registry, seasons_dir):
+    with HttpFetcher(base_url=site, retries=0) as fetcher:
+        sync_team("Arizona", 2022, fetcher)
+        # The schedule still matches the manifest's hash, but the table is
+        # gone from the store
+        (store.root / "games").rename(store.root / "games-lost")
+        assert sync_team("Arizona", 2022, fetcher)["games_changed"]
+        assert store.keys("games", 2022) == {"Arizona"}
+
+
+def test_sync_teams_updates_the_league_tables_once(
+    site, store, registry, seasons_dir, monkeypatch
+):
+    import mbp.sync
+
+    updates = []
+    monkeypatch.setattr(mbp.sync, "update_season_tables", updates.append)
+    with HttpFetcher(base_url=site, retries=0) as fetcher:
+        summaries = sync_teams(["Arizona", "Duke"], 2022, fetcher)
+        assert summaries[0]["new_games"] == ["123", "124"]
+        assert summaries[1]["team"] == "Duke" and "error" in summaries[1]
+        assert updates == [2022]
+
+        # No new games, no update
+        sync_teams(["Arizona"], 2022, fetcher)
+        assert updates == [2022]
@@ -0,0 +1,99 @@
+import json
+
+import pandas as pd
+import pytest
+
+from mbp.teams import TeamRegistry, normalize_name
+
+# Spelled like the stats.ncaa.org team list
+TEAM_NAMES = [
+    "Arizona",
+    "Duke",
+    "Gonzaga",
+    "Iowa St.",
+    "Kansas",
+    "Kansas St.",
+    "Miami (FL)",
+    "Miami (OH)",
+    "Montana",
+    "Montana St.",
+    "NC State",
+    "North Carolina",
+    "Ohio",
+    "Ohio St.",
+    "Penn St.",
+    "Saint Mary's (CA)",
+    "St. John's (NY)",
+    "Texas",
+    "Texas A&M",
+    "Texas A&M-Corpus Christi",
+    "UConn",
+    "Utah",
+    "Utah St.",
+    "Utah Tech",
+]
+
+
+@pytest.fixture
+def teams(tmp_path) -> TeamRegistry:
+    table = pd.DataFrame(
+        {"team_name": TEAM_NAMES, "team_id": range(100, 100 + len(TEAM_NAMES))}
+    )
+    return TeamRegistry(table, aliases_file=tmp_path / "team_aliases.json")
+
+
+def saved_aliases(teams: TeamRegistry) -> dict:
+    if not teams.aliases_file.exists():
+        return {}
+    return json.loads(teams.aliases_file.read_text())
+
+
+def test_normalize_name():
+    assert normalize_name("#12 Iowa State") == "iowa st"
+    assert normalize_name("Saint Mary's (CA)") == normalize_name("St. Marys CA")
+    assert normalize_name("Texas A & M") == normalize_name("Texas A&M") == "texas am"
+    assert normalize_name("North Carolina State") == normalize_name("NC State")
+
+
+@pytest.mark.parametrize(
+    "name, canonical",
+    [
+        ("Kansas State", "Kansas St."),
+        ("Iowa State", "Iowa St."),
+        ("Ohio State", "Ohio St."),
+        ("Penn State", "Penn St."),
+        ("NC State", "NC State"),
+        ("North Carolina State", "NC State"),
+        ("Saint Marys", "Saint Mary's (CA)"),
+        ("St. John's", "St. John's (NY)"),
+        ("Connecticut", "UConn"),
+        ("Texas AM", "Texas A&M"),
+        ("Texas A&M Corpus Christi", "Texas A&M-Corpus Christi"),
+        ("Miami (Fla.)", "Miami (FL)"),
+        ("Miami Ohio", "Miami (OH)"),
+    ],
+)
+def test_standard_spellings_are_found_without_guessing(teams, name, canonical):
+    assert teams.find(name, fuzzy=False) == canonical
+    assert saved_aliases(teams) == {}
+
+
+def test_fuzzy_matches_are_saved_as_aliases(teams):
+    assert teams.find("Gonzga") == "Gonzaga"
+    assert teams.find("Kansas Stat") == "Kansas St."
+    assert saved_aliases(teams) == {"Gonzga": "Gonzaga", "Kansas Stat": "Kansas St."}
+
+    reloaded = TeamRegistry(
+        pd.DataFrame({"team_name": TEAM_NAMES, "team_id": range(len(TEAM_NAMES))}),
+        aliases=saved_aliases(teams),
+    )
+    assert reloaded.find("Gonzga", fuzzy=False) == "Gonzaga"
+
+
+@pytest.mark.parametrize(
+    "name", ["Montana Tech", "Utah Valley", "Miami", "Texas Southern", "Kansas City"]
+)
+def test_near_misses_are_not_matched(teams, name):
+    assert teams.find(name) is None
+    assert teams.canonical_name(name) == name
+    assert saved_aliases(teams) == {}
@@ -0,0 +1,95 @@
+import pandas as pd
+
+from mbp.transform import (
+    GAMES_RAW_COLUMNS,
+    parse_datetimes,
+    student_years,
+    transform_games,
+    transform_roster,
+    transform_season,
+    transform_stats,
+)
+
+
+def raw_games(rows: list) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=GAMES_RAW_COLUMNS)
+
+
+ARIZONA_GAMES = raw_games(
+    [
+        ("11/07/2022", "Phoenix", "W 85-60", "10,000", "123"),
+        ("11/10/2022", "@ #12 Duke", "L 60-70 (OT)", None, "124"),
+        ("12/20/2022 07:00 PM", "Gonzaga\n@ Las Vegas, NV", None, None, None),
+    ]
+)
+
+PURDUE_GAMES = raw_games(
+    [
+        ("11/08/2022 TBA", "#3 Gonzaga", "Canceled", None, None),
+        ("11/12/2022 12:30 PM", "@ Arizona", "W 77-70", "14,644", "130"),
+    ]
+)
+
+
+def test_parse_datetimes():
+    raw = pd.Series(["11/07/2022", "12/20/2022 07:00 PM", "11/08/2022 TBA", None])
+    parsed = parse_datetimes(raw)
+    assert parsed.tolist()[:3] == [
+        pd.Timestamp("2022-11-07"),
+        pd.Timestamp("2022-12-20 19:00"),
+        pd.Timestamp("2022-11-08"),
+    ]
+    assert pd.isna(parsed.iloc[3])
+
+
+def test_transform_games(registry):
+    games = transform_games(ARIZONA_GAMES, registry)
+    assert games["opponent"].tolist() == ["Phoenix", "Duke", "Gonzaga"]
+    assert games["home"].tolist() == [1, 0, 0]
+    assert games["neutral"].tolist() == [0, 0, 1]
+    assert games["result"].tolist()[:2] == ["85-60", "60-70"]
+    assert games["win"].tolist()[:2] == [1.0, 0.0]
+    assert games["team_score"].tolist()[:2] == [85, 60]
+    assert games["opp_score"].tolist()[:2] == [60, 70]
+    # Games not played yet
+    last = games.iloc[2]
+    assert pd.isna(last["result"]) and pd.isna(last["win"])
+    assert last["datetime"] == pd.Timestamp("2022-12-20 19:00")
+    assert "raw_datetime" not in games.columns
+
+
+def test_results_without_a_score_are_kept():
+    games = transform_games(PURDUE_GAMES)
+    assert games["result"].tolist() == ["Canceled", "77-70"]
+    assert pd.isna(games["win"].iloc[0]) and games["win"].iloc[1] == 1.0
+
+
+def test_transform_season_is_the_same_as_team_by_team(registry):
+    season = transform_season(
+        "games", {"Arizona": ARIZONA_GAMES, "Purdue": PURDUE_GAMES}, registry
+    )
+    one_by_one = pd.concat(
+        [
+            transform_games(raw.assign(team=team), registry)
+            for team, raw in [("Arizona", ARIZONA_GAMES), ("Purdue", PURDUE_GAMES)]
+        ],
+        ignore_index=True,
+    )
+    pd.testing.assert_frame_equal(season, one_by_one)
+    assert season["team"].tolist() == ["Arizona"] * 3 + ["Purdue"] * 2
+
+    assert list(transform_season("stats", {}).columns) == ["team"]
+
+
+def test_transform_roster_and_stats():
+    roster = transform_roster(
+        pd.DataFrame({"player": ["Smith, John", "Jones, Al"], "height": ["6-3", ""]})
+    )
+    assert roster["height_ft"].tolist()[0] == 6
+    assert roster["height_in"].tolist()[0] == 3
+    assert roster[["height_ft", "height_in"]].iloc[1].isna().all()
+    assert "height" not in roster.columns
+
+    stats = transform_stats(pd.DataFrame({"yr": ["Fr", "SO", " jr ", "Sr", "Gr"]}))
+    assert stats["year"].tolist() == [1, 2, 3, 4, 5]
+    assert student_years(pd.Series([None])).tolist() == [5]